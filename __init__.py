@@ -1,13 +1,71 @@
 # -*- encoding: utf-8 -*-
+"""
+包内的类、对象在第一次访问时才导入其所在模块（PEP 562 模块级 __getattr__），
+from geotransform import CoordTrans 只导入纯 Python 的 coordinate 模块，不导入 numpy、pyproj、requests。
+"""
+import importlib
 
-from .coordinate import CoordTrans
+_exports = {
+    'CoordTrans': 'coordinate',
+    'ChinaBoundary': 'boundary',
+    'CoordTransArray': 'coordinate_array',
+    'OffsetGrid': 'offset_grid',
 
-from .projection import Epsg
-from .projection import TransProj
-from .projection import CRS
-from .projection import Transformer
+    'Epsg': 'projection',
+    'TransProj': 'projection',
+    'TransformerCache': 'projection',
+    'transformer_cache': 'projection',
+    'CRS': 'projection',
+    'Transformer': 'projection',
 
-from .amap import AMapGeo
-from .amap import AMapReGeo
-from .amap import GeoDistanceDirect
+    'GaussKruger': 'gauss',
+    'Ellipsoid': 'gauss',
+    'Helmert': 'helmert',
 
+    'ParallelTransformer': 'parallel',
+    'CsvConverter': 'stream',
+    'CoordFile': 'coord_file',
+    'ArrowConverter': 'columnar',
+
+    'ConversionGraph': 'graph',
+    'ConversionPlan': 'graph',
+    'conversion_graph': 'graph',
+    'GeometryTransformer': 'geometry',
+
+    'AMapGeo': 'amap',
+    'AMapReGeo': 'amap',
+    'GeoDistanceDirect': 'amap',
+    'AMapSession': 'amap',
+    'amap_session': 'amap',
+    'AMapBulkGeo': 'amap',
+    'AMapBulkReGeo': 'amap',
+    'AMapError': 'amap',
+    'AMapSnapReGeo': 'amap',
+    'AsyncAMapGeo': 'amap_async',
+    'AsyncAMapReGeo': 'amap_async',
+    'AsyncAMapSession': 'amap_async',
+    'AsyncAMapBulkGeo': 'amap_async',
+    'AsyncAMapBulkReGeo': 'amap_async',
+    'AsyncAMapSnapReGeo': 'amap_async',
+    'GeocodeCache': 'geocode_cache',
+
+    'Metrics': 'metrics',
+    'LoggingSink': 'metrics',
+    'PrometheusTextSink': 'metrics',
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name):
+    module_name = _exports.get(name)
+    if module_name is None:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    value = getattr(importlib.import_module('.' + module_name, __name__), name)
+    # 保存到包的命名空间中，之后的访问不再经过 __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
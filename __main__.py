@@ -0,0 +1,139 @@
+# -*- encoding: utf-8 -*-
+"""
+命令行工具：python -m geotransform <子命令> [参数]
+    warmup  预先生成 transformer，并将 PROJ pipeline 写入缓存文件，之后的进程可直接从缓存文件创建 transformer
+    convert 流式分块转换分隔符文本（CSV 等）坐标文件，输出转换速度
+"""
+import sys
+import time
+import argparse
+
+from .coordinate_array import CoordTransArray
+from .projection import Epsg, TransProj, transformer_cache, warm_up
+from .stream import CsvConverter
+
+
+def epsg_method(name):
+    """命令行参数：Epsg 类方法名 -> Epsg 类方法"""
+    if name not in Epsg.methods:
+        raise argparse.ArgumentTypeError('不支持的坐标系：{}（可选：{}）'.format(name, ', '.join(Epsg.methods)))
+    return getattr(Epsg, name)
+
+
+def cmd_warmup(args):
+    if args.pipeline_cache:
+        transformer_cache.load_pipelines(args.pipeline_cache)
+    trans_projs = [
+        TransProj(
+            exist_proj=exist_proj, exist_lng0=args.source_lng0, exist_with_zone=args.source_with_zone,
+            target_proj=target_proj, target_lng0=args.target_lng0, target_with_zone=args.target_with_zone,
+        )
+        for exist_proj, target_proj in args.pair
+    ]
+    start_time = time.perf_counter()
+    warm_up(trans_projs, args.lngs, workers=args.workers)
+    elapsed = time.perf_counter() - start_time
+    stats = transformer_cache.stats()
+    print('生成 transformer 个数：%d，耗时：%.3fS（其中从 pipeline 缓存创建：%d 个）' % (
+        stats['misses'], elapsed, stats['pipeline_builds']))
+    if args.pipeline_cache:
+        print('PROJ pipeline 缓存文件：%s（%d 条）' % (args.pipeline_cache, len(transformer_cache.pipelines)))
+    return 0
+
+
+def coord_method(name):
+    """命令行参数：CoordTransArray 方法名"""
+    if name.startswith('_') or '_to_' not in name or not callable(getattr(CoordTransArray, name, None)):
+        raise argparse.ArgumentTypeError('不支持的转换方法：{}'.format(name))
+    return name
+
+
+def show_progress(stats):
+    """convert 的进度回调，在标准错误输出的同一行刷新已转换点数"""
+    sys.stderr.write('\r已转换：%d 点，%.0f 点/秒' % (stats['points'], stats['points_per_second']))
+
+
+def cmd_convert(args):
+    if args.pipeline_cache:
+        transformer_cache.load_pipelines(args.pipeline_cache)
+    if args.coord:
+        func = args.coord
+        if args.workers > 1:
+            from .parallel import ParallelTransformer
+            func = ParallelTransformer.coord_trans(args.coord, workers=args.workers)
+    else:
+        kwargs = dict(
+            exist_proj=args.pair[0], exist_lng0=args.source_lng0, exist_with_zone=args.source_with_zone,
+            target_proj=args.pair[1], target_lng0=args.target_lng0, target_with_zone=args.target_with_zone,
+        )
+        if args.workers > 1:
+            from .parallel import ParallelTransformer
+            func = ParallelTransformer.trans_proj(workers=args.workers, **kwargs)
+        else:
+            func = TransProj(**kwargs)
+    converter = CsvConverter(
+        func, columns=args.columns, delimiter=args.delimiter, precision=args.precision,
+        chunk_size=args.chunk_size, skip_header=args.skip_header, keep_columns=args.keep_columns,
+    )
+    try:
+        stats = converter.convert(args.input, args.output, show_progress if args.progress else None)
+    finally:
+        if hasattr(func, 'close'):
+            func.close()
+    if args.progress:
+        sys.stderr.write('\n')
+    sys.stderr.write('转换点数：%d，耗时：%.3fS，%.0f 点/秒\n' % (stats['points'], stats['seconds'], stats['points_per_second']))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m geotransform', description='坐标转换命令行工具')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    warmup = subparsers.add_parser('warmup', help='预先生成 transformer 并写入 PROJ pipeline 缓存文件')
+    warmup.add_argument('--pair', nargs=2, action='append', required=True, type=epsg_method,
+                        metavar=('SOURCE', 'TARGET'), help='输入、输出坐标系（Epsg 类方法名），可重复指定多组')
+    warmup.add_argument('--source-lng0', type=float, help='输入坐标的中央经线')
+    warmup.add_argument('--source-with-zone', action='store_true', help='输入投影坐标带有分度带带号')
+    warmup.add_argument('--target-lng0', type=float, help='输出坐标的中央经线')
+    warmup.add_argument('--target-with-zone', action='store_true', help='输出投影坐标带有分度带带号')
+    warmup.add_argument('--lngs', nargs='+', type=float,
+                        help='需要预热的经度（或中央经线），默认为 75~135 度的全部 3 度带中央经线')
+    warmup.add_argument('--workers', type=int, default=4, help='线程数，默认为 4')
+    warmup.add_argument('--pipeline-cache', help='PROJ pipeline 缓存文件路径')
+    warmup.set_defaults(func=cmd_warmup)
+
+    convert = subparsers.add_parser('convert', help='流式分块转换分隔符文本坐标文件')
+    convert.add_argument('input', help='输入文件路径，- 为标准输入')
+    convert.add_argument('output', help='输出文件路径，- 为标准输出')
+    method = convert.add_mutually_exclusive_group(required=True)
+    method.add_argument('--coord', type=coord_method, metavar='METHOD',
+                        help='wgs84、gcj02、bd09 之间的转换方法（CoordTrans 方法名），如 wgs84_to_gcj02')
+    method.add_argument('--pair', nargs=2, type=epsg_method, metavar=('SOURCE', 'TARGET'),
+                        help='输入、输出坐标系（Epsg 类方法名），使用 TransProj 转换')
+    convert.add_argument('--source-lng0', type=float, help='输入坐标的中央经线')
+    convert.add_argument('--source-with-zone', action='store_true', help='输入投影坐标带有分度带带号')
+    convert.add_argument('--target-lng0', type=float, help='输出坐标的中央经线')
+    convert.add_argument('--target-with-zone', action='store_true', help='输出投影坐标带有分度带带号')
+    convert.add_argument('--columns', nargs='+', type=int, default=[0, 1],
+                         help='坐标所在列号（从 0 开始），依次为 X、Y、Z，默认为 0 1')
+    convert.add_argument('--delimiter', default=',', help='分隔符，默认为逗号')
+    convert.add_argument('--precision', type=int, default=6, help='输出坐标的小数位数，默认为 6')
+    convert.add_argument('--chunk-size', type=int, default=100000, help='每块的行数，默认为 100000')
+    convert.add_argument('--skip-header', type=int, default=0, help='跳过（原样输出）的表头行数')
+    convert.add_argument('--keep-columns', action='store_true', help='保留输入的全部列，只替换坐标列')
+    convert.add_argument('--workers', type=int, default=1, help='进程数，大于 1 时多进程并行转换每一块')
+    convert.add_argument('--pipeline-cache', help='PROJ pipeline 缓存文件路径')
+    convert.add_argument('--progress', action='store_true', help='在标准错误输出中显示进度')
+    convert.set_defaults(func=cmd_convert)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
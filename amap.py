@@ -5,22 +5,127 @@
 3. web api文档地址：https://lbs.amap.com/api/webservice/guide/api/georegeo
 """
 
+import os
 import re
+import abc
 import math
+import time
+import threading
 from urllib import parse
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from .metrics import metrics
+except ImportError:
+    # 直接运行本文件（python amap.py）时没有包的上下文
+    from metrics import metrics
+
+# configure 中表示“不修改”的参数默认值（timeout 的 None 表示不限制）
+_UNCHANGED = object()
+
+
+class AMapSession(object):
+    """
+    高德 web api 请求的 HTTP 连接池，进程内所有 AMapGeo、AMapReGeo 对象默认共享（见模块级对象 amap_session）。
+    内部为一个 requests.Session（第一次请求时创建），同一主机的连接保持（keep-alive）并复用，
+    不再为每个查询对象新建 TCP（https 时还有 TLS）连接。
+    urllib3 连接池是线程安全的，多线程并发查询时 pool_size 应不小于线程数，超出的连接用完即关闭、不放回连接池。
+    fork 出的子进程第一次请求时重新创建 Session，不与父进程共用连接。
+    """
+
+    def __init__(self, pool_size=10, timeout=None, retries=0):
+        """
+        :param pool_size: int 每个主机最多保持的连接数
+        :param timeout: float or tuple 请求超时（秒），可以为 (连接超时, 读取超时)，默认为 None 不限制（与 requests.get 相同）
+        :param retries: int 连接失败时的重试次数
+        """
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """requests.Session 对象"""
+        session = self._session
+        if session is not None and self._pid == os.getpid():
+            return session
+        with self._lock:
+            if self._session is None or self._pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, max_retries=self.retries)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+                self._pid = os.getpid()
+            return self._session
+
+    def configure(self, pool_size=None, timeout=_UNCHANGED, retries=None):
+        """
+        修改连接池设置，已建立的连接关闭，下次请求时按新的设置创建
+        :param pool_size: int 见 __init__，None 为不修改
+        :param timeout: float or tuple 见 __init__，None 为不限制，不传入为不修改
+        :param retries: int 见 __init__，None 为不修改
+        """
+        if pool_size is not None:
+            self.pool_size = pool_size
+        if timeout is not _UNCHANGED:
+            self.timeout = timeout
+        if retries is not None:
+            self.retries = retries
+        self.close()
+
+    def get(self, url, timeout=None, **kwargs):
+        """
+        GET 请求
+        :param url: str
+        :param timeout: float or tuple 请求超时（秒），默认为 self.timeout
+        :return: requests.Response 对象
+        """
+        return self.session.get(url, timeout=self.timeout if timeout is None else timeout, **kwargs)
+
+    def close(self):
+        """关闭全部连接"""
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None and self._pid == os.getpid():
+            session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# 进程内共享的连接池
+amap_session = AMapSession()
 
 
 class AMapGeoAndReGeoBase(object):
-    def __init__(self, api_url, **parameters):
+    # 缓存键的类型，见 geocode_cache.GeocodeCache.key
+    cache_kind = None
+
+    def __init__(self, api_url, session=None, timeout=None, cache=None, **parameters):
         """
         :param api_url: str 请求的api url
+        :param session: obj 发送请求的对象，默认为共享连接池 amap_session。
+                        可以为 AMapSession 对象、requests.Session 对象，或者任何有 get(url, timeout=...) 方法的对象
+        :param timeout: float or tuple 请求超时（秒），默认为 AMapSession 对象的设置（requests.Session 为不限制）
+        :param cache: obj geocode_cache.GeocodeCache 结果缓存，全部地址（坐标）命中时不发送请求，默认不使用
         :param parameters: dict 请求参数
         self.result 查询结果。返回字典
         self.status bool 查询结果状态。成功获取到结果时为 Ture， 否则为False。
         """
         self.parameters = parameters
         self.api_url = api_url
+        self.session = amap_session if session is None else session
+        self.timeout = timeout
+        self.cache = cache
         self.__response = None
         self.result = None
         self.status = False
@@ -34,21 +139,78 @@ class AMapGeoAndReGeoBase(object):
 
     @property
     def response(self):
-        """请求响应对象，urllib的urlopen对象"""
-        if not self.__response:
-            self.__response = requests.get(self.url)
+        """请求响应对象，requests.Response 对象"""
+        if self.__response is None:
+            if not metrics.enabled:
+                self.__response = self._get()
+            else:
+                self.__response = self._timed_get()
         return self.__response
 
+    def _get(self):
+        return self.session.get(self.url, timeout=self.timeout)
+
+    def _timed_get(self):
+        """请求并记录运行指标（见 metrics 模块）：请求耗时、HTTP 状态码，请求异常时状态记为 error"""
+        api = type(self).__name__
+        start_time = time.perf_counter()
+        status = 'error'
+        try:
+            response = self._get()
+            status = response.status_code
+            return response
+        finally:
+            metrics.observe('geotransform_amap_request_seconds', time.perf_counter() - start_time, api=api)
+            metrics.inc('geotransform_amap_requests_total', api=api, status=status)
+
     def get_result(self):
         """结果"""
-        if self.response.status_code == 200:
+        if self.result is None and self.cache is not None:
+            self.result = self._cache_lookup()
+        if self.result is None and self.response.status_code == 200:
             self.result = self.response.json(strict=False)
+            if self.cache is not None:
+                self._cache_store()
         if hasattr(self, 'formatted_address') and self.formatted_address:
             self.status = True
         if hasattr(self, 'coordinates') and self.coordinates:
             self.status = True
         return self.result
 
+    def _cache_items(self):
+        """请求的地址（坐标）列表，单点查询时只有第一个；默认为空列表，即不使用缓存"""
+        return []
+
+    def _cache_result(self, codes):
+        """由每一项的缓存内容组成与接口返回格式相同的结果，默认原样返回每一项的列表"""
+        return codes
+
+    def _result_codes(self):
+        """接口返回结果中每一项的内容列表，默认为空列表"""
+        return []
+
+    def _cache_keys(self):
+        return [self.cache.key(self.cache_kind, item, self.parameters) for item in self._cache_items()]
+
+    def _cache_lookup(self):
+        """全部地址（坐标）命中缓存时返回由缓存内容组成的结果，否则返回 None"""
+        keys = self._cache_keys()
+        if not keys:
+            return None
+        found = self.cache.get_many(keys)
+        if any(key not in found for key in keys):
+            return None
+        return self._cache_result([found[key] for key in keys])
+
+    def _cache_store(self):
+        """将请求成功的结果按每一项保存到缓存"""
+        if not self.result or self.result.get('status') != '1':
+            return
+        keys = self._cache_keys()
+        codes = self._result_codes()
+        if len(codes) == len(keys):
+            self.cache.set_many(zip(keys, codes))
+
     def _get_codes(self, key):
         """获取地里/逆地理编码信息"""
         if not self.result:
@@ -112,8 +274,10 @@ class AMapGeoAndReGeoBase(object):
 
 
 class AMapGeo(AMapGeoAndReGeoBase):
+    cache_kind = 'geo'
+
     def __init__(self, key, address, city=None, batch=None, sig=None,
-                 api_url="http://restapi.amap.com/v3/geocode/geo"):
+                 api_url="http://restapi.amap.com/v3/geocode/geo", session=None, timeout=None, cache=None):
         """
         将详细的结构化地址转换为高德经纬度坐标。且支持对地标性名胜景区、建筑物名称解析为高德经纬度坐标。
         结构化地址举例：北京市朝阳区阜通东大街6号转换后经纬度：116.480881,39.989410
@@ -135,6 +299,9 @@ class AMapGeo(AMapGeoAndReGeoBase):
                         batch 参数设置为 False 时进行单点查询，此时即使传入多个地址也只返回第一个地址的解析查询结果。
         :param sig: str 数字签名 可选参数
                         请参考数字签名获取和使用方法：https://lbs.amap.com/faq/account/key/72
+        :param session: obj 发送请求的对象，默认为共享连接池 amap_session，见 AMapGeoAndReGeoBase
+        :param timeout: float or tuple 请求超时（秒），见 AMapGeoAndReGeoBase
+        :param cache: obj geocode_cache.GeocodeCache 结果缓存，见 AMapGeoAndReGeoBase
         """
         if isinstance(address, list) or isinstance(address, tuple):
             address_format = "|".join(map(lambda x: str(x), address))
@@ -151,7 +318,17 @@ class AMapGeo(AMapGeoAndReGeoBase):
             'batch': batch,
             'sig': sig,
         }
-        super().__init__(api_url, **parameters)
+        super().__init__(api_url, session, timeout, cache, **parameters)
+
+    def _cache_items(self):
+        addresses = self.parameters['address'].split('|')
+        return addresses if self.parameters.get('batch') else addresses[:1]
+
+    def _cache_result(self, codes):
+        return {'status': '1', 'info': 'OK', 'infocode': '10000', 'count': str(len(codes)), 'geocodes': codes}
+
+    def _result_codes(self):
+        return self.result.get('geocodes') or []
 
     @property
     def geocode(self):
@@ -180,9 +357,11 @@ class AMapGeo(AMapGeoAndReGeoBase):
 
 
 class AMapReGeo(AMapGeoAndReGeoBase):
+    cache_kind = 'regeo'
+
     def __init__(self, key, location, poitype=None, radius=None,
                  extensions=None, batch=None, roadlevel=None, sig=None, homeorcorp=None,
-                 api_url='http://restapi.amap.com/v3/geocode/regeo'):
+                 api_url='http://restapi.amap.com/v3/geocode/regeo', session=None, timeout=None, cache=None):
         """
         逆地理编码：将经纬度转换为详细结构化的地址，且返回附近周边的POI、AOI信息。
         例如：116.480881,39.989410 转换地址描述后：北京市朝阳区阜通东大街6号
@@ -221,6 +400,9 @@ class AMapReGeo(AMapGeoAndReGeoBase):
                         0：不对召回的排序策略进行干扰。
                         1：综合大数据分析将居家相关的 POI 内容优先返回，即优化返回结果中 pois 字段的poi顺序。
                         2：综合大数据分析将公司相关的 POI 内容优先返回，即优化返回结果中 pois 字段的poi顺序。
+        :param session: obj 发送请求的对象，默认为共享连接池 amap_session，见 AMapGeoAndReGeoBase
+        :param timeout: float or tuple 请求超时（秒），见 AMapGeoAndReGeoBase
+        :param cache: obj geocode_cache.GeocodeCache 结果缓存，坐标按缓存的 precision 取整后比较，见 AMapGeoAndReGeoBase
         """
         if isinstance(location, list) or isinstance(location, tuple):
             location_format = "|".join(map(lambda x: str(x), location))
@@ -246,7 +428,24 @@ class AMapReGeo(AMapGeoAndReGeoBase):
             'sig': sig,
             'homeorcorp': homeorcorp,
         }
-        super().__init__(api_url, **parameters)
+        super().__init__(api_url, session, timeout, cache, **parameters)
+
+    def _cache_items(self):
+        locations = self.parameters['location'].split('|')
+        return locations if self.parameters.get('batch') else locations[:1]
+
+    def _cache_result(self, codes):
+        result = {'status': '1', 'info': 'OK', 'infocode': '10000'}
+        if self.parameters.get('batch'):
+            result['regeocodes'] = codes
+        else:
+            result['regeocode'] = codes[0]
+        return result
+
+    def _result_codes(self):
+        if self.parameters.get('batch'):
+            return self.result.get('regeocodes') or []
+        return [self.result['regeocode']] if self.result.get('regeocode') else []
 
     @property
     def regeocode(self):
@@ -284,6 +483,267 @@ class AMapReGeo(AMapGeoAndReGeoBase):
         return self.get_cell_info('towncode')
 
 
+class AMapError(Exception):
+    """高德 web api 请求失败（HTTP 状态码不是 200，或返回的 status 不是 1）"""
+
+    def __init__(self, info, infocode=None):
+        super().__init__(info if infocode is None else '{}（{}）'.format(info, infocode))
+        self.info = info
+        self.infocode = infocode
+
+
+class AMapBulkBase(object, metaclass=abc.ABCMeta):
+    """
+    任意数量地址（坐标）的批量查询：按接口允许的最大个数分批（batch=True），多个批次在线程池中并发请求，
+    再按输入顺序将每一项的结果放回原位，请求次数降为逐个查询的 1/10（地理编码）或 1/20（逆地理编码）。
+    某一项输入无效或所在批次请求失败时，该项结果为 None，errors 中对应位置为异常对象，其他项不受影响。
+    结果属性均为与输入等长的列表，第一次访问时发送请求。
+    指定 cache 时先查询缓存，只有未命中的地址（坐标）参与分批请求，请求成功的结果写入缓存。
+    """
+    query_class = None
+    # 每个请求最多的地址（坐标）个数
+    max_batch = None
+    # 批量请求结果中每一项的列表的键
+    codes_key = None
+
+    def __init__(self, key, items, batch_size=None, workers=4, session=None, timeout=None, cache=None, **parameters):
+        """
+        :param key: str 高德Key
+        :param items: list 地址（坐标）列表
+        :param batch_size: int 每个请求的地址（坐标）个数，默认为接口允许的最大个数
+        :param workers: int 同时进行的请求数
+        :param session: obj 发送请求的对象，见 AMapGeoAndReGeoBase
+        :param timeout: float or tuple 请求超时（秒），见 AMapGeoAndReGeoBase
+        :param cache: obj geocode_cache.GeocodeCache 结果缓存，默认不使用
+        :param parameters: 查询类的其他参数，如 city、api_url
+        """
+        self.key = key
+        self.items = list(items)
+        self.batch_size = min(batch_size or self.max_batch, self.max_batch)
+        self.workers = workers
+        self.session = session
+        self.timeout = timeout
+        self.cache = cache
+        self.parameters = parameters
+        self.results = None
+        self.errors = [None] * len(self.items)
+        self.requests = 0
+        self.cache_hits = 0
+        self._keys = {}
+        self._values = [self._normalize(item) for item in self.items]
+
+    @abc.abstractmethod
+    def _normalize(self, item):
+        """检查并格式化一项输入，无效时返回异常对象"""
+
+    def _batches(self):
+        """
+        有效并且没有命中缓存的输入按 batch_size 分批
+        :return: list [(输入位置列表, 格式化后的输入列表), ...]
+        """
+        valid = [
+            (index, value) for index, value in enumerate(self._values)
+            if not isinstance(value, Exception) and self.results[index] is None
+        ]
+        return [
+            ([index for index, _ in valid[start:start + self.batch_size]],
+             [value for _, value in valid[start:start + self.batch_size]])
+            for start in range(0, len(valid), self.batch_size)
+        ]
+
+    def _query(self, values):
+        return self.query_class(self.key, values, batch=True, session=self.session, timeout=self.timeout,
+                                **self.parameters)
+
+    def _codes(self, query, count):
+        """
+        检查一个批次的请求结果
+        :return: list 每一项的结果字典
+        """
+        if query.response.status_code != 200:
+            raise AMapError('HTTP {}'.format(query.response.status_code))
+        query.get_result()
+        if not query.result or query.result.get('status') != '1':
+            result = query.result or {}
+            raise AMapError(result.get('info', '请求失败'), result.get('infocode'))
+        codes = query.result.get(self.codes_key) or []
+        if len(codes) != count:
+            raise AMapError('返回结果个数（{}）与请求个数（{}）不一致'.format(len(codes), count))
+        return codes
+
+    def _fill(self, indexes, codes=None, error=None):
+        """将一个批次的结果（或异常）放回每一项的原位"""
+        for position, index in enumerate(indexes):
+            if error is None:
+                self.results[index] = codes[position] or None
+            else:
+                self.errors[index] = error
+        if error is None and self.cache is not None:
+            self.cache.set_many([(self._keys[index], code) for index, code in zip(indexes, codes) if code])
+
+    def _run(self, indexes, values):
+        try:
+            query = self._query(values)
+            self._fill(indexes, codes=self._codes(query, len(values)))
+        except Exception as e:
+            self._fill(indexes, error=e)
+
+    def _prepare(self):
+        self.results = [None] * len(self.items)
+        self.errors = [value if isinstance(value, Exception) else None for value in self._values]
+        if self.cache is not None:
+            kind = self.query_class.cache_kind
+            self._keys = {
+                index: self.cache.key(kind, value, self.parameters)
+                for index, value in enumerate(self._values) if not isinstance(value, Exception)
+            }
+            found = self.cache.get_many(self._keys.values())
+            for index, key in self._keys.items():
+                if key in found:
+                    self.results[index] = found[key]
+            self.cache_hits = sum(result is not None for result in self.results)
+        batches = self._batches()
+        self.requests = len(batches)
+        return batches
+
+    def fetch(self):
+        """
+        发送全部请求
+        :return: 对象本身
+        """
+        batches = self._prepare()
+        if len(batches) == 1 or self.workers <= 1:
+            for indexes, values in batches:
+                self._run(indexes, values)
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(lambda batch: self._run(*batch), batches))
+        return self
+
+    def _results(self):
+        if self.results is None:
+            self.fetch()
+        return self.results
+
+    @property
+    def ok(self):
+        """每一项是否查询成功"""
+        self._results()
+        return [error is None for error in self.errors]
+
+    def get_cell_info(self, key):
+        """每一项结果字典中 key 对应的值，key 见 AMapGeoAndReGeoBase.get_cell_info，失败的项为 None"""
+        return [code.get(key) if code else None for code in self._results()]
+
+    @property
+    def country(self):
+        return self.get_cell_info('country')
+
+    @property
+    def province(self):
+        return self.get_cell_info('province')
+
+    @property
+    def city(self):
+        return self.get_cell_info('city')
+
+    @property
+    def district(self):
+        return self.get_cell_info('district')
+
+    @property
+    def township(self):
+        return self.get_cell_info('township')
+
+    @property
+    def adcode(self):
+        return self.get_cell_info('adcode')
+
+    @property
+    def citycode(self):
+        return self.get_cell_info('citycode')
+
+
+class AMapBulkGeo(AMapBulkBase):
+    """
+    任意数量地址的地理编码，每个请求 10 个地址，见 AMapBulkBase
+    示例：
+        geo = AMapBulkGeo(key, addresses, city='郑州')
+        for address, coordinate, error in zip(addresses, geo.coordinate, geo.errors):
+            ...
+    """
+    query_class = AMapGeo
+    max_batch = 10
+    codes_key = 'geocodes'
+
+    def _normalize(self, item):
+        address = str(item).strip() if item is not None else ''
+        if not address or '|' in address:
+            return ValueError('无效的地址：{!r}'.format(item))
+        return address
+
+    @property
+    def geocode(self):
+        """每一项的地理编码信息字典"""
+        return list(self._results())
+
+    @property
+    def formatted_address(self):
+        return self.get_cell_info('formatted_address')
+
+    @property
+    def coordinate(self):
+        """每一项的坐标 (经度, 纬度)，失败或没有解析出坐标的项为 None"""
+        return [
+            tuple(float(x.strip()) for x in location.split(',')) if isinstance(location, str) and location else None
+            for location in self.get_cell_info('location')
+        ]
+
+
+class AMapBulkReGeo(AMapBulkBase):
+    """
+    任意数量坐标的逆地理编码，每个请求 20 个坐标，见 AMapBulkBase
+    示例：
+        regeo = AMapBulkReGeo(key, [(113.645356, 34.762716), '113.703868,34.762716', ...], extensions='base')
+        print(regeo.formatted_address, regeo.adcode, regeo.errors)
+    """
+    query_class = AMapReGeo
+    max_batch = 20
+    codes_key = 'regeocodes'
+
+    def _normalize(self, item):
+        try:
+            if isinstance(item, str):
+                lng, lat = map(float, re.sub(r'\s', '', item).split(','))
+            else:
+                lng, lat = map(float, item)
+        except (TypeError, ValueError):
+            return ValueError('无效的坐标：{!r}'.format(item))
+        return '{:.6f},{:.6f}'.format(lng, lat)
+
+    @property
+    def coordinate(self):
+        """每一项输入的坐标 (经度, 纬度)，无效的输入为 None"""
+        return [None if isinstance(value, Exception) else tuple(map(float, value.split(',')))
+                for value in self._values]
+
+    @property
+    def regeocode(self):
+        """每一项的逆地理编码信息字典"""
+        return list(self._results())
+
+    def get_cell_info(self, key):
+        return [(code.get('addressComponent') or {}).get(key) if code else None for code in self._results()]
+
+    @property
+    def formatted_address(self):
+        return [code.get('formatted_address') if code else None for code in self._results()]
+
+    @property
+    def towncode(self):
+        return self.get_cell_info('towncode')
+
+
 class GeoDistanceDirect(object):
     @classmethod
     def single(cls, lng_0, lat_0, lng_1, lat_1, earth_radius=6378137):
@@ -324,6 +784,244 @@ class GeoDistanceDirect(object):
         return distance
 
 
+_GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def geohash_encode(lng, lat, precision=8):
+    """
+    计算坐标的 geohash
+    :param lng: float 经度
+    :param lat: float 纬度
+    :param precision: int geohash 长度，7 位约为 153m×153m，8 位约为 38m×19m
+    :return: str
+    """
+    lng_range = [-180.0, 180.0]
+    lat_range = [-90.0, 90.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, lng) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_BASE32[value])
+            bits = value = 0
+    return ''.join(chars)
+
+
+def geohash_center(geohash):
+    """
+    geohash 格网的中心点
+    :param geohash: str
+    :return: (经度, 纬度)
+    """
+    lng_range = [-180.0, 180.0]
+    lat_range = [-90.0, 90.0]
+    even = True
+    for char in geohash:
+        value = _GEOHASH_BASE32.index(char)
+        for shift in range(4, -1, -1):
+            interval = lng_range if even else lat_range
+            middle = (interval[0] + interval[1]) / 2
+            if value >> shift & 1:
+                interval[0] = middle
+            else:
+                interval[1] = middle
+            even = not even
+    return (lng_range[0] + lng_range[1]) / 2, (lat_range[0] + lat_range[1]) / 2
+
+
+class AMapSnapReGeo(object):
+    """
+    密集坐标（如车辆轨迹）的逆地理编码：先将坐标归并到格网（固定边长，或 geohash），每个格网只请求一个代表点，
+    再将代表点的结果分发给格网内的全部坐标。代表点由 AMapBulkReGeo 分批请求（每个请求 20 个），可以同时使用结果缓存。
+    结果属性均为与输入等长的列表，第一次访问时发送请求；collapse_ratio 为有效坐标数与格网数之比。
+    格网边长决定结果的精度：边长为 20 米时，同一格网内的坐标得到相同的 formatted_address。
+    示例：
+        regeo = AMapSnapReGeo(key, track_points, cell_size=30, cache=cache)
+        print(regeo.formatted_address, regeo.adcode, regeo.collapse_ratio, regeo.requests)
+    """
+    bulk_class = AMapBulkReGeo
+
+    def __init__(self, key, locations, cell_size=20, geohash=None, representative='center', **kwargs):
+        """
+        :param key: str 高德Key
+        :param locations: list 坐标列表，每个坐标为 'lng,lat' 字符串或 (lng, lat)
+        :param cell_size: float 格网边长（米），按 GeoDistanceDirect 计算纬度方向和每个纬度带经度方向的间隔（度）
+        :param geohash: int geohash 长度，指定时使用 geohash 格网，cell_size 不起作用
+        :param representative: str 格网的代表点：'center' 格网中心（同一格网的代表点总是相同，便于缓存），
+                               'first' 格网内的第一个坐标
+        :param kwargs: AMapBulkReGeo 的其他参数，如 extensions、batch_size、workers、session、timeout、cache
+        """
+        if representative not in ('center', 'first'):
+            raise ValueError('representative 只能为 center 或 first！')
+        self.key = key
+        self.locations = list(locations)
+        self.cell_size = cell_size
+        self.geohash = geohash
+        self.representative = representative
+        self._lat_step = cell_size / GeoDistanceDirect.single(0, 0, 0, 1)
+        self._lng_steps = {}
+        # 每一项所在格网的序号，无效的输入为异常对象
+        self._members = []
+        self.cells = []
+        representatives = {}
+        for item in self.locations:
+            point = self._parse(item)
+            if isinstance(point, Exception):
+                self._members.append(point)
+                self.cells.append(None)
+                continue
+            cell, center = self.cell_of(*point)
+            if cell not in representatives:
+                representatives[cell] = (len(representatives), center if representative == 'center' else point)
+            self._members.append(representatives[cell][0])
+            self.cells.append(cell)
+        self.bulk = self.bulk_class(key, [point for _, point in representatives.values()], **kwargs)
+
+    @staticmethod
+    def _parse(item):
+        """解析一项输入，返回 (经度, 纬度)，无效时返回异常对象"""
+        try:
+            if isinstance(item, str):
+                lng, lat = map(float, re.sub(r'\s', '', item).split(','))
+            else:
+                lng, lat = map(float, item)
+        except (TypeError, ValueError):
+            return ValueError('无效的坐标：{!r}'.format(item))
+        if not (-180 <= lng <= 180 and -90 <= lat <= 90):
+            return ValueError('无效的坐标：{!r}'.format(item))
+        return lng, lat
+
+    def cell_of(self, lng, lat):
+        """
+        坐标所在的格网
+        :param lng: float 经度
+        :param lat: float 纬度
+        :return: (格网标识, 格网中心 (经度, 纬度))，格网标识为 geohash 字符串或 (行号, 列号)
+        """
+        if self.geohash:
+            cell = geohash_encode(lng, lat, self.geohash)
+            return cell, geohash_center(cell)
+        row = math.floor(lat / self._lat_step)
+        center_lat = (row + 0.5) * self._lat_step
+        lng_step = self._lng_steps.get(row)
+        if lng_step is None:
+            # 纬度越高，相同边长对应的经度间隔越大
+            lng_step = self._lng_steps[row] = min(
+                self.cell_size / max(GeoDistanceDirect.single(0, center_lat, 1, center_lat), 1e-9), 360.0)
+        column = math.floor(lng / lng_step)
+        return (row, column), ((column + 0.5) * lng_step, center_lat)
+
+    def fetch(self):
+        """
+        发送全部请求
+        :return: 对象本身
+        """
+        self.bulk.fetch()
+        return self
+
+    def _fan(self, values):
+        """将每个格网的结果分发给格网内的全部坐标，无效的输入为 None"""
+        return [None if isinstance(member, Exception) else values[member] for member in self._members]
+
+    @property
+    def unique_cells(self):
+        """格网个数，即请求的代表点个数"""
+        return len(self.bulk.items)
+
+    @property
+    def collapse_ratio(self):
+        """有效坐标数与格网数之比，即请求量缩减的倍数"""
+        if not self.unique_cells:
+            return 0.0
+        return sum(cell is not None for cell in self.cells) / self.unique_cells
+
+    @property
+    def requests(self):
+        """发送的请求次数"""
+        return self.bulk.requests
+
+    @property
+    def cache_hits(self):
+        """命中缓存的格网个数"""
+        return self.bulk.cache_hits
+
+    @property
+    def errors(self):
+        """每一项的异常对象，成功的项为 None"""
+        self.bulk._results()
+        return [member if isinstance(member, Exception) else self.bulk.errors[member] for member in self._members]
+
+    @property
+    def ok(self):
+        """每一项是否查询成功"""
+        return [error is None for error in self.errors]
+
+    @property
+    def coordinate(self):
+        """每一项输入的坐标 (经度, 纬度)，无效的输入为 None"""
+        return [None if isinstance(point, Exception) else point for point in map(self._parse, self.locations)]
+
+    @property
+    def representative_coordinate(self):
+        """每一项所在格网的代表点坐标 (经度, 纬度)，即实际请求的坐标，无效的输入为 None"""
+        return self._fan(self.bulk.coordinate)
+
+    @property
+    def regeocode(self):
+        """每一项的逆地理编码信息字典（同一格网的坐标为同一个字典）"""
+        return self._fan(self.bulk.regeocode)
+
+    def get_cell_info(self, key):
+        return self._fan(self.bulk.get_cell_info(key))
+
+    @property
+    def formatted_address(self):
+        return self._fan(self.bulk.formatted_address)
+
+    @property
+    def country(self):
+        return self.get_cell_info('country')
+
+    @property
+    def province(self):
+        return self.get_cell_info('province')
+
+    @property
+    def city(self):
+        return self.get_cell_info('city')
+
+    @property
+    def district(self):
+        return self.get_cell_info('district')
+
+    @property
+    def township(self):
+        return self.get_cell_info('township')
+
+    @property
+    def adcode(self):
+        return self.get_cell_info('adcode')
+
+    @property
+    def citycode(self):
+        return self.get_cell_info('citycode')
+
+    @property
+    def towncode(self):
+        return self.get_cell_info('towncode')
+
+
 if __name__ == '__main__':
     geo = AMapGeo('你的高德api key', '郑州市燕庄地铁站')
     print(geo.coordinate)   # (113.703868, 34.762716)
@@ -0,0 +1,316 @@
+# -*- encoding: utf-8 -*-
+"""
+高德地图地理编码和逆地理编码 web api 的异步（asyncio）版本。
+需要安装 aiohttp 包（pip install aiohttp）。
+AsyncAMapGeo、AsyncAMapReGeo 的参数、结果属性（coordinate、formatted_address、province、adcode 等）与 AMapGeo、AMapReGeo 相同，
+只是需要先 await 对象（或 await obj.fetch()）完成请求，之后读取结果属性不再访问网络。
+同一个 AsyncAMapSession 的请求共用一个 aiohttp 连接池，并由信号量限制同时进行的请求数。
+示例：
+    async with AsyncAMapSession(concurrency=20) as session:
+        geo = await AsyncAMapGeo(key, '郑州市燕庄地铁站', session=session)
+        print(geo.coordinate)
+        geos = await AsyncAMapGeo.fetch_many(key, addresses, session=session, return_exceptions=True)
+        regeos = await gather([AsyncAMapReGeo(key, location, session=session) for location in locations])
+        bulk = await AsyncAMapBulkGeo(key, addresses, session=session)  # 每个请求 10 个地址
+        snap = await AsyncAMapSnapReGeo(key, track_points, cell_size=30, session=session)  # 每个格网一个代表点
+"""
+import json
+import time
+import asyncio
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from .amap import AMapGeo, AMapReGeo, AMapBulkGeo, AMapBulkReGeo, AMapSnapReGeo
+from .metrics import metrics
+
+
+def _require_aiohttp():
+    if aiohttp is None:
+        raise ImportError('异步查询需要安装 aiohttp 包：pip install aiohttp')
+
+
+class _Response(object):
+    """已读取完毕的响应，提供 AMapGeoAndReGeoBase.get_result 用到的 status_code、json()"""
+
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self, **kwargs):
+        return json.loads(self.text, **kwargs)
+
+
+class AsyncAMapSession(object):
+    """
+    异步请求的连接池和并发限制。
+    aiohttp.ClientSession 在第一次请求时于当前事件循环中创建，换用新的事件循环（如再次调用 asyncio.run）时重新创建。
+    自动创建的 ClientSession 在 asyncio.run 结束时（取消未完成的任务）关闭；换用新的事件循环时，
+    旧事件循环中的 ClientSession 交给旧事件循环关闭（其再次运行时）。
+    自行管理事件循环时，事件循环结束前应 await close() 关闭连接，或者使用 async with。
+    """
+
+    def __init__(self, concurrency=10, pool_size=None, timeout=10, session=None):
+        """
+        :param concurrency: int 最多同时进行的请求数
+        :param pool_size: int 连接池的连接数，默认与 concurrency 相同
+        :param timeout: float or tuple 请求超时（秒），可以为 (连接超时, 读取超时)，None 为不限制
+        :param session: obj aiohttp.ClientSession 使用已有的 ClientSession（由调用者负责关闭），默认自动创建
+        """
+        _require_aiohttp()
+        self.concurrency = concurrency
+        self.pool_size = pool_size or concurrency
+        self.timeout = timeout
+        self._session = session
+        self._owned = session is None
+        self._loop = None
+        self._semaphore = None
+        self._closer = None
+
+    @property
+    def session(self):
+        """当前事件循环中的 aiohttp.ClientSession 对象"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._owned and self._session is not None:
+                self._release(self._session, self._loop, self._closer)
+                self._session = self._closer = None
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_size)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._closer = loop.create_task(self._close_on_cancel(self._session))
+        return self._session
+
+    @staticmethod
+    async def _close_on_cancel(session):
+        """一直等待，被取消时（close()、asyncio.run 结束或换用新的事件循环时）在 ClientSession 所属的事件循环中关闭它"""
+        try:
+            await asyncio.get_running_loop().create_future()
+        finally:
+            await session.close()
+
+    @staticmethod
+    def _release(session, loop, closer):
+        """
+        关闭其他事件循环中创建的 ClientSession
+        :param session: obj aiohttp.ClientSession
+        :param loop: obj 创建 session 的事件循环，还没有关闭时取消其中的 closer 任务，由该事件循环（再次运行时）关闭连接
+        :param closer: obj _close_on_cancel 任务
+        """
+        if session.closed:
+            return
+        if loop.is_closed() or closer is None or closer.done():
+            # 所属的事件循环已关闭，连接无法再正常关闭，只将 session 标记为已关闭
+            session.detach()
+        else:
+            loop.call_soon_threadsafe(closer.cancel)
+
+    @staticmethod
+    def _client_timeout(timeout):
+        if isinstance(timeout, (tuple, list)):
+            return aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+        return aiohttp.ClientTimeout(total=timeout)
+
+    async def get(self, url, timeout=None, api='AMap'):
+        """
+        GET 请求，读取完整的响应内容
+        :param url: str
+        :param timeout: float or tuple 请求超时（秒），默认为 self.timeout
+        :param api: str 运行指标（见 metrics 模块）中的 api 标签
+        :return: 响应对象，有 status_code 属性和 json() 方法
+        """
+        session = self.session
+        timeout = self._client_timeout(self.timeout if timeout is None else timeout)
+        async with self._semaphore:
+            start_time = time.perf_counter()
+            status = 'error'
+            try:
+                async with session.get(url, timeout=timeout) as response:
+                    text = await response.text()
+                    status = response.status
+                    return _Response(status, text)
+            finally:
+                if metrics.enabled:
+                    metrics.observe('geotransform_amap_request_seconds', time.perf_counter() - start_time, api=api)
+                    metrics.inc('geotransform_amap_requests_total', api=api, status=status)
+
+    async def close(self):
+        """关闭自动创建的 ClientSession"""
+        if not self._owned:
+            return
+        session, self._session = self._session, None
+        closer, self._closer = self._closer, None
+        if session is None:
+            return
+        if self._loop is not asyncio.get_running_loop():
+            self._release(session, self._loop, closer)
+        elif closer is not None and not closer.done():
+            closer.cancel()
+            await asyncio.wait([closer])
+        else:
+            await session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+# 默认共享的异步连接池，事件循环结束前应 await async_amap_session.close()
+async_amap_session = AsyncAMapSession() if aiohttp is not None else None
+
+
+def _default_session():
+    _require_aiohttp()
+    return async_amap_session
+
+
+class _AsyncQuery(object):
+    """异步查询：await 对象时发送请求（只请求一次），之后的结果属性读取已保存的响应"""
+    _async_response = None
+
+    async def fetch(self):
+        """
+        发送请求
+        :return: 对象本身
+        """
+        if self._async_response is None and self.result is None:
+            if self.cache is not None:
+                self.result = self._cache_lookup()
+            if self.result is None:
+                self._async_response = await self.session.get(self.url, timeout=self.timeout, api=type(self).__name__)
+            self.get_result()
+        return self
+
+    def __await__(self):
+        return self.fetch().__await__()
+
+    @property
+    def response(self):
+        """响应对象，需要先 await 对象"""
+        if self._async_response is None:
+            raise RuntimeError('异步查询对象需要先 await（await obj 或 await obj.fetch()）！')
+        return self._async_response
+
+
+class AsyncAMapGeo(_AsyncQuery, AMapGeo):
+    def __init__(self, key, address, city=None, batch=None, sig=None,
+                 api_url="http://restapi.amap.com/v3/geocode/geo", session=None, timeout=None, cache=None):
+        """
+        异步地理编码，参数见 AMapGeo
+        :param session: obj AsyncAMapSession 对象，默认为共享的 async_amap_session
+        :param timeout: float or tuple 请求超时（秒），默认为 AsyncAMapSession 对象的设置
+        :param cache: obj geocode_cache.GeocodeCache 结果缓存，全部地址（坐标）命中时不发送请求
+        """
+        super().__init__(key, address, city, batch, sig, api_url, session or _default_session(), timeout, cache)
+
+    @classmethod
+    async def fetch_many(cls, key, addresses, session=None, return_exceptions=False, **kwargs):
+        """
+        每个地址一个请求，并发查询
+        :param key: str 高德Key
+        :param addresses: list 地址列表
+        :param session: obj AsyncAMapSession 对象
+        :param return_exceptions: bool 为 True 时请求失败的位置为异常对象，否则抛出第一个异常
+        :param kwargs: 其他参数，见 AMapGeo
+        :return: list AsyncAMapGeo 对象列表，顺序与输入一致
+        """
+        return await gather([cls(key, address, session=session, **kwargs) for address in addresses],
+                            return_exceptions)
+
+
+class AsyncAMapReGeo(_AsyncQuery, AMapReGeo):
+    def __init__(self, key, location, poitype=None, radius=None,
+                 extensions=None, batch=None, roadlevel=None, sig=None, homeorcorp=None,
+                 api_url='http://restapi.amap.com/v3/geocode/regeo', session=None, timeout=None, cache=None):
+        """
+        异步逆地理编码，参数见 AMapReGeo
+        :param session: obj AsyncAMapSession 对象，默认为共享的 async_amap_session
+        :param timeout: float or tuple 请求超时（秒），默认为 AsyncAMapSession 对象的设置
+        :param cache: obj geocode_cache.GeocodeCache 结果缓存，全部地址（坐标）命中时不发送请求
+        """
+        super().__init__(key, location, poitype, radius, extensions, batch, roadlevel, sig, homeorcorp, api_url,
+                         session or _default_session(), timeout, cache)
+
+    @classmethod
+    async def fetch_many(cls, key, locations, session=None, return_exceptions=False, **kwargs):
+        """
+        每个坐标一个请求，并发查询
+        :param key: str 高德Key
+        :param locations: list 坐标列表，每个坐标为 'lng,lat' 字符串或 (lng, lat)
+        :param session: obj AsyncAMapSession 对象
+        :param return_exceptions: bool 为 True 时请求失败的位置为异常对象，否则抛出第一个异常
+        :param kwargs: 其他参数，见 AMapReGeo
+        :return: list AsyncAMapReGeo 对象列表，顺序与输入一致
+        """
+        locations = [location if isinstance(location, str) else '{},{}'.format(*location) for location in locations]
+        return await gather([cls(key, location, session=session, **kwargs) for location in locations],
+                            return_exceptions)
+
+
+async def gather(queries, return_exceptions=False):
+    """
+    并发发送多个异步查询对象的请求，并发数由各自的 AsyncAMapSession 限制
+    :param queries: list AsyncAMapGeo、AsyncAMapReGeo 对象列表
+    :param return_exceptions: bool 为 True 时请求失败的位置为异常对象，否则抛出第一个异常
+    :return: list 查询对象列表，顺序与输入一致
+    """
+    return list(await asyncio.gather(*(query.fetch() for query in queries), return_exceptions=return_exceptions))
+
+
+class _AsyncBulk(object):
+    """异步批量查询：await 对象时并发发送全部批次的请求，并发数由 AsyncAMapSession 限制（workers 参数不起作用）"""
+
+    async def fetch(self):
+        """
+        发送全部请求
+        :return: 对象本身
+        """
+        await asyncio.gather(*(self._run_async(indexes, values) for indexes, values in self._prepare()))
+        return self
+
+    async def _run_async(self, indexes, values):
+        try:
+            query = await self._query(values)
+            self._fill(indexes, codes=self._codes(query, len(values)))
+        except Exception as e:
+            self._fill(indexes, error=e)
+
+    def __await__(self):
+        return self.fetch().__await__()
+
+    def _results(self):
+        if self.results is None:
+            raise RuntimeError('异步查询对象需要先 await（await obj 或 await obj.fetch()）！')
+        return self.results
+
+
+class AsyncAMapBulkGeo(_AsyncBulk, AMapBulkGeo):
+    """任意数量地址的异步地理编码，参数、结果属性见 AMapBulkGeo，session 为 AsyncAMapSession 对象"""
+    query_class = AsyncAMapGeo
+
+
+class AsyncAMapBulkReGeo(_AsyncBulk, AMapBulkReGeo):
+    """任意数量坐标的异步逆地理编码，参数、结果属性见 AMapBulkReGeo，session 为 AsyncAMapSession 对象"""
+    query_class = AsyncAMapReGeo
+
+
+class AsyncAMapSnapReGeo(AMapSnapReGeo):
+    """密集坐标按格网归并后的异步逆地理编码，参数、结果属性见 AMapSnapReGeo，session 为 AsyncAMapSession 对象"""
+    bulk_class = AsyncAMapBulkReGeo
+
+    async def fetch(self):
+        """
+        发送全部请求
+        :return: 对象本身
+        """
+        await self.bulk.fetch()
+        return self
+
+    def __await__(self):
+        return self.fetch().__await__()
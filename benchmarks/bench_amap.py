@@ -0,0 +1,137 @@
+# -*- encoding: utf-8 -*-
+"""
+GeoDistanceDirect 折线距离计算，AMapGeo、AMapReGeo 对本地模拟服务的请求开销。
+默认使用共享连接池 amap_session；*_no_pool 传入 requests 模块作为 session，每次请求新建连接，用于对比。
+"""
+import pytest
+import requests
+
+from geotransform import AMapGeo, AMapReGeo, AMapBulkGeo, AMapBulkReGeo, AMapSnapReGeo, GeoDistanceDirect, \
+    GeocodeCache
+
+
+@pytest.mark.benchmark(group='distance')
+def bench_distance_multi(benchmark, test_coords):
+    points = [tuple(row) for row in test_coords[:, :2].tolist()] * 10
+    benchmark(GeoDistanceDirect.multi, *points, is_ring=True)
+
+
+@pytest.mark.benchmark(group='amap-geo')
+def bench_geo_single(benchmark, amap_stub):
+    def run():
+        geo = AMapGeo('key', '郑州市燕庄地铁站', api_url=amap_stub + '/geo')
+        return geo.coordinate
+    assert benchmark(run) == (113.703868, 34.762716)
+
+
+@pytest.mark.benchmark(group='amap-geo')
+def bench_geo_single_no_pool(benchmark, amap_stub):
+    def run():
+        geo = AMapGeo('key', '郑州市燕庄地铁站', api_url=amap_stub + '/geo', session=requests)
+        return geo.coordinate
+    assert benchmark(run) == (113.703868, 34.762716)
+
+
+@pytest.mark.benchmark(group='amap-geo')
+def bench_geo_batch(benchmark, amap_stub):
+    addresses = ['郑州市燕庄地铁站'] * 10
+
+    def run():
+        geo = AMapGeo('key', addresses, batch=True, api_url=amap_stub + '/geo')
+        return geo.coordinate
+    assert len(benchmark(run)) == 10
+
+
+@pytest.mark.benchmark(group='amap-regeo')
+def bench_regeo_single(benchmark, amap_stub):
+    def run():
+        regeo = AMapReGeo('key', '113.645356,34.762716', api_url=amap_stub + '/regeo')
+        return regeo.formatted_address
+    assert benchmark(run) == '河南省郑州市金水区'
+
+
+@pytest.mark.benchmark(group='amap-regeo')
+def bench_regeo_single_no_pool(benchmark, amap_stub):
+    def run():
+        regeo = AMapReGeo('key', '113.645356,34.762716', api_url=amap_stub + '/regeo', session=requests)
+        return regeo.formatted_address
+    assert benchmark(run) == '河南省郑州市金水区'
+
+
+@pytest.mark.benchmark(group='amap-regeo')
+def bench_regeo_batch(benchmark, amap_stub):
+    locations = ['113.645356,34.762716'] * 20
+
+    def run():
+        regeo = AMapReGeo('key', locations, batch=True, api_url=amap_stub + '/regeo')
+        return regeo.formatted_address
+    assert len(benchmark(run)) == 20
+
+
+@pytest.mark.benchmark(group='amap-100')
+def bench_geo_bulk(benchmark, amap_stub):
+    """100 个地址自动分为 10 个批量请求，见 bench_amap_async.bench_geo_sync（逐个请求）"""
+    addresses = ['郑州市燕庄地铁站{}号口'.format(i) for i in range(100)]
+
+    def run():
+        geo = AMapBulkGeo('key', addresses, api_url=amap_stub + '/geo')
+        return geo.formatted_address, geo.requests
+    assert benchmark(run) == (addresses, 10)
+
+
+@pytest.mark.benchmark(group='amap-100')
+def bench_regeo_bulk(benchmark, amap_stub):
+    locations = [(113.6 + i * 0.001, 34.76) for i in range(100)]
+
+    def run():
+        regeo = AMapBulkReGeo('key', locations, api_url=amap_stub + '/regeo')
+        return len(regeo.formatted_address), regeo.requests
+    assert benchmark(run) == (100, 5)
+
+
+@pytest.mark.benchmark(group='amap-100')
+def bench_geo_bulk_cached(benchmark, amap_stub, tmp_path):
+    """100 个地址全部命中 SQLite 缓存，不发送请求"""
+    addresses = ['郑州市燕庄地铁站{}号口'.format(i) for i in range(100)]
+    cache = GeocodeCache(str(tmp_path / 'geocode.sqlite'))
+    AMapBulkGeo('key', addresses, api_url=amap_stub + '/geo', cache=cache).fetch()
+
+    def run():
+        geo = AMapBulkGeo('key', addresses, api_url=amap_stub + '/geo', cache=cache)
+        return geo.formatted_address, geo.requests
+    assert benchmark(run) == (addresses, 0)
+
+
+# 约 1 公里的车辆轨迹，1000 个坐标，相邻坐标相距约 1 米
+TRACK = [(113.6 + i * 0.00001, 34.76 + i * 0.000001) for i in range(1000)]
+
+
+@pytest.mark.benchmark(group='amap-track')
+def bench_regeo_track_bulk(benchmark, amap_stub):
+    """每个坐标都参与批量请求"""
+    def run():
+        regeo = AMapBulkReGeo('key', TRACK, api_url=amap_stub + '/regeo')
+        return len(regeo.formatted_address), regeo.requests
+    assert benchmark(run) == (1000, 50)
+
+
+@pytest.mark.benchmark(group='amap-track')
+def bench_regeo_track_snap(benchmark, amap_stub):
+    """按 20 米格网归并，每个格网只请求一个代表点"""
+    def run():
+        regeo = AMapSnapReGeo('key', TRACK, cell_size=20, api_url=amap_stub + '/regeo')
+        return regeo, regeo.formatted_address
+    regeo, addresses = benchmark(run)
+    assert len(addresses) == 1000 and all(addresses)
+    assert regeo.requests <= 4 and regeo.collapse_ratio > 15
+
+
+@pytest.mark.benchmark(group='amap-track')
+def bench_regeo_track_geohash(benchmark, amap_stub):
+    """按 7 位 geohash（约 153m×153m）归并"""
+    def run():
+        regeo = AMapSnapReGeo('key', TRACK, geohash=7, api_url=amap_stub + '/regeo')
+        return regeo, regeo.formatted_address
+    regeo, addresses = benchmark(run)
+    assert len(addresses) == 1000 and all(addresses)
+    assert regeo.requests == 1 and regeo.collapse_ratio >= 100
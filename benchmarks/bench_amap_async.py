@@ -0,0 +1,38 @@
+# -*- encoding: utf-8 -*-
+"""AsyncAMapGeo、AsyncAMapReGeo 对本地模拟服务的并发请求（需要安装 aiohttp 包），与同步逐个请求对比"""
+import asyncio
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from geotransform import AMapGeo, AsyncAMapGeo, AsyncAMapReGeo, AsyncAMapSession
+
+ADDRESSES = ['郑州市燕庄地铁站{}号口'.format(i) for i in range(100)]
+
+
+@pytest.mark.benchmark(group='amap-100')
+def bench_geo_sync(benchmark, amap_stub):
+    def run():
+        return [AMapGeo('key', address, api_url=amap_stub + '/geo').formatted_address for address in ADDRESSES]
+    assert benchmark(run) == ADDRESSES
+
+
+@pytest.mark.benchmark(group='amap-100')
+def bench_geo_async(benchmark, amap_stub):
+    async def main():
+        async with AsyncAMapSession(concurrency=8) as session:
+            geos = await AsyncAMapGeo.fetch_many('key', ADDRESSES, session=session, api_url=amap_stub + '/geo')
+        return [geo.formatted_address for geo in geos]
+    assert benchmark(lambda: asyncio.run(main())) == ADDRESSES
+
+
+@pytest.mark.benchmark(group='amap-100')
+def bench_regeo_async(benchmark, amap_stub):
+    locations = [(113.6 + i * 0.001, 34.76) for i in range(100)]
+
+    async def main():
+        async with AsyncAMapSession(concurrency=8) as session:
+            regeos = await AsyncAMapReGeo.fetch_many('key', locations, session=session, api_url=amap_stub + '/regeo')
+        return [regeo.coordinate for regeo in regeos]
+    assert benchmark(lambda: asyncio.run(main())) == locations
@@ -0,0 +1,59 @@
+# -*- encoding: utf-8 -*-
+"""CoordTrans 逐点转换与 CoordTransArray 批量转换"""
+import pytest
+
+from geotransform import CoordTrans, CoordTransArray, OffsetGrid
+
+
+@pytest.fixture(scope='module')
+def points(zone_coords):
+    lngs, lats, _ = zone_coords
+    return lngs[:20000], lats[:20000]
+
+
+@pytest.fixture(scope='module')
+def grid():
+    return OffsetGrid.build(0.02)
+
+
+@pytest.mark.benchmark(group='wgs84_to_gcj02')
+def bench_wgs84_to_gcj02_scalar(benchmark, points):
+    lngs, lats = points[0].tolist(), points[1].tolist()
+    benchmark(lambda: [CoordTrans.wgs84_to_gcj02(lng, lat) for lng, lat in zip(lngs, lats)])
+
+
+@pytest.mark.benchmark(group='wgs84_to_gcj02')
+def bench_wgs84_to_gcj02_batch(benchmark, points):
+    benchmark(CoordTransArray.wgs84_to_gcj02, *points)
+
+
+@pytest.mark.benchmark(group='wgs84_to_gcj02')
+def bench_wgs84_to_gcj02_grid(benchmark, points, grid):
+    benchmark(CoordTransArray.wgs84_to_gcj02, *points, grid=grid)
+
+
+@pytest.mark.benchmark(group='gcj02_to_wgs84')
+def bench_gcj02_to_wgs84_scalar(benchmark, points):
+    lngs, lats = points[0].tolist(), points[1].tolist()
+    benchmark(lambda: [CoordTrans.gcj02_to_wgs84(lng, lat) for lng, lat in zip(lngs, lats)])
+
+
+@pytest.mark.benchmark(group='gcj02_to_wgs84')
+def bench_gcj02_to_wgs84_batch(benchmark, points):
+    benchmark(CoordTransArray.gcj02_to_wgs84, *points)
+
+
+@pytest.mark.benchmark(group='gcj02_to_wgs84')
+def bench_gcj02_to_wgs84_exact_batch(benchmark, points):
+    benchmark(CoordTransArray.gcj02_to_wgs84, *points, exact=True)
+
+
+@pytest.mark.benchmark(group='bd09_to_wgs84')
+def bench_bd09_to_wgs84_scalar(benchmark, points):
+    lngs, lats = points[0].tolist(), points[1].tolist()
+    benchmark(lambda: [CoordTrans.bd09_to_wgs84(lng, lat) for lng, lat in zip(lngs, lats)])
+
+
+@pytest.mark.benchmark(group='bd09_to_wgs84')
+def bench_bd09_to_wgs84_batch(benchmark, points):
+    benchmark(CoordTransArray.bd09_to_wgs84, *points)
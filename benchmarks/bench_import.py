@@ -0,0 +1,63 @@
+# -*- encoding: utf-8 -*-
+"""
+包的导入耗时：每轮启动一个新的 Python 进程，导入指定的名称，并检查导入了哪些较重的第三方包。
+bench_python 为空进程的启动耗时，其他测试减去此值即为导入耗时。
+"""
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+from conftest import ROOT
+
+HEAVY = ('numpy', 'pyproj', 'requests')
+
+# 与 conftest 相同，以 geotransform 包名导入仓库
+SCRIPT = """
+import sys, json, importlib.util
+spec = importlib.util.spec_from_file_location('geotransform', {init!r}, submodule_search_locations=[{root!r}])
+package = importlib.util.module_from_spec(spec)
+sys.modules['geotransform'] = package
+spec.loader.exec_module(package)
+{statement}
+print(json.dumps([name for name in {heavy!r} if name in sys.modules]))
+"""
+
+
+def run_import(statement):
+    """在新进程中执行导入语句，返回已导入的较重的第三方包列表"""
+    script = SCRIPT.format(init=os.path.join(ROOT, '__init__.py'), root=ROOT, statement=statement, heavy=HEAVY)
+    output = subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+@pytest.mark.benchmark(group='import')
+def bench_python(benchmark):
+    benchmark.pedantic(subprocess.run, args=([sys.executable, '-c', 'pass'],), kwargs={'check': True}, rounds=10)
+
+
+@pytest.mark.benchmark(group='import')
+def bench_import_coord_trans(benchmark):
+    loaded = benchmark.pedantic(run_import, args=('from geotransform import CoordTrans',), rounds=10)
+    assert loaded == []
+
+
+@pytest.mark.benchmark(group='import')
+def bench_import_coord_trans_array(benchmark):
+    loaded = benchmark.pedantic(run_import, args=('from geotransform import CoordTransArray',), rounds=10)
+    assert loaded == ['numpy']
+
+
+@pytest.mark.benchmark(group='import')
+def bench_import_trans_proj(benchmark):
+    loaded = benchmark.pedantic(run_import, args=('from geotransform import TransProj',), rounds=10)
+    assert 'pyproj' in loaded and 'requests' not in loaded
+
+
+@pytest.mark.benchmark(group='import')
+def bench_import_all(benchmark):
+    """导入全部名称，相当于改为按需导入之前的 import geotransform"""
+    loaded = benchmark.pedantic(run_import, args=('from geotransform import *',), rounds=10)
+    assert set(loaded) == set(HEAVY)
@@ -0,0 +1,97 @@
+# -*- encoding: utf-8 -*-
+"""
+关闭运行指标时的埋点开销：CoordTransArray 方法（counted 装饰器）、TransProj.transform_many（行内判断）
+与去掉埋点的同一实现对比。小批量（100 点）时埋点的固定开销占比最大，检查相差不超过 5%。
+"""
+import timeit
+import statistics
+
+import pytest
+
+from geotransform import CoordTrans, CoordTransArray, Epsg, TransProj, TransformerCache
+from geotransform.metrics import metrics
+
+# 允许的相对开销
+TOLERANCE = 0.05
+
+
+@pytest.fixture(scope='module')
+def small_batch(zone_coords):
+    return zone_coords[0][:100].copy(), zone_coords[1][:100].copy()
+
+
+@pytest.fixture(autouse=True)
+def disabled():
+    state = metrics.enabled
+    metrics.disable()
+    yield
+    metrics.enabled = state
+
+
+def _bare(method):
+    """去掉 counted 装饰器的转换方法"""
+    func = CoordTransArray.__dict__[method].__func__.__wrapped__
+    return lambda *args, **kwargs: func(CoordTransArray, *args, **kwargs)
+
+
+def _trans_proj():
+    return TransProj(exist_proj=Epsg.wgs84, target_proj=Epsg.cgcs2000_gauss_3, target_with_zone=True,
+                     cache=TransformerCache())
+
+
+def _overhead(func, baseline, number=200, repeat=31):
+    """
+    相对开销：每轮按 func、baseline、baseline、func 的顺序计时（抵消机器负载的缓慢变化），取各轮耗时比的中位数
+    """
+    func()
+    baseline()
+    ratios = []
+    for _ in range(repeat):
+        first = timeit.timeit(func, number=number)
+        baseline_time = timeit.timeit(baseline, number=number) + timeit.timeit(baseline, number=number)
+        ratios.append((first + timeit.timeit(func, number=number)) / baseline_time)
+    return statistics.median(ratios) - 1
+
+
+@pytest.mark.benchmark(group='metrics-disabled-100')
+def bench_array_counted(benchmark, small_batch):
+    benchmark(CoordTransArray.wgs84_to_gcj02, *small_batch)
+
+
+@pytest.mark.benchmark(group='metrics-disabled-100')
+def bench_array_bare(benchmark, small_batch):
+    benchmark(_bare('wgs84_to_gcj02'), *small_batch)
+
+
+@pytest.mark.benchmark(group='metrics-disabled-100')
+def bench_transform_many_counted(benchmark, small_batch):
+    trans = _trans_proj()
+    benchmark(trans.transform_many, *small_batch)
+
+
+@pytest.mark.benchmark(group='metrics-disabled-100')
+def bench_transform_many_bare(benchmark, small_batch):
+    trans = _trans_proj()
+    benchmark(lambda xs, ys: trans._transform_groups(xs, (xs, ys)), *small_batch)
+
+
+@pytest.mark.parametrize('method', ['wgs84_to_gcj02', 'bd09_to_wgs84', 'gcj02_to_bd09'])
+def bench_disabled_array_overhead(small_batch, method):
+    counted = getattr(CoordTransArray, method)
+    bare = _bare(method)
+    assert _overhead(lambda: counted(*small_batch), lambda: bare(*small_batch)) < TOLERANCE
+
+
+def bench_disabled_transform_many_overhead(small_batch):
+    trans = _trans_proj()
+    xs, ys = small_batch
+    trans.transform_many(xs, ys)
+    assert _overhead(lambda: trans.transform_many(xs, ys),
+                     lambda: trans._transform_groups(xs, (xs, ys)), number=50) < TOLERANCE
+
+
+def bench_scalar_not_wrapped():
+    # 逐点转换不经过任何埋点包装
+    for method in ('gcj02_to_bd09', 'bd09_to_gcj02', 'wgs84_to_gcj02', 'gcj02_to_wgs84', 'gcj02_to_wgs84_exact',
+                   'bd09_to_wgs84', 'wgs84_to_bd09'):
+        assert not hasattr(CoordTrans.__dict__[method].__func__, '__wrapped__')
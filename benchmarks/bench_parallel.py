@@ -0,0 +1,67 @@
+# -*- encoding: utf-8 -*-
+"""
+ParallelTransformer 多进程并行转换与单进程 transform_many 的对比（100 万点，跨 10 个 3 度带）。
+进程池在计时前启动并完成预热，计时只包含转换本身；CPU 核数少于 2 时跳过加速比检查，
+否则要求加速比不低于 min(进程数, 块数) 的 60%。
+"""
+import os
+import math
+import time
+
+import numpy as np
+import pytest
+
+from geotransform import Epsg, ParallelTransformer, TransProj
+
+KWARGS = dict(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.xian80_gauss_3, target_with_zone=True)
+WORKERS = os.cpu_count() or 1
+CHUNK_SIZE = 125000
+# 加速比不低于理想值（进程数与块数的较小者）的比例
+EFFICIENCY = 0.6
+
+
+@pytest.fixture(scope='module')
+def million_coords(zone_coords):
+    return tuple(np.tile(column, 10) for column in zone_coords)
+
+
+@pytest.fixture(scope='module')
+def single(million_coords):
+    trans = TransProj(**KWARGS)
+    trans.warm_up(million_coords[0][::1000])
+    return trans
+
+
+@pytest.fixture(scope='module')
+def pool(million_coords):
+    with ParallelTransformer.trans_proj(warm_lngs=million_coords[0][::1000], workers=WORKERS,
+                                        chunk_size=CHUNK_SIZE, **KWARGS) as pt:
+        pt.transform(*(column[:WORKERS * 10] for column in million_coords))  # 启动进程池
+        yield pt
+
+
+@pytest.mark.benchmark(group='parallel-1m')
+def bench_single_process(benchmark, single, million_coords):
+    benchmark.pedantic(single.transform_many, args=million_coords, rounds=3)
+
+
+@pytest.mark.benchmark(group='parallel-1m')
+def bench_process_pool(benchmark, pool, million_coords):
+    benchmark.pedantic(pool.transform, args=million_coords, rounds=3)
+
+
+@pytest.mark.skipif(WORKERS < 2, reason='CPU 核数少于 2，多进程没有加速')
+def bench_pool_beats_single_process(single, pool, million_coords):
+    def best(func):
+        times = []
+        for _ in range(3):
+            start_time = time.perf_counter()
+            result = func(*million_coords)
+            times.append(time.perf_counter() - start_time)
+        return min(times), result
+
+    single_time, expected = best(single.transform_many)
+    pool_time, result = best(pool.transform)
+    assert all(np.array_equal(a, b) for a, b in zip(result, expected))
+    ideal = min(WORKERS, math.ceil(len(million_coords[0]) / CHUNK_SIZE))
+    assert single_time / pool_time > EFFICIENCY * ideal, '加速比 %.2f，理想值 %d' % (single_time / pool_time, ideal)
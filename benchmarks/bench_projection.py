@@ -0,0 +1,71 @@
+# -*- encoding: utf-8 -*-
+"""TransProj 逐点与批量转换、transformer 冷启动与缓存命中、跨分度带批量转换"""
+import pytest
+
+from geotransform import Epsg, TransProj, TransformerCache, GaussKruger
+
+KWARGS = dict(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.xian80_gauss_3, target_with_zone=True)
+
+
+@pytest.fixture(scope='module')
+def warm_cache(zone_coords):
+    cache = TransformerCache()
+    TransProj(cache=cache, **KWARGS).warm_up(zone_coords[0])
+    return cache
+
+
+@pytest.mark.benchmark(group='transproj-test.csv')
+def bench_per_point_warm(benchmark, test_coords, warm_cache):
+    trans = TransProj(cache=warm_cache, **KWARGS)
+    coords = [tuple(row) for row in test_coords.tolist()]
+    benchmark(lambda: [trans(coord) for coord in coords])
+
+
+@pytest.mark.benchmark(group='transproj-test.csv')
+def bench_bulk_warm(benchmark, test_coords, warm_cache):
+    trans = TransProj(cache=warm_cache, **KWARGS)
+    benchmark(trans.transform_many, *test_coords.T)
+
+
+@pytest.mark.benchmark(group='transproj-cold')
+def bench_bulk_cold(benchmark, test_coords):
+    """每轮使用新的空缓存，包含创建 transformer 的时间"""
+    def setup():
+        return (TransProj(cache=TransformerCache(), **KWARGS),), {}
+    benchmark.pedantic(lambda trans: trans.transform_many(*test_coords.T), setup=setup, rounds=5)
+
+
+@pytest.mark.benchmark(group='transproj-cold')
+def bench_bulk_cold_pipeline_cache(benchmark, test_coords, tmp_path_factory):
+    """每轮使用新的空缓存，transformer 由 PROJ pipeline 缓存文件创建"""
+    path = str(tmp_path_factory.mktemp('pipelines') / 'pipelines.json')
+    TransProj(cache=TransformerCache(pipeline_path=path), **KWARGS).transform_many(*test_coords.T)
+
+    def setup():
+        return (TransProj(cache=TransformerCache(pipeline_path=path), **KWARGS),), {}
+    benchmark.pedantic(lambda trans: trans.transform_many(*test_coords.T), setup=setup, rounds=20)
+
+
+@pytest.mark.benchmark(group='transproj-zones')
+def bench_zones_per_point_warm(benchmark, zone_coords, warm_cache):
+    trans = TransProj(cache=warm_cache, **KWARGS)
+    coords = list(zip(*(column[:10000].tolist() for column in zone_coords)))
+    benchmark(lambda: [trans(coord) for coord in coords])
+
+
+@pytest.mark.benchmark(group='transproj-zones')
+def bench_zones_bulk_warm(benchmark, zone_coords, warm_cache):
+    trans = TransProj(cache=warm_cache, **KWARGS)
+    benchmark(trans.transform_many, *(column[:10000] for column in zone_coords))
+
+
+@pytest.mark.benchmark(group='transproj-zones-100k')
+def bench_zones_bulk_warm_100k(benchmark, zone_coords, warm_cache):
+    trans = TransProj(cache=warm_cache, **KWARGS)
+    benchmark(trans.transform_many, *zone_coords)
+
+
+@pytest.mark.benchmark(group='transproj-zones-100k')
+def bench_zones_gauss_numpy_100k(benchmark, zone_coords):
+    gauss, zone_degree = GaussKruger.from_proj(Epsg.xian80_gauss_3)
+    benchmark(gauss.forward, zone_coords[0], zone_coords[1], zone_degree, with_zone=True)
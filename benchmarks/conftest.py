@@ -0,0 +1,46 @@
+# -*- encoding: utf-8 -*-
+"""
+基准测试的公共数据和本地高德 web api 模拟服务（与单元测试共用 tests/support.py）。
+运行方法见 README（需要安装 pytest、pytest-benchmark 包）。
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'tests'))
+
+from support import AMapStub, import_package  # noqa: E402
+
+import_package()
+
+
+@pytest.fixture(scope='session')
+def test_coords():
+    """test.csv 中的坐标，形状为 (点数, 3)"""
+    return np.loadtxt(os.path.join(ROOT, 'test.csv'), delimiter=',')
+
+
+@pytest.fixture(scope='session')
+def zone_coords(test_coords):
+    """
+    跨分度带的批量坐标：test.csv 复制 500 份，经度依次平移 -15~12 度，覆盖 10 个 3 度带，共约 10 万点
+    :return: (经度数组, 纬度数组, 高程数组)
+    """
+    repeat = 500
+    shift = (np.repeat(np.arange(repeat) % 10, len(test_coords)) - 5) * 3
+    return (np.tile(test_coords[:, 0], repeat) + shift,
+            np.tile(test_coords[:, 1], repeat),
+            np.tile(test_coords[:, 2], repeat))
+
+
+@pytest.fixture(scope='session')
+def amap_stub():
+    """
+    本地模拟服务
+    :return: str 服务地址，如 http://127.0.0.1:12345/v3/geocode
+    """
+    with AMapStub() as stub:
+        yield stub.url
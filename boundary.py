@@ -0,0 +1,211 @@
+# -*- encoding: utf-8 -*-
+"""
+中国国界（简化多边形）判断，用于代替 CoordTrans.out_of_china 的外包矩形判断。
+无需第三方包。
+陆地国界取自 Natural Earth 1:110m 国家边界（公共领域数据），海岸线向外推至近海，包括中国大陆（含港澳）、近岸岛屿、海南岛，
+以及东沙、西沙、中沙、南沙群岛所在海域（粗略范围，不含周边国家的陆地和近岸岛屿），不含台湾，
+陆地国界附近 10~20 公里范围内（如界河两岸）的判断结果受简化精度影响。
+为了避免每个点都与整个多边形做射线法判断，预先将边界外包矩形划分为规则格网，格网单元分为三类：
+    完全在边界内、完全在边界外、与边界线相交。
+前两类单元内的点直接查表得到结果，只有落在边界单元中的点才需要与该单元所在行的少数几条边做射线法判断。
+"""
+
+
+# 中国大陆（含港澳），陆地国界取自 Natural Earth，海岸线外推至近海以包含沿海城市和近岸岛屿
+MAINLAND = (
+    (80.2600, 42.3500), (80.1802, 42.9201), (80.8662, 43.1804), (79.9661, 44.9175),
+    (81.9471, 45.3170), (82.4589, 45.5396), (83.1805, 47.3300), (85.1643, 47.0010),
+    (85.7205, 47.4530), (85.7682, 48.4558), (86.5988, 48.5492), (87.3600, 49.2150),
+    (87.7513, 49.2972), (88.0138, 48.5995), (88.8543, 48.0691), (90.2808, 47.6935),
+    (90.9708, 46.8881), (90.5858, 45.7197), (90.9455, 45.2861), (92.1339, 45.1151),
+    (93.4807, 44.9755), (94.6889, 44.3523), (95.3069, 44.2413), (95.7625, 43.3194),
+    (96.3494, 42.7256), (97.4518, 42.7489), (99.5158, 42.5247), (100.8459, 42.6638),
+    (101.8330, 42.5149), (103.3123, 41.9075), (104.5223, 41.9083), (104.9650, 41.5974),
+    (106.1293, 42.1343), (107.7448, 42.4815), (109.2436, 42.5194), (110.4121, 42.8712),
+    (111.1297, 43.4068), (111.8296, 43.7431), (111.6677, 44.0732), (111.3484, 44.4574),
+    (111.8733, 45.1021), (112.4361, 45.0116), (113.4639, 44.8089), (114.4603, 45.3398),
+    (115.9851, 45.7272), (116.7179, 46.3882), (117.4217, 46.6727), (118.8743, 46.8054),
+    (119.6633, 46.6927), (119.7728, 47.0481), (118.8666, 47.7471), (118.0641, 48.0667),
+    (117.2955, 47.6977), (116.3090, 47.8534), (115.7428, 47.7265), (115.4853, 48.1354),
+    (116.1918, 49.1346), (116.6788, 49.8885), (117.8792, 49.5110), (119.2885, 50.1429),
+    (119.2794, 50.5829), (120.1821, 51.6436), (120.7382, 51.9641), (120.7258, 52.5162),
+    (120.1771, 52.7539), (121.0031, 53.2514), (122.2457, 53.4317), (123.5715, 53.4588),
+    (125.0682, 53.1610), (125.9463, 52.7928), (126.5644, 51.7843), (126.9392, 51.3539),
+    (127.2875, 50.7398), (127.6574, 49.7603), (129.3978, 49.4406), (130.5823, 48.7297),
+    (130.9873, 47.7901), (132.5067, 47.7890), (133.3736, 48.1834), (135.0263, 48.4782),
+    (134.5008, 47.5785), (134.1124, 47.2125), (133.7696, 46.1169), (133.0971, 45.1441),
+    (131.8835, 45.3212), (131.0252, 44.9680), (131.2886, 44.1115), (131.1447, 42.9300),
+    (130.6339, 42.9030), (130.6400, 42.3950), (129.9943, 42.9854), (129.5967, 42.4250),
+    (128.0522, 41.9943), (128.2084, 41.4668), (127.3438, 41.5032), (126.8691, 41.8166),
+    (126.1820, 41.1073), (125.0799, 40.5698), (124.2656, 39.9285), (123.3000, 39.3000),
+    (122.4000, 38.7000), (121.1000, 38.6000), (120.8000, 38.2000), (121.6000, 37.8000),
+    (122.3000, 37.7000), (122.9000, 37.4000), (122.7000, 36.8000), (121.4000, 36.4000),
+    (120.9000, 35.9000), (119.9000, 35.1000), (119.9000, 34.6000), (120.7000, 34.0000),
+    (121.3000, 33.0000), (121.9000, 32.3000), (122.3000, 31.6000), (122.3000, 30.9000),
+    (122.9000, 30.7000), (122.7000, 29.5000), (122.2000, 28.5000), (121.6000, 27.6000),
+    (121.0000, 27.0000), (120.7000, 26.5000), (120.2000, 26.0000), (120.0000, 25.4000),
+    (119.3000, 24.7000), (118.6000, 24.2000), (117.6000, 23.4000), (116.9000, 23.1000),
+    (116.2000, 22.7000), (115.4000, 22.6000), (114.4000, 22.0000), (113.6000, 21.9500),
+    (112.8000, 21.5000), (111.9000, 21.4000), (110.8000, 20.7000), (110.6000, 20.2000),
+    (109.9000, 20.2000), (109.6000, 20.4000), (109.4000, 20.9000), (108.9000, 21.2000),
+    (108.4000, 21.5000), (108.0502, 21.5524), (107.0434, 21.8119), (106.5673, 22.2182),
+    (106.7254, 22.7943), (105.8112, 22.9769), (105.3292, 23.3521), (104.4769, 22.8192),
+    (103.5045, 22.7038), (102.7070, 22.7088), (102.1704, 22.4648), (101.6520, 22.3182),
+    (101.8031, 21.1744), (101.2700, 21.2017), (101.1800, 21.4366), (101.1500, 21.8500),
+    (100.4165, 21.5588), (99.9835, 21.7429), (99.2409, 22.1183), (99.5320, 22.9490),
+    (98.8987, 23.1427), (98.6603, 24.0633), (97.6047, 23.8974), (97.7246, 25.0836),
+    (98.6718, 25.9187), (98.7121, 26.7435), (98.6827, 27.5088), (98.2462, 27.7472),
+    (97.9120, 28.3359), (97.3271, 28.2616), (96.2488, 28.4110), (96.5866, 28.8310),
+    (96.1177, 29.4528), (95.4048, 29.0317), (94.5660, 29.2774), (93.4133, 28.6406),
+    (92.5031, 27.8969), (91.6967, 27.7717), (91.2589, 28.0406), (90.7305, 28.0650),
+    (90.0158, 28.2964), (89.4758, 28.0428), (88.8142, 27.2993), (88.7303, 28.0869),
+    (88.1204, 27.8765), (86.9545, 27.9743), (85.8233, 28.2036), (85.0116, 28.6428),
+    (84.2346, 28.8399), (83.8990, 29.3202), (83.3371, 29.4637), (82.3275, 30.1153),
+    (81.5258, 30.4227), (81.1113, 30.1835), (79.7214, 30.8827), (78.7389, 31.5159),
+    (78.4584, 32.6182), (79.1761, 32.4838), (79.2089, 32.9944), (78.8111, 33.5062),
+    (78.9123, 34.3219), (77.8375, 35.4940), (76.1928, 35.8984), (75.8969, 36.6668),
+    (75.1580, 37.1330), (74.9800, 37.4200), (74.8300, 37.9900), (74.8648, 38.3788),
+    (74.2575, 38.6065), (73.9289, 38.5058), (73.6754, 39.4312), (73.9600, 39.6600),
+    (73.8222, 39.8940), (74.7769, 40.3664), (75.4678, 40.5621), (76.5264, 40.4279),
+    (76.9045, 41.0665), (78.1872, 41.1853), (78.5437, 41.5822), (80.1194, 42.1239),
+)
+
+# 海南岛
+HAINAN = (
+    (109.4752, 18.1977), (108.6552, 18.5077), (108.6262, 19.3679), (109.1191, 19.8210),
+    (110.2116, 20.1013), (110.7866, 20.0775), (111.0101, 19.6959), (110.5706, 19.2559),
+    (110.3392, 18.6784),
+)
+
+
+# 西沙、中沙、南沙群岛所在海域，与越南、菲律宾、马来西亚、文莱的陆地和近岸岛屿保持距离，最南至曾母暗沙
+SOUTH_CHINA_SEA = (
+    (110.3000, 15.5000), (110.5000, 17.6000), (113.0000, 17.6000), (118.3000, 15.6000),
+    (117.6000, 12.0000), (116.4000, 9.0000), (115.3000, 7.6000), (114.0000, 5.2000),
+    (112.6000, 3.8000), (111.4000, 4.2000), (109.8000, 6.5000), (110.0000, 10.0000),
+    (110.2000, 12.5000),
+)
+
+# 东沙群岛
+DONGSHA = (
+    (116.6000, 20.6000), (116.9500, 20.6000), (116.9500, 20.8500), (116.6000, 20.8500),
+)
+
+
+class ChinaBoundary(object):
+    """中国国界判断，格网索引在第一次使用时生成"""
+    polygons = (MAINLAND, HAINAN, SOUTH_CHINA_SEA, DONGSHA)
+    lng_min = 73.5
+    lat_min = 3.75
+    lng_max = 135.5
+    lat_max = 53.5
+    cell_size = 0.25  # 格网单元大小，单位：度
+    n_lng = int(round((lng_max - lng_min) / cell_size))
+    n_lat = int(round((lat_max - lat_min) / cell_size))
+
+    OUTSIDE = 0
+    INSIDE = 1
+    BORDER = 2
+
+    _index = None
+    _row_edges = None
+
+    @classmethod
+    def edges(cls):
+        """
+        所有多边形的边
+        :return: list [(x1, y1, x2, y2), ...]
+        """
+        edges = []
+        for polygon in cls.polygons:
+            for i, (x1, y1) in enumerate(polygon):
+                x2, y2 = polygon[(i + 1) % len(polygon)]
+                edges.append((x1, y1, x2, y2))
+        return edges
+
+    @staticmethod
+    def _segment_in_rect(x1, y1, x2, y2, xmin, ymin, xmax, ymax):
+        """线段与矩形是否相交（Liang-Barsky 裁剪）"""
+        t0, t1 = 0.0, 1.0
+        dx = x2 - x1
+        dy = y2 - y1
+        for p, q in ((-dx, x1 - xmin), (dx, xmax - x1), (-dy, y1 - ymin), (dy, ymax - y1)):
+            if p == 0:
+                if q < 0:
+                    return False
+                continue
+            t = q / p
+            if p < 0:
+                if t > t1:
+                    return False
+                t0 = max(t0, t)
+            else:
+                if t < t0:
+                    return False
+                t1 = min(t1, t)
+        return True
+
+    @staticmethod
+    def _ray_crossings(lng, lat, edges):
+        """从点向东的射线与边相交的次数"""
+        crossings = 0
+        for x1, y1, x2, y2 in edges:
+            if (y1 > lat) != (y2 > lat) and lng < (x2 - x1) * (lat - y1) / (y2 - y1) + x1:
+                crossings += 1
+        return crossings
+
+    @classmethod
+    def index(cls):
+        """
+        生成格网索引
+        :return: (bytearray 各格网单元的类型，按行（纬向）优先排列, list 每行格网涉及的边)
+        """
+        if cls._index is not None:
+            return cls._index, cls._row_edges
+        size = cls.cell_size
+        index = bytearray(cls.n_lng * cls.n_lat)
+        row_edges = [[] for _ in range(cls.n_lat)]
+        # 与边相交的格网单元
+        for x1, y1, x2, y2 in cls.edges():
+            col_0 = max(int((min(x1, x2) - cls.lng_min) / size), 0)
+            col_1 = min(int((max(x1, x2) - cls.lng_min) / size), cls.n_lng - 1)
+            row_0 = max(int((min(y1, y2) - cls.lat_min) / size), 0)
+            row_1 = min(int((max(y1, y2) - cls.lat_min) / size), cls.n_lat - 1)
+            for row in range(row_0, row_1 + 1):
+                row_edges[row].append((x1, y1, x2, y2))
+                ymin = cls.lat_min + row * size
+                for col in range(col_0, col_1 + 1):
+                    xmin = cls.lng_min + col * size
+                    if cls._segment_in_rect(x1, y1, x2, y2, xmin, ymin, xmin + size, ymin + size):
+                        index[row * cls.n_lng + col] = cls.BORDER
+        # 其余格网单元用单元中心点判断，同一行从东向西累计射线穿过的边数
+        for row in range(cls.n_lat):
+            lat = cls.lat_min + (row + 0.5) * size
+            xs = sorted((x2 - x1) * (lat - y1) / (y2 - y1) + x1
+                        for x1, y1, x2, y2 in row_edges[row] if (y1 > lat) != (y2 > lat))
+            k = len(xs)
+            for col in range(cls.n_lng - 1, -1, -1):
+                lng = cls.lng_min + (col + 0.5) * size
+                while k and xs[k - 1] > lng:
+                    k -= 1
+                if index[row * cls.n_lng + col] != cls.BORDER and (len(xs) - k) % 2:
+                    index[row * cls.n_lng + col] = cls.INSIDE
+        cls._index, cls._row_edges = index, row_edges
+        return index, row_edges
+
+    @classmethod
+    def contains(cls, lng, lat):
+        """
+        判断点是否在中国国界内
+        :param lng: float 经度
+        :param lat: float 纬度
+        :return: bool
+        """
+        if not (cls.lng_min <= lng < cls.lng_max and cls.lat_min <= lat < cls.lat_max):
+            return False
+        index, row_edges = cls.index()
+        row = int((lat - cls.lat_min) / cls.cell_size)
+        state = index[row * cls.n_lng + int((lng - cls.lng_min) / cls.cell_size)]
+        if state != cls.BORDER:
+            return state == cls.INSIDE
+        return cls._ray_crossings(lng, lat, row_edges[row]) % 2 == 1
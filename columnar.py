@@ -0,0 +1,162 @@
+# -*- encoding: utf-8 -*-
+"""
+Arrow / Parquet 列式数据的坐标转换。
+需要安装 numpy、pyarrow 包（pip install pyarrow）。
+坐标列以零拷贝方式取得 numpy 视图（列中有空值或由多个块组成时才复制），整批调用数组转换，
+转换结果作为新列写回，其他列原样保留。Parquet 文件按行组（row group）逐个读取、转换、写出，内存占用只与行组大小有关。
+"""
+import time
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from .coord_file import CoordFile
+from .stream import CsvConverter
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError('Arrow / Parquet 转换需要安装 pyarrow 包：pip install pyarrow')
+
+
+def column_view(column):
+    """
+    取得 Arrow 列的 float64 numpy 数组
+    :param column: pyarrow.Array or pyarrow.ChunkedArray
+    :return: (ndarray, 空值掩码或 None)。没有空值的单块 float64 列为零拷贝的只读视图，空值位置为 nan
+    """
+    _require_pyarrow()
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks() if column.num_chunks != 1 else column.chunk(0)
+    if not pa.types.is_float64(column.type):
+        column = column.cast(pa.float64())
+    if column.null_count:
+        mask = column.is_null().to_numpy(zero_copy_only=False)
+        return column.fill_null(np.nan).to_numpy(zero_copy_only=False), mask
+    return column.to_numpy(zero_copy_only=True), None
+
+
+class ArrowConverter(object):
+    """
+    Arrow 表、记录批次和 Parquet 文件的坐标转换
+    示例：
+        converter = ArrowConverter('wgs84_to_gcj02', lng='lng', lat='lat')
+        table = converter.table(table)  # 新增 lng_gcj02、lat_gcj02 列
+        converter = ArrowConverter(TransProj(exist_proj=Epsg.wgs84, target_proj=Epsg.cgcs2000_gauss_3, target_with_zone=True),
+                                   lng='lng', lat='lat', outputs=('x', 'y'))
+        stats = converter.parquet('tracks.parquet', 'tracks_cgcs2000.parquet')
+    """
+
+    def __init__(self, func, lng='lng', lat='lat', z=None, outputs=None):
+        """
+        :param func: 转换方法，CoordTransArray 方法名、TransProj 对象、ParallelTransformer 对象或数组转换函数，见 CsvConverter
+        :param lng: str 经度（X）列名
+        :param lat: str 纬度（Y）列名
+        :param z: str 高程（Z）列名，可选
+        :param outputs: tuple 结果列名，与转换结果各列对应，与输入列同名时替换该列。
+                        默认为输入列名加上目标坐标系后缀（如 lng_gcj02），目标坐标系不能确定时加上 _out 后缀
+        """
+        _require_pyarrow()
+        self.func = CsvConverter.resolve(func)
+        self.inputs = (lng, lat) if z is None else (lng, lat, z)
+        if outputs is None:
+            target = CoordFile._crs_of(func)[1] or 'out'
+            outputs = tuple('{}_{}'.format(name, target) for name in self.inputs)
+        self.outputs = tuple(outputs)
+
+    def arrays(self, *columns):
+        """
+        转换 Arrow 数组
+        :param columns: pyarrow.Array or pyarrow.ChunkedArray 经度、纬度（、高程）列
+        :return: list 结果 pyarrow.Array，输入有空值的行结果为空值
+        """
+        views = [column_view(column) for column in columns]
+        mask = None
+        for _, column_mask in views:
+            if column_mask is not None:
+                mask = column_mask if mask is None else mask | column_mask
+        result = self.func(*(values for values, _ in views))
+        return [pa.array(np.asarray(values, dtype=np.float64), mask=mask) for values in result[:len(self.outputs)]]
+
+    def record_batch(self, batch):
+        """
+        转换记录批次（或表），结果列追加在最后，与输入列同名时替换该列
+        :param batch: pyarrow.RecordBatch or pyarrow.Table
+        :return: 与输入类型相同的新对象
+        """
+        result = self.arrays(*(batch.column(name) for name in self.inputs))
+        for name, values in zip(self.outputs, result):
+            index = batch.schema.get_field_index(name)
+            if index < 0:
+                batch = batch.append_column(name, values)
+            else:
+                batch = batch.set_column(index, name, values)
+        return batch
+
+    def table(self, table):
+        """
+        转换 Arrow 表，按记录批次逐个转换，每批取零拷贝视图
+        :param table: pyarrow.Table
+        :return: pyarrow.Table
+        """
+        batches = [self.record_batch(batch) for batch in table.to_batches()]
+        if not batches:
+            return self.record_batch(table)
+        return pa.Table.from_batches(batches)
+
+    def parquet(self, src, dst, compression='snappy'):
+        """
+        转换 Parquet 文件，逐个行组读取、转换并写出，输出文件的行组划分与输入一致
+        :param src: str 输入文件路径
+        :param dst: str 输出文件路径
+        :param compression: str 输出文件的压缩方式
+        :return: dict 统计信息：rows 行数，row_groups 行组数，seconds 耗时（秒），rows_per_second 每秒转换行数
+        """
+        stats = {'rows': 0, 'row_groups': 0, 'seconds': 0.0, 'rows_per_second': 0.0}
+        start_time = time.perf_counter()
+        source = pq.ParquetFile(src)
+        writer = None
+        try:
+            for index in range(source.num_row_groups):
+                table = self.table(source.read_row_group(index))
+                if writer is None:
+                    writer = pq.ParquetWriter(dst, table.schema, compression=compression)
+                writer.write_table(table)
+                stats['rows'] += table.num_rows
+                stats['row_groups'] += 1
+            if writer is None:
+                writer = pq.ParquetWriter(dst, self.table(source.schema_arrow.empty_table()).schema, compression=compression)
+        finally:
+            if writer is not None:
+                writer.close()
+            source.close()
+        stats['seconds'] = time.perf_counter() - start_time
+        stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+        return stats
+
+
+if __name__ == '__main__':
+    import os
+    import tempfile
+
+    from .projection import Epsg, TransProj
+
+    coords = np.loadtxt(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test.csv'), delimiter=',')
+    coords = np.tile(coords, (5000, 1))
+    table = pa.table({'id': np.arange(len(coords)), 'lng': coords[:, 0], 'lat': coords[:, 1], 'z': coords[:, 2]})
+    path = os.path.join(tempfile.mkdtemp(), 'tracks.parquet')
+    pq.write_table(table, path, row_group_size=200000)
+
+    for func, kwargs in (('wgs84_to_gcj02', {}),
+                         (TransProj(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.xian80_gauss_3, target_with_zone=True),
+                          {'z': 'z', 'outputs': ('x', 'y', 'h')})):
+        converter = ArrowConverter(func, **kwargs)
+        result = converter.parquet(path, path + '.out.parquet')
+        print('%s 转换行数：%d，行组数：%d，耗时：%.3fS，%.0f 行/秒，输出列：%s' % (
+            func if isinstance(func, str) else 'TransProj', result['rows'], result['row_groups'], result['seconds'],
+            result['rows_per_second'], pq.ParquetFile(path + '.out.parquet').schema_arrow.names))
@@ -0,0 +1,290 @@
+# -*- encoding: utf-8 -*-
+"""
+二进制坐标文件：以内存映射（mmap）方式读写，分块转换，不把整个文件读入内存，也不为每个点创建 Python 对象。
+需要安装 numpy 包。
+文件格式：
+    8 字节魔数 b'GTCOORD1' + 4 字节小端无符号整数（头部 JSON 长度）+ 头部 JSON（空格补齐，数据从第 256 字节开始）
+    + float64 小端数据，按列存放，形状为 (列数, 点数)，依次为 X（经度）、Y（纬度）、Z（高程，可选）
+    头部 JSON：{"crs": 坐标系, "lng0": 中央经线, "with_zone": 是否带带号, "shape": [列数, 点数]}
+    坐标系为 Epsg 类方法名（如 "xian80_gauss_3"）或 CoordTrans 的坐标系名（"wgs84"、"gcj02"、"bd09"）。
+也可以读写 numpy 的 .npy 文件（形状为 (列数, 点数) 或 (点数, 列数) 的 float64 数组），坐标系信息保存在同名的 .json 文件中，
+.json 文件的 layout 字段记录数组的排列方式："columns" 为 (列数, 点数)，"rows" 为 (点数, 列数)。
+"""
+import os
+import json
+
+import numpy as np
+
+from .projection import TransProj
+from .stream import CsvConverter
+
+
+class CoordFile(object):
+    """
+    二进制坐标文件
+    示例：
+        CoordFile.save('points.gtc', lngs, lats, heights, crs='wgs84_3d')
+        src = CoordFile.open('points.gtc')
+        trans = TransProj(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.cgcs2000_gauss_3, target_lng0=114, target_with_zone=True)
+        dst = src.transform(trans, 'points_cgcs2000.gtc')  # 转换到新文件，头部记录目标坐标系
+        CoordFile.open('points.gtc', 'r+').transform('wgs84_to_gcj02')  # 原地转换
+    """
+    magic = b'GTCOORD1'
+    npy_magic = b'\x93NUMPY'
+    # 数据的起始位置（字节）。头部 JSON 的预留空间为其减去魔数和长度字段的 12 字节，
+    # 原地转换后写入更长的坐标系信息时不需要移动数据；256 是 16 的倍数，数据按 16 字节对齐
+    data_offset = 256
+    layouts = ('columns', 'rows')
+
+    def __init__(self, data, crs=None, lng0=None, with_zone=False, path=None, layout='columns'):
+        """
+        :param data: ndarray 坐标数据，形状为 (列数, 点数)，一般为 numpy.memmap
+        :param crs: str 坐标系，Epsg 类方法名或 'wgs84'、'gcj02'、'bd09'
+        :param lng0: float 投影坐标的中央经线
+        :param with_zone: bool 投影坐标 X 是否带有分度带带号
+        :param path: str 文件路径
+        :param layout: str .npy 文件中数组的排列方式，'columns' 或 'rows'，见模块说明（data 总是按列的视图）
+        """
+        self.data = data
+        self.crs = crs
+        self.lng0 = lng0
+        self.with_zone = with_zone
+        self.path = path
+        self.layout = layout
+
+    @property
+    def columns(self):
+        """各列坐标数组（内存映射的视图）"""
+        return list(self.data)
+
+    @property
+    def count(self):
+        """点数"""
+        return self.data.shape[1]
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def header(self):
+        return {'crs': self.crs, 'lng0': self.lng0, 'with_zone': self.with_zone, 'shape': list(self.data.shape)}
+
+    @classmethod
+    def _is_npy(cls, path):
+        return os.path.splitext(path)[1].lower() == '.npy'
+
+    @classmethod
+    def create(cls, path, count, columns=2, crs=None, lng0=None, with_zone=False):
+        """
+        创建坐标文件（数据未初始化），以读写内存映射方式打开
+        :param path: str 文件路径，扩展名为 .npy 时创建 npy 文件
+        :param count: int 点数
+        :param columns: int 列数，2 或 3
+        其余参数见 __init__
+        :return: CoordFile 对象
+        """
+        shape = (columns, count)
+        if cls._is_npy(path):
+            data = np.lib.format.open_memmap(path, mode='w+', dtype='<f8', shape=shape)
+            coord_file = cls(data, crs, lng0, with_zone, path)
+            coord_file._write_sidecar()
+            return coord_file
+        # 头部预留空间至 data_offset，原地转换后可以写入更长的坐标系信息；超出时顺延到下一个 16 字节边界
+        header = json.dumps({'crs': crs, 'lng0': lng0, 'with_zone': with_zone, 'shape': list(shape)})
+        header = header.encode('utf-8').ljust(cls.data_offset - len(cls.magic) - 4)
+        header += b' ' * (-(len(cls.magic) + 4 + len(header)) % 16)
+        offset = len(cls.magic) + 4 + len(header)
+        with open(path, 'wb') as f:
+            f.write(cls.magic)
+            f.write(len(header).to_bytes(4, 'little'))
+            f.write(header)
+            f.truncate(offset + 8 * columns * count)
+        data = np.memmap(path, dtype='<f8', mode='r+', offset=offset, shape=shape)
+        return cls(data, crs, lng0, with_zone, path)
+
+    @classmethod
+    def save(cls, path, xs, ys, zs=None, crs=None, lng0=None, with_zone=False, chunk_size=1000000):
+        """
+        将坐标数组保存为坐标文件
+        :param xs: array_like X（经度）
+        :param ys: array_like Y（纬度）
+        :param zs: array_like Z（高程），可选
+        其余参数见 create
+        :return: CoordFile 对象（读写内存映射）
+        """
+        columns = [xs, ys] if zs is None else [xs, ys, zs]
+        coord_file = cls.create(path, len(xs), len(columns), crs, lng0, with_zone)
+        for start in range(0, len(xs), chunk_size):
+            for row, column in zip(coord_file.data, columns):
+                row[start:start + chunk_size] = column[start:start + chunk_size]
+        coord_file.flush()
+        return coord_file
+
+    @classmethod
+    def open(cls, path, mode='r', layout=None):
+        """
+        以内存映射方式打开坐标文件
+        :param path: str 文件路径
+        :param mode: str 'r' 只读，'r+' 读写（原地转换时使用）
+        :param layout: str .npy 文件中数组的排列方式，'columns'（列数, 点数）或 'rows'（点数, 列数），
+                       默认使用同名 .json 文件的 layout 字段，都没有时报错（2×3、3×2 等形状无法判断排列方式）
+        :return: CoordFile 对象
+        """
+        with open(path, 'rb') as f:
+            magic = f.read(len(cls.magic))
+            if magic.startswith(cls.npy_magic):
+                data = np.load(path, mmap_mode=mode)
+                if data.ndim != 2 or data.dtype != np.float64:
+                    raise ValueError('%s 不是二维 float64 数组！' % path)
+                sidecar = {}
+                if os.path.exists(path + '.json'):
+                    with open(path + '.json', encoding='utf-8') as fp:
+                        sidecar = json.load(fp)
+                layout = layout or sidecar.get('layout')
+                if layout not in cls.layouts:
+                    raise ValueError('%s 的数组排列方式未知，请指定 layout 参数（columns 或 rows）！' % path)
+                # (点数, 列数) 的数组转置为按列的视图
+                if layout == 'rows':
+                    data = data.T
+                if data.shape[0] not in (2, 3):
+                    raise ValueError('%s 的列数为 %d，应为 2 或 3！' % (path, data.shape[0]))
+                return cls(data, sidecar.get('crs'), sidecar.get('lng0'), sidecar.get('with_zone', False), path, layout)
+            if magic != cls.magic:
+                raise ValueError('%s 不是坐标文件！' % path)
+            length = int.from_bytes(f.read(4), 'little')
+            header = json.loads(f.read(length).decode('utf-8'))
+        offset = len(cls.magic) + 4 + length
+        data = np.memmap(path, dtype='<f8', mode=mode, offset=offset, shape=tuple(header['shape']))
+        return cls(data, header['crs'], header['lng0'], header['with_zone'], path)
+
+    def _write_sidecar(self):
+        with open(self.path + '.json', 'w', encoding='utf-8') as f:
+            json.dump({'crs': self.crs, 'lng0': self.lng0, 'with_zone': self.with_zone, 'layout': self.layout}, f)
+
+    def flush(self):
+        if hasattr(self.data, 'flush'):
+            self.data.flush()
+
+    @staticmethod
+    def _crs_of(func):
+        """
+        转换方法的输入、输出坐标系
+        :return: (输入坐标系, 输出坐标系, 输入中央经线, 输入是否带带号, 输出中央经线, 输出是否带带号)，不能确定时为 None
+        """
+        job = getattr(func, 'job', None)  # ParallelTransformer
+        if job is not None:
+            func = job[1]
+        if isinstance(func, str) and '_to_' in func:
+            source, _, target = func.partition('_to_')
+            return source, target.replace('_exact', ''), None, False, None, False
+        trans_proj = func
+        if isinstance(trans_proj, TransProj):
+            trans_proj = {name: getattr(trans_proj, name) for name in (
+                'exist_proj', 'exist_lng0', 'exist_with_zone', 'target_proj', 'target_lng0', 'target_with_zone')}
+        if isinstance(trans_proj, dict) and trans_proj.get('exist_proj') and trans_proj.get('target_proj'):
+            return (trans_proj['exist_proj'].__name__, trans_proj['target_proj'].__name__,
+                    trans_proj.get('exist_lng0'), trans_proj.get('exist_with_zone', False),
+                    trans_proj.get('target_lng0'), trans_proj.get('target_with_zone', False))
+        return None, None, None, False, None, False
+
+    def _check_source(self, source, source_lng0, source_with_zone):
+        """检查文件的坐标系、中央经线、是否带带号与转换方法的输入是否一致"""
+        if not self.crs or not source:
+            return
+        # CoordTrans 的经纬度坐标不区分是否带高程
+        if self.crs.replace('_3d', '') != source.replace('_3d', ''):
+            raise ValueError('文件坐标系为 {}，与转换方法的输入坐标系 {} 不一致！'.format(self.crs, source))
+        if 'gauss' not in source:
+            return
+        if bool(self.with_zone) != bool(source_with_zone):
+            raise ValueError('文件坐标{}带号，与转换方法的输入（exist_with_zone={}）不一致！'.format(
+                '带有' if self.with_zone else '没有', bool(source_with_zone)))
+        if self.lng0 is not None and source_lng0 and float(self.lng0) != float(source_lng0):
+            raise ValueError('文件坐标的中央经线为 {}，与转换方法的输入中央经线 {} 不一致！'.format(self.lng0, source_lng0))
+        if self.lng0 is not None and not source_lng0 and not self.with_zone:
+            raise ValueError('文件坐标没有带号，请在转换方法中指定输入中央经线 exist_lng0={}！'.format(self.lng0))
+
+    def transform(self, func, dst=None, chunk_size=1000000, crs=None, lng0=None, with_zone=None):
+        """
+        分块转换
+        :param func: 转换方法，CoordTransArray 方法名、TransProj 对象、ParallelTransformer 对象或数组转换函数，见 CsvConverter
+        :param dst: str 输出文件路径，不指定时原地转换（文件须以 'r+' 方式打开）。转换结果没有的列（如高程）原样保留
+        :param chunk_size: int 每块的点数
+        :param crs: str 输出坐标系，默认由转换方法确定（TransProj 为 target_proj 的方法名，CoordTrans 为方法名中的目标坐标系）
+        :param lng0: float 输出坐标的中央经线，默认为 TransProj 的 target_lng0
+        :param with_zone: bool 输出投影坐标是否带带号，默认为 TransProj 的 target_with_zone
+        :return: CoordFile 对象（输出文件或原地转换后的本对象）
+        """
+        source, target, source_lng0, source_with_zone, target_lng0, target_with_zone = self._crs_of(func)
+        self._check_source(source, source_lng0, source_with_zone)
+        crs = crs or target
+        lng0 = target_lng0 if lng0 is None else lng0
+        with_zone = target_with_zone if with_zone is None else with_zone
+        array_func = CsvConverter.resolve(func)
+
+        columns = self.data.shape[0]
+        out = self if dst is None else None
+        for start in range(0, self.count, chunk_size):
+            chunk = self.data[:, start:start + chunk_size]
+            result = array_func(*chunk)
+            if out is None:
+                out = self.create(dst, self.count, max(len(result), columns), crs, lng0, with_zone)
+            elif out is self and len(result) > columns:
+                raise ValueError('转换结果列数 {} 多于文件列数 {}，请转换到新文件！'.format(len(result), columns))
+            for row, values in zip(out.data, result):
+                row[start:start + chunk_size] = values
+            # 转换结果没有的列（如 CoordTrans 转换时的高程）原样保留
+            if out is not self:
+                out.data[len(result):, start:start + chunk_size] = chunk[len(result):]
+        if out is None:
+            out = self.create(dst, 0, columns, crs, lng0, with_zone)
+        out.crs, out.lng0, out.with_zone = crs, lng0, with_zone
+        out.flush()
+        if out is self:
+            self._write_header()
+        return out
+
+    def _write_header(self):
+        """原地转换后更新头部的坐标系信息"""
+        if self._is_npy(self.path):
+            self._write_sidecar()
+            return
+        with open(self.path, 'r+b') as f:
+            f.seek(len(self.magic))
+            length = int.from_bytes(f.read(4), 'little')
+            header = json.dumps(self.header).encode('utf-8')
+            if len(header) > length:
+                raise ValueError('头部空间不足，请转换到新文件！')
+            f.write(header + b' ' * (length - len(header)))
+
+    def to_csv(self, path, precision=6, delimiter=',', chunk_size=1000000):
+        """
+        分块导出为分隔符文本文件
+        :param path: str 输出文件路径
+        :param precision: int 小数位数
+        """
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            for start in range(0, self.count, chunk_size):
+                np.savetxt(f, self.data[:, start:start + chunk_size].T, fmt='%.{}f'.format(precision), delimiter=delimiter)
+
+
+if __name__ == '__main__':
+    import time
+    import tempfile
+
+    from .projection import Epsg
+
+    coords = np.loadtxt(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test.csv'), delimiter=',')
+    repeat = 5000
+    folder = tempfile.mkdtemp()
+    src = CoordFile.save(os.path.join(folder, 'points.gtc'), *np.tile(coords, (repeat, 1)).T, crs='wgs84_3d')
+    print('点数：%d，文件大小：%d 字节' % (src.count, os.path.getsize(src.path)))
+
+    trans = TransProj(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.xian80_gauss_3, target_lng0=114, target_with_zone=True)
+    start_time = time.time()
+    dst = CoordFile.open(src.path).transform(trans, os.path.join(folder, 'points_xian80.gtc'), chunk_size=200000)
+    print('转换到新文件耗时：%.3fS，输出坐标系：%s' % (time.time() - start_time, dst.header))
+
+    start_time = time.time()
+    CoordFile.open(src.path, 'r+').transform('wgs84_to_gcj02', chunk_size=200000)
+    print('原地转换耗时：%.3fS，头部：%s' % (time.time() - start_time, CoordFile.open(src.path).header))
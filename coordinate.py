@@ -4,6 +4,12 @@ GPS（wgs84）、高德（gcj02）、百度（BD09）三种最常用的地图坐
 """
 import math
 
+try:
+    from .boundary import ChinaBoundary
+except ImportError:
+    # 直接运行本文件（python coordinate.py）时没有包的上下文
+    from boundary import ChinaBoundary
+
 
 class CoordTrans(object):
     x_pi = 3.14159265358979324 * 3000.0 / 180.0
@@ -47,59 +53,97 @@ class CoordTrans(object):
         return [gg_lng, gg_lat]
 
     @classmethod
-    def wgs84_to_gcj02(cls, lng, lat):
+    def wgs84_to_gcj02(cls, lng, lat, precise=False):
         """
         WGS84转GCJ02(火星坐标系)
         :param lng:WGS84坐标系的经度
         :param lat:WGS84坐标系的纬度
+        :param precise: bool 是否使用国界多边形（boundary.ChinaBoundary）判断点是否在国内，默认为 False，使用外包矩形判断
         :return:
         """
-        if cls.out_of_china(lng, lat):  # 判断是否在国内
+        if cls.out_of_china(lng, lat, precise):  # 判断是否在国内
             return [lng, lat]
-        dlat = cls._transformlat(lng - 105.0, lat - 35.0)
-        dlng = cls._transformlng(lng - 105.0, lat - 35.0)
-        radlat = lat / 180.0 * cls.pi
-        magic = math.sin(radlat)
-        magic = 1 - cls.ee * magic * magic
-        sqrtmagic = math.sqrt(magic)
-        dlat = (dlat * 180.0) / ((cls.a * (1 - cls.ee)) / (magic * sqrtmagic) * cls.pi)
-        dlng = (dlng * 180.0) / (cls.a / sqrtmagic * math.cos(radlat) * cls.pi)
+        dlng, dlat = cls._offset(lng, lat)
         mglat = lat + dlat
         mglng = lng + dlng
         return [mglng, mglat]
 
     @classmethod
-    def gcj02_to_wgs84(cls, lng, lat):
+    def gcj02_to_wgs84(cls, lng, lat, exact=False, tolerance=1e-9, precise=False):
         """
         GCJ02(火星坐标系)转GPS84
         :param lng:火星坐标系的经度
         :param lat:火星坐标系纬度
+        :param exact: bool 是否使用迭代反算（见 gcj02_to_wgs84_exact），默认为 False，使用一步近似计算（误差为米级）
+        :param tolerance: float 迭代反算的收敛阈值，单位：度，仅 exact 为 True 时有效
+        :param precise: bool 是否使用国界多边形（boundary.ChinaBoundary）判断点是否在国内，默认为 False，使用外包矩形判断
         :return:
         """
-        if cls.out_of_china(lng, lat):
+        if exact:
+            return cls.gcj02_to_wgs84_exact(lng, lat, tolerance, precise=precise)[:2]
+        if cls.out_of_china(lng, lat, precise):
             return [lng, lat]
-        dlat = cls._transformlat(lng - 105.0, lat - 35.0)
-        dlng = cls._transformlng(lng - 105.0, lat - 35.0)
-        radlat = lat / 180.0 * cls.pi
-        magic = math.sin(radlat)
-        magic = 1 - cls.ee * magic * magic
-        sqrtmagic = math.sqrt(magic)
-        dlat = (dlat * 180.0) / ((cls.a * (1 - cls.ee)) / (magic * sqrtmagic) * cls.pi)
-        dlng = (dlng * 180.0) / (cls.a / sqrtmagic * math.cos(radlat) * cls.pi)
+        dlng, dlat = cls._offset(lng, lat)
         mglat = lat + dlat
         mglng = lng + dlng
         return [lng * 2 - mglng, lat * 2 - mglat]
 
     @classmethod
-    def bd09_to_wgs84(cls, bd_lon, bd_lat):
+    def gcj02_to_wgs84_exact(cls, lng, lat, tolerance=1e-9, max_iter=30, precise=False):
+        """
+        GCJ02(火星坐标系)转GPS84，对 wgs84_to_gcj02 做不动点迭代反算：
+            w = w - (wgs84_to_gcj02(w) - gcj02)
+        第一次迭代的结果即为 gcj02_to_wgs84 的一步近似结果，一般 2~3 次迭代即可收敛到 1e-9 度（约 0.1 毫米）以内。
+        :param lng: float 火星坐标系的经度
+        :param lat: float 火星坐标系纬度
+        :param tolerance: float 收敛阈值，单位：度。相邻两次迭代经纬度的改正量均小于此值时停止迭代
+        :param max_iter: int 最大迭代次数
+        :param precise: bool 是否使用国界多边形（boundary.ChinaBoundary）判断点是否在国内，默认为 False，使用外包矩形判断
+        :return: [经度, 纬度, 迭代次数]，国外的点原样返回，迭代次数为 0
+        """
+        if cls.out_of_china(lng, lat, precise):
+            return [lng, lat, 0]
+        wg_lng, wg_lat = lng, lat
+        iterations = 0
+        while iterations < max_iter:
+            dlng, dlat = cls._offset(wg_lng, wg_lat)
+            dlng = wg_lng + dlng - lng
+            dlat = wg_lat + dlat - lat
+            wg_lng -= dlng
+            wg_lat -= dlat
+            iterations += 1
+            if abs(dlng) < tolerance and abs(dlat) < tolerance:
+                break
+        return [wg_lng, wg_lat, iterations]
+
+    @classmethod
+    def bd09_to_wgs84(cls, bd_lon, bd_lat, exact=False, tolerance=1e-9, precise=False):
         lon, lat = cls.bd09_to_gcj02(bd_lon, bd_lat)
-        return cls.gcj02_to_wgs84(lon, lat)
+        return cls.gcj02_to_wgs84(lon, lat, exact, tolerance, precise)
 
     @classmethod
-    def wgs84_to_bd09(cls, lon, lat):
-        lon, lat = cls.wgs84_to_gcj02(lon, lat)
+    def wgs84_to_bd09(cls, lon, lat, precise=False):
+        lon, lat = cls.wgs84_to_gcj02(lon, lat, precise)
         return cls.gcj02_to_bd09(lon, lat)
 
+    @classmethod
+    def _offset(cls, lng, lat):
+        """
+        计算 wgs84 到 gcj02 的偏移量，不判断是否在国内
+        :param lng: float WGS84坐标系的经度
+        :param lat: float WGS84坐标系的纬度
+        :return: [经度偏移量, 纬度偏移量]，单位：度
+        """
+        dlat = cls._transformlat(lng - 105.0, lat - 35.0)
+        dlng = cls._transformlng(lng - 105.0, lat - 35.0)
+        radlat = lat / 180.0 * cls.pi
+        magic = math.sin(radlat)
+        magic = 1 - cls.ee * magic * magic
+        sqrtmagic = math.sqrt(magic)
+        dlat = (dlat * 180.0) / ((cls.a * (1 - cls.ee)) / (magic * sqrtmagic) * cls.pi)
+        dlng = (dlng * 180.0) / (cls.a / sqrtmagic * math.cos(radlat) * cls.pi)
+        return [dlng, dlat]
+
     @classmethod
     def _transformlat(cls, lng, lat):
         pi = cls.pi
@@ -127,13 +171,16 @@ class CoordTrans(object):
         return ret
 
     @staticmethod
-    def out_of_china(lng, lat):
+    def out_of_china(lng, lat, precise=False):
         """
         判断是否在国内，不在国内不做偏移
         :param lng:
         :param lat:
+        :param precise: bool 是否使用国界多边形判断，默认为 False，使用外包矩形判断
         :return:
         """
+        if precise:
+            return not ChinaBoundary.contains(lng, lat)
         return not (lng > 73.66 and lng < 135.05 and lat > 3.86 and lat < 53.55)
 
 
@@ -0,0 +1,295 @@
+# -*- encoding: utf-8 -*-
+"""
+GPS（wgs84）、高德（gcj02）、百度（BD09）坐标批量（数组）转换。
+需要安装 numpy 包。
+与 coordinate 模块中 CoordTrans 的公式完全一致，只是输入输出均为 numpy 数组（或任何支持缓冲区协议的 float64 数据），
+整个批次只做一次向量化计算，不再逐点调用 math 函数、也不产生逐点的 Python 对象。
+"""
+import numpy as np
+
+from .coordinate import CoordTrans
+from .boundary import ChinaBoundary
+from .metrics import counted
+
+# 转换方法的装饰器：开启运行指标（见 metrics 模块）时记录转换类型和点数（数组的元素个数）
+_counted = counted(lambda lng: int(np.size(lng)))
+
+
+class CoordTransArray(CoordTrans):
+    """
+    CoordTrans 的数组版本，方法名与 CoordTrans 相同。
+    所有转换方法的 lng、lat 参数为形状相同（或可广播）的数组，返回 [经度数组, 纬度数组]。
+    """
+
+    @staticmethod
+    def _as_arrays(lng, lat):
+        """
+        将输入转换为一维 float64 数组
+        :param lng: array_like 经度
+        :param lat: array_like 纬度
+        :return: (一维经度数组, 一维纬度数组, 原始形状)
+        """
+        lng, lat = np.broadcast_arrays(np.asarray(lng, dtype=np.float64), np.asarray(lat, dtype=np.float64))
+        return lng.ravel(), lat.ravel(), lng.shape
+
+    @classmethod
+    @_counted
+    def gcj02_to_bd09(cls, lng, lat):
+        """
+        火星坐标系(GCJ-02)转百度坐标系(BD-09)
+        :param lng: array_like 火星坐标经度
+        :param lat: array_like 火星坐标纬度
+        :return: [百度经度数组, 百度纬度数组]
+        """
+        lng, lat, shape = cls._as_arrays(lng, lat)
+        z = np.sqrt(lng * lng + lat * lat) + 0.00002 * np.sin(lat * cls.x_pi)
+        theta = np.arctan2(lat, lng) + 0.000003 * np.cos(lng * cls.x_pi)
+        bd_lng = z * np.cos(theta) + 0.0065
+        bd_lat = z * np.sin(theta) + 0.006
+        return [bd_lng.reshape(shape), bd_lat.reshape(shape)]
+
+    @classmethod
+    @_counted
+    def bd09_to_gcj02(cls, bd_lon, bd_lat):
+        """
+        百度坐标系(BD-09)转火星坐标系(GCJ-02)
+        :param bd_lon: array_like 百度坐标经度
+        :param bd_lat: array_like 百度坐标纬度
+        :return: [火星经度数组, 火星纬度数组]
+        """
+        bd_lon, bd_lat, shape = cls._as_arrays(bd_lon, bd_lat)
+        x = bd_lon - 0.0065
+        y = bd_lat - 0.006
+        z = np.sqrt(x * x + y * y) - 0.00002 * np.sin(y * cls.x_pi)
+        theta = np.arctan2(y, x) - 0.000003 * np.cos(x * cls.x_pi)
+        gg_lng = z * np.cos(theta)
+        gg_lat = z * np.sin(theta)
+        return [gg_lng.reshape(shape), gg_lat.reshape(shape)]
+
+    @classmethod
+    def _offset(cls, lng, lat):
+        """
+        计算 wgs84 到 gcj02 的偏移量（度）
+        :param lng: ndarray 经度
+        :param lat: ndarray 纬度
+        :return: (经度偏移数组, 纬度偏移数组)
+        """
+        dlat = cls._transformlat(lng - 105.0, lat - 35.0)
+        dlng = cls._transformlng(lng - 105.0, lat - 35.0)
+        radlat = lat / 180.0 * cls.pi
+        magic = np.sin(radlat)
+        magic = 1 - cls.ee * magic * magic
+        sqrtmagic = np.sqrt(magic)
+        dlat = (dlat * 180.0) / ((cls.a * (1 - cls.ee)) / (magic * sqrtmagic) * cls.pi)
+        dlng = (dlng * 180.0) / (cls.a / sqrtmagic * np.cos(radlat) * cls.pi)
+        return dlng, dlat
+
+    @classmethod
+    def _offset_func(cls, grid=None):
+        """偏移量计算函数：未指定格网时使用解析公式，否则使用格网插值"""
+        if grid is None:
+            return cls._offset
+        return grid.interpolate
+
+    @classmethod
+    @_counted
+    def wgs84_to_gcj02(cls, lng, lat, grid=None, precise=False):
+        """
+        WGS84转GCJ02(火星坐标系)，国外的点原样返回
+        :param lng: array_like WGS84坐标系的经度
+        :param lat: array_like WGS84坐标系的纬度
+        :param grid: obj offset_grid.OffsetGrid 偏移量格网。指定时用格网双线性插值代替解析公式计算偏移量（快速模式）
+        :param precise: bool 是否使用国界多边形（boundary.ChinaBoundary）判断点是否在国内，默认为 False，使用外包矩形判断
+        :return: [火星经度数组, 火星纬度数组]
+        """
+        lng, lat, shape = cls._as_arrays(lng, lat)
+        mglng = lng.copy()
+        mglat = lat.copy()
+        inside = ~cls.out_of_china(lng, lat, precise)
+        dlng, dlat = cls._offset_func(grid)(lng[inside], lat[inside])
+        mglng[inside] += dlng
+        mglat[inside] += dlat
+        return [mglng.reshape(shape), mglat.reshape(shape)]
+
+    @classmethod
+    @_counted
+    def gcj02_to_wgs84(cls, lng, lat, exact=False, tolerance=1e-9, grid=None, precise=False):
+        """
+        GCJ02(火星坐标系)转GPS84，国外的点原样返回
+        :param lng: array_like 火星坐标系的经度
+        :param lat: array_like 火星坐标系纬度
+        :param exact: bool 是否使用迭代反算（见 gcj02_to_wgs84_exact），默认为 False，使用一步近似计算
+        :param tolerance: float 迭代反算的收敛阈值，单位：度，仅 exact 为 True 时有效
+        :param grid: obj offset_grid.OffsetGrid 偏移量格网。指定时用格网双线性插值代替解析公式计算偏移量（快速模式）
+        :param precise: bool 是否使用国界多边形（boundary.ChinaBoundary）判断点是否在国内，默认为 False，使用外包矩形判断
+        :return: [WGS84经度数组, WGS84纬度数组]
+        """
+        if exact:
+            return cls.gcj02_to_wgs84_exact(lng, lat, tolerance, grid=grid, precise=precise)[:2]
+        lng, lat, shape = cls._as_arrays(lng, lat)
+        wglng = lng.copy()
+        wglat = lat.copy()
+        inside = ~cls.out_of_china(lng, lat, precise)
+        dlng, dlat = cls._offset_func(grid)(lng[inside], lat[inside])
+        wglng[inside] = wglng[inside] * 2 - (wglng[inside] + dlng)
+        wglat[inside] = wglat[inside] * 2 - (wglat[inside] + dlat)
+        return [wglng.reshape(shape), wglat.reshape(shape)]
+
+    @classmethod
+    @_counted
+    def gcj02_to_wgs84_exact(cls, lng, lat, tolerance=1e-9, max_iter=30, grid=None, precise=False):
+        """
+        GCJ02(火星坐标系)转GPS84，迭代反算，迭代公式与 CoordTrans.gcj02_to_wgs84_exact 相同。
+        每个点单独判断收敛，已收敛的点不再参与后续迭代，整批点只为收敛慢的点付出额外的计算量。
+        :param lng: array_like 火星坐标系的经度
+        :param lat: array_like 火星坐标系纬度
+        :param tolerance: float 收敛阈值，单位：度
+        :param max_iter: int 最大迭代次数
+        :param grid: obj offset_grid.OffsetGrid 偏移量格网。指定时反算的是格网插值的正算，精度受格网插值误差限制
+        :param precise: bool 是否使用国界多边形（boundary.ChinaBoundary）判断点是否在国内，默认为 False，使用外包矩形判断
+        :return: [WGS84经度数组, WGS84纬度数组, 每个点的迭代次数数组]，国外的点原样返回，迭代次数为 0
+        """
+        lng, lat, shape = cls._as_arrays(lng, lat)
+        wglng = lng.copy()
+        wglat = lat.copy()
+        iterations = np.zeros(lng.shape, dtype=np.int64)
+        active = np.flatnonzero(~cls.out_of_china(lng, lat, precise))
+        offset = cls._offset_func(grid)
+        for _ in range(max_iter):
+            if not active.size:
+                break
+            w_lng = wglng[active]
+            w_lat = wglat[active]
+            dlng, dlat = offset(w_lng, w_lat)
+            dlng = w_lng + dlng - lng[active]
+            dlat = w_lat + dlat - lat[active]
+            wglng[active] = w_lng - dlng
+            wglat[active] = w_lat - dlat
+            iterations[active] += 1
+            active = active[(np.fabs(dlng) >= tolerance) | (np.fabs(dlat) >= tolerance)]
+        return [wglng.reshape(shape), wglat.reshape(shape), iterations.reshape(shape)]
+
+    @classmethod
+    @_counted
+    def bd09_to_wgs84(cls, bd_lon, bd_lat, exact=False, tolerance=1e-9, grid=None, precise=False):
+        lon, lat = cls.bd09_to_gcj02(bd_lon, bd_lat)
+        return cls.gcj02_to_wgs84(lon, lat, exact, tolerance, grid, precise)
+
+    @classmethod
+    @_counted
+    def wgs84_to_bd09(cls, lon, lat, grid=None, precise=False):
+        lon, lat = cls.wgs84_to_gcj02(lon, lat, grid, precise)
+        return cls.gcj02_to_bd09(lon, lat)
+
+    @classmethod
+    def column_func(cls, method, **kwargs):
+        """
+        按列转换的函数，用于文件、多进程等按列处理坐标的场合
+        :param method: str 转换方法名，如 'wgs84_to_gcj02'
+        :param kwargs: 转换方法的关键字参数
+        :return: function 输入 (经度数组, 纬度数组, 其他列...)，返回转换结果，其他列（如高程）原样附在经纬度之后
+        """
+        func = getattr(cls, method, None)
+        if method.startswith('_') or '_to_' not in method or not callable(func):
+            raise ValueError('CoordTransArray 没有转换方法：{}'.format(method))
+
+        def transform(lng, lat, *others):
+            result = list(func(lng, lat, **kwargs))
+            return result[:2] + list(others) if others else result
+        return transform
+
+    @classmethod
+    def _transformlat(cls, lng, lat):
+        pi = cls.pi
+        ret = -100.0 + 2.0 * lng + 3.0 * lat + 0.2 * lat * lat + \
+              0.1 * lng * lat + 0.2 * np.sqrt(np.fabs(lng))
+        ret += (20.0 * np.sin(6.0 * lng * pi) + 20.0 *
+                np.sin(2.0 * lng * pi)) * 2.0 / 3.0
+        ret += (20.0 * np.sin(lat * pi) + 40.0 *
+                np.sin(lat / 3.0 * pi)) * 2.0 / 3.0
+        ret += (160.0 * np.sin(lat / 12.0 * pi) + 320 *
+                np.sin(lat * pi / 30.0)) * 2.0 / 3.0
+        return ret
+
+    @classmethod
+    def _transformlng(cls, lng, lat):
+        pi = cls.pi
+        ret = 300.0 + lng + 2.0 * lat + 0.1 * lng * lng + \
+              0.1 * lng * lat + 0.1 * np.sqrt(np.fabs(lng))
+        ret += (20.0 * np.sin(6.0 * lng * pi) + 20.0 *
+                np.sin(2.0 * lng * pi)) * 2.0 / 3.0
+        ret += (20.0 * np.sin(lng * pi) + 40.0 *
+                np.sin(lng / 3.0 * pi)) * 2.0 / 3.0
+        ret += (150.0 * np.sin(lng / 12.0 * pi) + 300.0 *
+                np.sin(lng / 30.0 * pi)) * 2.0 / 3.0
+        return ret
+
+    @staticmethod
+    def out_of_china(lng, lat, precise=False):
+        """
+        逐点判断是否在国内，不在国内不做偏移
+        :param lng: array_like 经度
+        :param lat: array_like 纬度
+        :param precise: bool 是否使用国界多边形判断，默认为 False，使用外包矩形判断
+        :return: ndarray bool 不在国内的点为 True
+        """
+        lng = np.asarray(lng, dtype=np.float64)
+        lat = np.asarray(lat, dtype=np.float64)
+        if precise:
+            return ~CoordTransArray.in_china(lng, lat)
+        return ~((lng > 73.66) & (lng < 135.05) & (lat > 3.86) & (lat < 53.55))
+
+    @staticmethod
+    def in_china(lng, lat):
+        """
+        逐点判断是否在中国国界内，格网索引与 boundary.ChinaBoundary.contains 相同，
+        只有落在边界单元中的点才做射线法判断，并且按格网行分组，每组只与该行涉及的边比较
+        :param lng: array_like 经度
+        :param lat: array_like 纬度
+        :return: ndarray bool 在国界内的点为 True
+        """
+        b = ChinaBoundary
+        lng, lat = np.broadcast_arrays(np.asarray(lng, dtype=np.float64), np.asarray(lat, dtype=np.float64))
+        index, row_edges = b.index()
+        index = np.frombuffer(index, dtype=np.uint8)
+        result = np.zeros(lng.shape, dtype=bool)
+        within = (lng >= b.lng_min) & (lng < b.lng_max) & (lat >= b.lat_min) & (lat < b.lat_max)
+        lng_in = lng[within]
+        lat_in = lat[within]
+        cell = ((lat_in - b.lat_min) / b.cell_size).astype(np.intp) * b.n_lng + \
+               ((lng_in - b.lng_min) / b.cell_size).astype(np.intp)
+        state = index[cell]
+        inside = state == b.INSIDE
+        border = np.flatnonzero(state == b.BORDER)
+        if border.size:
+            rows = cell[border] // b.n_lng
+            order = np.argsort(rows, kind='stable')
+            unique_rows, starts = np.unique(rows[order], return_index=True)
+            for row, group in zip(unique_rows.tolist(), np.split(border[order], starts[1:])):
+                x = lng_in[group]
+                y = lat_in[group]
+                crossings = np.zeros(group.size, dtype=bool)
+                for x1, y1, x2, y2 in row_edges[row]:
+                    if y1 == y2:
+                        continue
+                    crossings ^= ((y1 > y) != (y2 > y)) & (x < (x2 - x1) * (y - y1) / (y2 - y1) + x1)
+                inside[group] = crossings
+        result[within] = inside
+        return result
+
+
+if __name__ == '__main__':
+    import time
+
+    n = 1000000
+    lngs = np.random.uniform(70, 140, n)
+    lats = np.random.uniform(0, 55, n)
+
+    start_time = time.time()
+    result = CoordTransArray.wgs84_to_gcj02(lngs, lats)
+    print('批量转换点数：%d，耗时：%.3fS' % (n, time.time() - start_time))
+
+    start_time = time.time()
+    for lng, lat in zip(lngs[:100000].tolist(), lats[:100000].tolist()):
+        CoordTrans.wgs84_to_gcj02(lng, lat)
+    print('逐点转换点数：%d，耗时：%.3fS' % (100000, time.time() - start_time))
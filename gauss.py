@@ -0,0 +1,191 @@
+# -*- encoding: utf-8 -*-
+"""
+高斯-克吕格（横轴墨卡托）投影正反算，纯 numpy 向量化实现，不依赖 pyproj。
+需要安装 numpy 包。
+采用 Krüger 级数（展开至第三扁率 n 的 6 次方，见 Karney, Transverse Mercator with an accuracy of a few nanometers,
+J. Geodesy 85, 475-485, 2011），在分度带范围内正反算精度优于 1 毫米，与 pyproj（PROJ tmerc）的结果一致。
+椭球参数与 projection 模块中 Epsg 各高斯投影坐标系的 EPSG 定义一致：
+    北京54、新北京：克拉索夫斯基椭球 a=6378245，1/f=298.3
+    西安80：IAG-75 椭球 a=6378140，1/f=298.257
+    cgcs2000：CGCS2000 椭球 a=6378137，1/f=298.257222101
+东偏 500 公里，带带号时 X 坐标加上 带号 × 1000000。
+一次数组调用中每个点可以有各自的中央经线，不需要按分度带分组，也不需要创建 transformer。
+注意：本模块只做投影计算，不做基准面转换。pyproj 中 wgs84 到西安80、新北京、cgcs2000 的转换同样是直接投影，结果一致；
+北京54 在 PROJ 数据库中部分地区有基准转换参数，这些地区 pyproj 的结果会与本模块相差数十米。
+"""
+import math
+
+import numpy as np
+
+
+class Ellipsoid(object):
+    """参考椭球"""
+
+    def __init__(self, name, a, rf):
+        """
+        :param name: str 椭球名称
+        :param a: float 长半轴，单位：米
+        :param rf: float 扁率的倒数
+        """
+        self.name = name
+        self.a = a
+        self.rf = rf
+        self.f = 1 / rf
+        self.es = self.f * (2 - self.f)  # 第一偏心率平方
+        self.e = math.sqrt(self.es)
+        self.n = self.f / (2 - self.f)  # 第三扁率
+
+    def __repr__(self):
+        return 'Ellipsoid({!r}, a={}, rf={})'.format(self.name, self.a, self.rf)
+
+
+ELLIPSOIDS = {
+    'krasovsky': Ellipsoid('krasovsky', 6378245.0, 298.3),
+    'iag75': Ellipsoid('iag75', 6378140.0, 298.257),
+    'cgcs2000': Ellipsoid('cgcs2000', 6378137.0, 298.257222101),
+    'wgs84': Ellipsoid('wgs84', 6378137.0, 298.257223563),
+}
+
+
+class GaussKruger(object):
+    """高斯-克吕格投影"""
+    # Epsg 方法名中的坐标系 -> 椭球
+    families = {
+        'xian80': 'iag75',
+        'bj54': 'krasovsky',
+        'bj_new': 'krasovsky',
+        'cgcs2000': 'cgcs2000',
+    }
+    false_easting = 500000.0
+    zone_factor = 1000000.0  # 带号在 X 坐标中的倍数
+
+    def __init__(self, ellipsoid, k0=1.0):
+        """
+        :param ellipsoid: str or Ellipsoid 椭球，可以为 ELLIPSOIDS 中的名称，或 families 中的坐标系名称（如 xian80）
+        :param k0: float 中央经线比例因子，高斯-克吕格投影为 1
+        """
+        if isinstance(ellipsoid, str):
+            ellipsoid = ELLIPSOIDS[self.families.get(ellipsoid, ellipsoid)]
+        self.ellipsoid = ellipsoid
+        self.k0 = k0
+        n = ellipsoid.n
+        n2 = n * n
+        n3 = n2 * n
+        n4 = n3 * n
+        n5 = n4 * n
+        n6 = n5 * n
+        # 子午线弧长的比例系数（矩形化半径）
+        self.radius = ellipsoid.a / (1 + n) * (1 + n2 / 4 + n4 / 64 + n6 / 256)
+        self.alpha = (
+            n / 2 - 2 * n2 / 3 + 5 * n3 / 16 + 41 * n4 / 180 - 127 * n5 / 288 + 7891 * n6 / 37800,
+            13 * n2 / 48 - 3 * n3 / 5 + 557 * n4 / 1440 + 281 * n5 / 630 - 1983433 * n6 / 1935360,
+            61 * n3 / 240 - 103 * n4 / 140 + 15061 * n5 / 26880 + 167603 * n6 / 181440,
+            49561 * n4 / 161280 - 179 * n5 / 168 + 6601661 * n6 / 7257600,
+            34729 * n5 / 80640 - 3418889 * n6 / 1995840,
+            212378941 * n6 / 319334400,
+        )
+        self.beta = (
+            n / 2 - 2 * n2 / 3 + 37 * n3 / 96 - n4 / 360 - 81 * n5 / 512 + 96199 * n6 / 604800,
+            n2 / 48 + n3 / 15 - 437 * n4 / 1440 + 46 * n5 / 105 - 1118711 * n6 / 3870720,
+            17 * n3 / 480 - 37 * n4 / 840 - 209 * n5 / 4480 + 5569 * n6 / 90720,
+            4397 * n4 / 161280 - 11 * n5 / 504 - 830251 * n6 / 7257600,
+            4583 * n5 / 161280 - 108847 * n6 / 3991680,
+            20648693 * n6 / 638668800,
+        )
+
+    @classmethod
+    def from_proj(cls, proj):
+        """
+        根据 Epsg 高斯投影类方法创建投影对象
+        :param proj: function or str Epsg 类方法（或方法名），如 Epsg.cgcs2000_gauss_3
+        :return: (GaussKruger 对象, 分度带度数)
+        """
+        name = proj if isinstance(proj, str) else getattr(proj, '__name__')
+        family, _, zone_degree = name.rpartition('_gauss_')
+        if family not in cls.families:
+            raise ValueError('{} 不是高斯投影坐标系！'.format(name))
+        return cls(family), int(zone_degree)
+
+    @staticmethod
+    def zone_lng0(lng, zone_degree):
+        """
+        批量计算经度所在分度带的带号和中央经线，与 Epsg.calc_number_lng0 相同
+        :param lng: ndarray 经度
+        :param zone_degree: int 分度带度数，3 或 6
+        :return: (带号数组, 中央经线数组)
+        """
+        number = (lng / zone_degree + zone_degree / 6).astype(np.int64)
+        return number, (number - 1) * zone_degree + 3
+
+    def _conformal_tau(self, tau):
+        """由 tan(纬度) 计算 tan(等角纬度)"""
+        e = self.ellipsoid.e
+        sigma = np.sinh(e * np.arctanh(e * tau / np.hypot(1, tau)))
+        return tau * np.hypot(1, sigma) - sigma * np.hypot(1, tau)
+
+    def forward(self, lng, lat, zone_degree=3, lng0=None, with_zone=False):
+        """
+        高斯投影正算
+        :param lng: array_like 经度
+        :param lat: array_like 纬度
+        :param zone_degree: int 分度带度数，3 或 6，未指定 lng0 时用于计算每个点所在分度带
+        :param lng0: float or array_like 中央经线（或位于该分度带内的经度，按分度带规则换算为中央经线），
+                     默认按每个点的经度计算所在分度带的中央经线
+        :param with_zone: bool 输出的 X 坐标是否加上分度带带号
+        :return: [X 数组, Y 数组]，X 为东向坐标，Y 为北向坐标
+        """
+        lng = np.asarray(lng, dtype=np.float64)
+        lat = np.asarray(lat, dtype=np.float64)
+        number, lng0 = self.zone_lng0(lng if lng0 is None else np.asarray(lng0, dtype=np.float64), zone_degree)
+        lam = np.radians(lng - lng0)
+        tau_p = self._conformal_tau(np.tan(np.radians(lat)))
+        xi_p = np.arctan2(tau_p, np.cos(lam))
+        eta_p = np.arcsinh(np.sin(lam) / np.hypot(tau_p, np.cos(lam)))
+        xi = xi_p.copy()
+        eta = eta_p.copy()
+        for j, alpha in enumerate(self.alpha, 1):
+            xi += alpha * np.sin(2 * j * xi_p) * np.cosh(2 * j * eta_p)
+            eta += alpha * np.cos(2 * j * xi_p) * np.sinh(2 * j * eta_p)
+        x = self.false_easting + self.k0 * self.radius * eta
+        y = self.k0 * self.radius * xi
+        if with_zone:
+            x = x + number * self.zone_factor
+        return [x, y]
+
+    def inverse(self, x, y, zone_degree=3, lng0=None, with_zone=False):
+        """
+        高斯投影反算
+        :param x: array_like X（东向）坐标
+        :param y: array_like Y（北向）坐标
+        :param zone_degree: int 分度带度数，3 或 6
+        :param lng0: float or array_like 中央经线（或位于该分度带内的经度）。X 坐标带有带号时可以不指定，按带号计算
+        :param with_zone: bool 输入的 X 坐标是否带有分度带带号
+        :return: [经度数组, 纬度数组]
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if with_zone:
+            number = (x / self.zone_factor).astype(np.int64)
+            x = x - number * self.zone_factor
+        if lng0 is not None:
+            lng0 = self.zone_lng0(np.asarray(lng0, dtype=np.float64), zone_degree)[1]
+        elif with_zone:
+            lng0 = (number - 1) * zone_degree + 3
+        else:
+            raise TypeError('输入投影坐标X方向没有带号时，必须指定中央经线经度值！')
+        xi = y / (self.k0 * self.radius)
+        eta = (x - self.false_easting) / (self.k0 * self.radius)
+        xi_p = xi.copy()
+        eta_p = eta.copy()
+        for j, beta in enumerate(self.beta, 1):
+            xi_p -= beta * np.sin(2 * j * xi) * np.cosh(2 * j * eta)
+            eta_p -= beta * np.cos(2 * j * xi) * np.sinh(2 * j * eta)
+        lam = np.arctan2(np.sinh(eta_p), np.cos(xi_p))
+        tau_p = np.sin(xi_p) / np.hypot(np.sinh(eta_p), np.cos(xi_p))
+        # 牛顿迭代由 tan(等角纬度) 求 tan(纬度)
+        es = self.ellipsoid.es
+        tau = tau_p.copy()
+        for _ in range(5):
+            tau_i = self._conformal_tau(tau)
+            tau += (tau_p - tau_i) / np.hypot(1, tau_i) * (1 + (1 - es) * tau * tau) / ((1 - es) * np.hypot(1, tau))
+        return [lng0 + np.degrees(lam), np.degrees(np.arctan(tau))]
@@ -0,0 +1,222 @@
+# -*- encoding: utf-8 -*-
+"""
+高德地理编码、逆地理编码结果的持久化缓存（SQLite 文件），多个进程可以同时使用同一个缓存文件。
+只使用 Python 标准库。
+缓存以单个地址（坐标）为单位：地理编码的键为规范化后的地址，逆地理编码的键为按 precision 位小数取整后的坐标，
+再加上影响结果的请求参数（city、extensions、radius 等）。
+AMapGeo、AMapReGeo、AMapBulkGeo、AMapBulkReGeo 及其异步版本指定 cache 参数后，命中的地址（坐标）不再发送请求，
+批量查询只请求未命中的部分。
+示例：
+    cache = GeocodeCache('geocode.sqlite', ttl=30 * 86400, max_entries=1000000, precision=5)
+    geo = AMapBulkGeo(key, addresses, cache=cache)
+    print(geo.coordinate, cache.stats())
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+import unicodedata
+
+from .metrics import metrics
+
+
+class GeocodeCache(object):
+    """
+    SQLite 缓存。
+    每条记录保存写入时间和最近使用时间：超过 ttl 的记录视为未命中并删除，记录数超过 max_entries 时删除最久未使用的记录。
+    数据库使用 WAL 模式，读写不互相阻塞，写入冲突时等待 busy_timeout。
+    同一个对象可以在多个线程中使用（共用一个连接，操作加锁），fork 出的子进程第一次使用时重新打开连接。
+    """
+    # 不影响查询结果、不参与缓存键的请求参数
+    ignored_parameters = ('key', 'sig', 'batch', 'address', 'location', 'api_url')
+
+    def __init__(self, path=':memory:', ttl=30 * 86400, max_entries=1000000, precision=5, busy_timeout=30):
+        """
+        :param path: str 缓存文件路径，默认为内存数据库（仅本进程可用）
+        :param ttl: float 记录的有效期（秒），None 为永久有效
+        :param max_entries: int 最多保存的记录数，None 为不限制
+        :param precision: int 逆地理编码坐标取整的小数位数，5 位约为 1 米，4 位约为 10 米
+        :param busy_timeout: float 等待其他进程写入完成的最长时间（秒）
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.precision = precision
+        self.busy_timeout = busy_timeout
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.stores = 0
+
+    @property
+    def connection(self):
+        """sqlite3 连接对象"""
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False,
+                                         isolation_level=None)
+            if self.path != ':memory:':
+                connection.execute('PRAGMA journal_mode=WAL')
+                connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS geocode ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS geocode_accessed ON geocode (accessed)')
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    @staticmethod
+    def normalize_address(address):
+        """
+        规范化地址：全角字符转半角（NFKC），去掉全部空白字符，英文字母转小写
+        :param address: str 地址
+        :return: str
+        """
+        return re.sub(r'\s+', '', unicodedata.normalize('NFKC', str(address))).lower()
+
+    def normalize_location(self, location):
+        """
+        规范化坐标：按 precision 位小数取整
+        :param location: str or tuple 'lng,lat' 或 (lng, lat)
+        :return: str 'lng,lat'
+        """
+        if isinstance(location, str):
+            location = re.sub(r'\s', '', location).split(',')
+        lng, lat = map(float, location)
+        return '{0:.{2}f},{1:.{2}f}'.format(lng, lat, self.precision)
+
+    def key(self, kind, item, parameters=None):
+        """
+        缓存键
+        :param kind: str 'geo' 地理编码，'regeo' 逆地理编码
+        :param item: str or tuple 地址，或坐标
+        :param parameters: dict 请求参数，值为 None 或空的参数、ignored_parameters 中的参数不参与缓存键
+        :return: str
+        """
+        item = self.normalize_address(item) if kind == 'geo' else self.normalize_location(item)
+        options = sorted(
+            (k, str(v).lower()) for k, v in (parameters or {}).items()
+            if v and k not in self.ignored_parameters
+        )
+        return '{}|{}|{}'.format(kind, item, '&'.join('{}={}'.format(k, v) for k, v in options))
+
+    def get_many(self, keys):
+        """
+        查询多个键
+        :param keys: list 缓存键列表
+        :return: dict {键: 值}，只包含命中的键
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        now = time.time()
+        found = {}
+        expired = []
+        with self._lock:
+            connection = self.connection
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                rows = connection.execute(
+                    'SELECT key, value, created FROM geocode WHERE key IN ({})'.format(','.join('?' * len(part))), part
+                ).fetchall()
+                for key, value, created in rows:
+                    if self.ttl is not None and now - created > self.ttl:
+                        expired.append(key)
+                    else:
+                        found[key] = json.loads(value)
+            if expired or found:
+                with connection:
+                    connection.execute('BEGIN IMMEDIATE')
+                    connection.executemany('DELETE FROM geocode WHERE key = ?', [(key,) for key in expired])
+                    connection.executemany('UPDATE geocode SET accessed = ? WHERE key = ?', [(now, key) for key in found])
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            self.expirations += len(expired)
+        if metrics.enabled:
+            metrics.inc('geotransform_geocode_cache_hits_total', len(found))
+            metrics.inc('geotransform_geocode_cache_misses_total', len(keys) - len(found))
+        return found
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def set_many(self, items):
+        """
+        保存多条记录，已有的键覆盖
+        :param items: dict or list {键: 值} 或 [(键, 值), ...]，值为可以 JSON 序列化的对象
+        """
+        items = list(items.items() if isinstance(items, dict) else items)
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, json.dumps(value, ensure_ascii=False), now, now) for key, value in items]
+        with self._lock:
+            connection = self.connection
+            with connection:
+                connection.execute('BEGIN IMMEDIATE')
+                connection.executemany('INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?)', rows)
+                if self.max_entries is not None:
+                    excess = connection.execute('SELECT COUNT(*) FROM geocode').fetchone()[0] - self.max_entries
+                    if excess > 0:
+                        connection.execute(
+                            'DELETE FROM geocode WHERE key IN (SELECT key FROM geocode ORDER BY accessed LIMIT ?)',
+                            (excess,)
+                        )
+                        self.evictions += excess
+            self.stores += len(rows)
+
+    def set(self, key, value):
+        self.set_many([(key, value)])
+
+    def purge(self):
+        """
+        删除全部过期记录
+        :return: int 删除的记录数
+        """
+        if self.ttl is None:
+            return 0
+        with self._lock:
+            count = self.connection.execute('DELETE FROM geocode WHERE created < ?', (time.time() - self.ttl,)).rowcount
+            self.expirations += count
+        return count
+
+    def clear(self):
+        """清空缓存及统计信息"""
+        with self._lock:
+            self.connection.execute('DELETE FROM geocode')
+            self.hits = self.misses = self.expirations = self.evictions = self.stores = 0
+
+    def __len__(self):
+        with self._lock:
+            return self.connection.execute('SELECT COUNT(*) FROM geocode').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+    def stats(self):
+        """
+        缓存统计信息（本对象的统计，不包括其他进程）
+        :return: dict size 当前记录数，hits 命中次数，misses 未命中次数，expirations 过期删除数，
+                      evictions 超出容量删除数，stores 写入数，hit_rate 命中率
+        """
+        size = len(self)
+        total = self.hits + self.misses
+        return {
+            'size': size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'expirations': self.expirations,
+            'evictions': self.evictions,
+            'stores': self.stores,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,228 @@
+# -*- encoding: utf-8 -*-
+"""
+坐标系转换图：把 bd09、gcj02、wgs84 以及 Epsg 的全部坐标系作为节点，
+CoordTrans 的偏移转换和 TransProj 的投影转换作为边，自动查找任意两个坐标系之间的转换路径，
+编译为一个向量化的转换计划（ConversionPlan），整条路径都是 numpy 数组运算，不产生逐点的中间对象。
+需要安装 numpy 包。
+示例：百度坐标直接转换为 CGCS2000 3 度带带带号的高斯投影坐标
+    plan = conversion_graph.compile('bd09', 'cgcs2000_gauss_3', target_with_zone=True)
+    xs, ys = plan(bd_lngs, bd_lats)
+"""
+import heapq
+import inspect
+import threading
+from collections import OrderedDict
+
+from .coordinate_array import CoordTransArray
+from .projection import Epsg, TransProj
+
+
+class ConversionPlan(object):
+    """编译好的转换计划，可以重复使用"""
+
+    def __init__(self, path, steps):
+        """
+        :param path: list 经过的坐标系节点
+        :param steps: list 每一步的按列转换函数，输入、输出均为各列数组
+        """
+        self.path = path
+        self.steps = steps
+
+    def __call__(self, xs, ys, zs=None):
+        """
+        转换坐标
+        :param xs: array_like X（经度）
+        :param ys: array_like Y（纬度）
+        :param zs: array_like Z（高程），可选，偏移转换时原样保留
+        :return: tuple (X 数组, Y 数组) 或 (X 数组, Y 数组, Z 数组)
+        """
+        columns = [xs, ys] if zs is None else [xs, ys, zs]
+        for step in self.steps:
+            columns = step(*columns)
+        return tuple(columns)
+
+    transform = __call__
+
+    def __repr__(self):
+        return 'ConversionPlan({})'.format(' -> '.join(self.path))
+
+
+class ConversionGraph(object):
+    """
+    坐标系转换图。
+    边由 register 注册：factory(source_params, target_params, options) 返回按列转换函数，
+    source_params、target_params 为端点的 {'lng0': 中央经线, 'with_zone': 是否带带号}（路径中间的节点为空字典），
+    options 为 compile 的其他关键字参数（如 exact、grid）。
+    已编译的转换计划按参数缓存，容量有上限，超出时淘汰最久未使用的计划（LRU）。
+    """
+
+    def __init__(self, maxsize=128):
+        """
+        :param maxsize: int 最多缓存的转换计划个数
+        """
+        self.maxsize = maxsize
+        self._edges = {}
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def nodes(self):
+        nodes = set(self._edges)
+        for targets in self._edges.values():
+            nodes.update(targets)
+        return sorted(nodes)
+
+    def register(self, source, target, factory, cost=1.0):
+        """
+        注册一条转换边，已编译的转换计划随之失效
+        :param source: str 输入坐标系
+        :param target: str 输出坐标系
+        :param factory: function 见类说明
+        :param cost: float 边的代价，查找路径时取总代价最小的路径
+        """
+        with self._lock:
+            self._edges.setdefault(source, {})[target] = (factory, cost)
+            self._plans.clear()
+
+    @staticmethod
+    def _option_key(name, value):
+        """compile 关键字参数在缓存键中的取值：OffsetGrid 对象取其稳定标识（identity），不用 id()，对象回收后 id 可能被复用"""
+        if name == 'grid' and value is not None:
+            return getattr(value, 'identity', value)
+        return value
+
+    def path(self, source, target):
+        """
+        查找总代价最小的转换路径（Dijkstra）
+        :return: list 经过的坐标系节点，包括起点和终点
+        """
+        if source == target:
+            return [source]
+        queue = [(0.0, source, [source])]
+        visited = set()
+        while queue:
+            cost, node, path = heapq.heappop(queue)
+            if node == target:
+                return path
+            if node in visited:
+                continue
+            visited.add(node)
+            for next_node, (_, edge_cost) in self._edges.get(node, {}).items():
+                if next_node not in visited:
+                    heapq.heappush(queue, (cost + edge_cost, next_node, path + [next_node]))
+        raise ValueError('没有从 {} 到 {} 的转换路径！'.format(source, target))
+
+    def compile(self, source, target, source_lng0=None, source_with_zone=False,
+                target_lng0=None, target_with_zone=False, **options):
+        """
+        编译转换计划，相同参数（grid 按 OffsetGrid.identity 比较）的计划只编译一次
+        :param source: str 输入坐标系，'bd09'、'gcj02'、'wgs84' 或 Epsg 类方法名（如 'xian80_gauss_3'）
+        :param target: str 输出坐标系
+        :param source_lng0: float 输入投影坐标的中央经线，见 TransProj 的 exist_lng0
+        :param source_with_zone: bool 输入投影坐标是否带带号
+        :param target_lng0: float 输出投影坐标的中央经线，见 TransProj 的 target_lng0
+        :param target_with_zone: bool 输出投影坐标是否带带号
+        :param options: 偏移转换的关键字参数，如 exact=True、grid=OffsetGrid 对象、precise=True
+        :return: ConversionPlan 对象
+        """
+        key = (source, target, source_lng0, source_with_zone, target_lng0, target_with_zone,
+               tuple(sorted((name, self._option_key(name, value)) for name, value in options.items())))
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                return plan
+        path = self.path(source, target)
+        steps = []
+        for i, (node, next_node) in enumerate(zip(path, path[1:])):
+            source_params = {'lng0': source_lng0, 'with_zone': source_with_zone} if i == 0 else {}
+            target_params = {'lng0': target_lng0, 'with_zone': target_with_zone} if next_node == target else {}
+            factory = self._edges[node][next_node][0]
+            steps.append(factory(source_params, target_params, options))
+        plan = ConversionPlan(path, steps)
+        with self._lock:
+            plan = self._plans.setdefault(key, plan)
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.maxsize:
+                self._plans.popitem(last=False)
+            return plan
+
+    def transform(self, source, target, xs, ys, zs=None, **kwargs):
+        """编译（或取得已编译的）转换计划并转换，kwargs 见 compile"""
+        return self.compile(source, target, **kwargs)(xs, ys, zs)
+
+
+def _offset_edge(method):
+    """CoordTrans 偏移转换的边"""
+    accepted = inspect.signature(getattr(CoordTransArray, method)).parameters
+
+    def factory(source_params, target_params, options):
+        kwargs = {name: value for name, value in options.items() if name in accepted}
+        return CoordTransArray.column_func(method, **kwargs)
+    return factory
+
+
+def _proj_edge(source, target):
+    """TransProj 投影转换的边"""
+
+    def factory(source_params, target_params, options):
+        trans_proj = TransProj(
+            exist_proj=getattr(Epsg, source), exist_lng0=source_params.get('lng0'),
+            exist_with_zone=source_params.get('with_zone', False),
+            target_proj=getattr(Epsg, target), target_lng0=target_params.get('lng0'),
+            target_with_zone=target_params.get('with_zone', False),
+        )
+        return trans_proj.transform_many
+    return factory
+
+
+def epsg_nodes():
+    """Epsg 中获取坐标系的全部类方法名，见 Epsg.methods"""
+    return sorted(Epsg.methods)
+
+
+def default_graph():
+    """
+    默认的转换图：
+        bd09 <-> gcj02 <-> wgs84（wgs84_3d）、bd09 <-> wgs84（wgs84_3d）为 CoordTrans 的偏移转换，高程原样保留；
+        Epsg 各坐标系之间两两直接由 TransProj（PROJ）转换。
+    """
+    graph = ConversionGraph()
+    for method in ('gcj02_to_bd09', 'bd09_to_gcj02'):
+        source, _, target = method.partition('_to_')
+        graph.register(source, target, _offset_edge(method))
+    for wgs84 in ('wgs84', 'wgs84_3d'):
+        for other in ('gcj02', 'bd09'):
+            graph.register(wgs84, other, _offset_edge('wgs84_to_{}'.format(other)))
+            graph.register(other, wgs84, _offset_edge('{}_to_wgs84'.format(other)))
+    nodes = epsg_nodes()
+    for source in nodes:
+        for target in nodes:
+            if source != target:
+                graph.register(source, target, _proj_edge(source, target))
+    return graph
+
+
+# 默认的转换图
+conversion_graph = default_graph()
+
+
+if __name__ == '__main__':
+    import os
+    import time
+
+    import numpy as np
+
+    coords = np.loadtxt(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test.csv'), delimiter=',')
+    lngs, lats = np.tile(coords[:, 0], 5000), np.tile(coords[:, 1], 5000)
+    bd_lngs, bd_lats = CoordTransArray.wgs84_to_bd09(lngs, lats)
+
+    plan = conversion_graph.compile('bd09', 'cgcs2000_gauss_3', target_with_zone=True, exact=True)
+    print(plan)
+    start_time = time.time()
+    xs, ys = plan(bd_lngs, bd_lats)
+    print('转换点数：%d，耗时：%.3fS' % (len(xs), time.time() - start_time))
+
+    expected = TransProj(exist_proj=Epsg.wgs84, target_proj=Epsg.cgcs2000_gauss_3, target_with_zone=True).transform_many(lngs, lats)
+    print('与 wgs84 直接投影的最大差值：%.6f 米' % max(np.abs(xs - expected[0]).max(), np.abs(ys - expected[1]).max()))
+    print(conversion_graph.compile('xian80_gauss_3', 'gcj02', source_with_zone=True))
@@ -0,0 +1,291 @@
+# -*- encoding: utf-8 -*-
+"""
+七参数（布尔莎-沃尔夫 Bursa-Wolf / 赫尔默特 Helmert）基准转换：由公共控制点最小二乘拟合参数，并向量化应用。
+需要安装 numpy 包。
+projection 模块只做 EPSG 标准转换，北京54、西安80 到 CGCS2000 等局部转换需要用本地控制点求七参数，
+拟合得到的 Helmert 对象可以：
+    1、直接对空间直角坐标、大地坐标数组做转换（apply、apply_geodetic）；
+    2、作为 TransProj 的 datum_shift 参数，生成 PROJ pipeline（投影反算 -> 空间直角坐标 -> 七参数 -> 投影正算），
+       按分度带缓存 transformer，与标准转换一样批量转换；
+    3、保存为 JSON 文件（save、load），重复使用。
+参数约定与 PROJ 的 helmert 变换（convention=position_vector）一致：
+    X' = T + (1 + s) · R · X，R = [[1, -rz, ry], [rz, 1, -rx], [-ry, rx, 1]]（小角度近似）
+    平移量单位：米，旋转角单位：角秒，尺度单位：ppm（百万分之一）
+"""
+import json
+import math
+import warnings
+
+import numpy as np
+
+from .gauss import ELLIPSOIDS, GaussKruger
+
+ARCSEC = math.pi / 180 / 3600  # 1 角秒对应的弧度
+
+
+def _ellipsoid(ellipsoid):
+    """椭球参数：Ellipsoid 对象、ELLIPSOIDS 中的名称或坐标系名称（如 xian80）"""
+    if isinstance(ellipsoid, str):
+        return ELLIPSOIDS[GaussKruger.families.get(ellipsoid, ellipsoid)]
+    return ellipsoid
+
+
+def geocentric(lng, lat, h, ellipsoid):
+    """
+    大地坐标转换为空间直角坐标
+    :param lng: array_like 经度
+    :param lat: array_like 纬度
+    :param h: array_like 大地高，单位：米
+    :param ellipsoid: Ellipsoid 对象或名称
+    :return: [X 数组, Y 数组, Z 数组]
+    """
+    ellipsoid = _ellipsoid(ellipsoid)
+    lam = np.radians(np.asarray(lng, dtype=np.float64))
+    phi = np.radians(np.asarray(lat, dtype=np.float64))
+    h = np.asarray(h, dtype=np.float64)
+    sin_phi = np.sin(phi)
+    n = ellipsoid.a / np.sqrt(1 - ellipsoid.es * sin_phi * sin_phi)
+    return [(n + h) * np.cos(phi) * np.cos(lam), (n + h) * np.cos(phi) * np.sin(lam), (n * (1 - ellipsoid.es) + h) * sin_phi]
+
+
+def geodetic(x, y, z, ellipsoid):
+    """
+    空间直角坐标转换为大地坐标（迭代计算，精度优于 0.1 毫米）
+    :param ellipsoid: Ellipsoid 对象或名称
+    :return: [经度数组, 纬度数组, 大地高数组]
+    """
+    ellipsoid = _ellipsoid(ellipsoid)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    z = np.asarray(z, dtype=np.float64)
+    es = ellipsoid.es
+    p = np.hypot(x, y)
+    phi = np.arctan2(z, p * (1 - es))
+    for _ in range(6):
+        sin_phi = np.sin(phi)
+        n = ellipsoid.a / np.sqrt(1 - es * sin_phi * sin_phi)
+        h = p / np.cos(phi) - n
+        phi = np.arctan2(z, p * (1 - es * n / (n + h)))
+    return [np.degrees(np.arctan2(y, x)), np.degrees(phi), h]
+
+
+class Helmert(object):
+    """七参数基准转换"""
+    names = ('tx', 'ty', 'tz', 'rx', 'ry', 'rz', 's')
+
+    def __init__(self, tx=0.0, ty=0.0, tz=0.0, rx=0.0, ry=0.0, rz=0.0, s=0.0, residuals=None):
+        """
+        :param tx, ty, tz: float 平移量，单位：米
+        :param rx, ry, rz: float 旋转角，单位：角秒
+        :param s: float 尺度，单位：ppm
+        :param residuals: ndarray 拟合时控制点的残差，形状为 (点数, 3)，单位：米
+        """
+        self.tx, self.ty, self.tz = float(tx), float(ty), float(tz)
+        self.rx, self.ry, self.rz = float(rx), float(ry), float(rz)
+        self.s = float(s)
+        self.residuals = residuals
+
+    @property
+    def params(self):
+        return tuple(getattr(self, name) for name in self.names)
+
+    @property
+    def rms(self):
+        """控制点残差的点位中误差，单位：米"""
+        if self.residuals is None:
+            return None
+        return float(np.sqrt((self.residuals ** 2).sum(axis=1).mean()))
+
+    @property
+    def key(self):
+        """用于 transformer_key 的参数字符串"""
+        return 'helmert:' + ','.join(repr(value) for value in self.params)
+
+    def __repr__(self):
+        return 'Helmert({})'.format(', '.join('{}={!r}'.format(name, value) for name, value in zip(self.names, self.params)))
+
+    @classmethod
+    def fit(cls, source, target):
+        """
+        由公共控制点的空间直角坐标最小二乘拟合七参数（线性化模型，一次解算）
+        :param source: array_like 原坐标系的空间直角坐标，形状为 (点数, 3)
+        :param target: array_like 目标坐标系的空间直角坐标，形状为 (点数, 3)
+        :return: Helmert 对象，residuals 为各控制点的残差（目标坐标 - 转换结果）
+        """
+        source = np.asarray(source, dtype=np.float64)
+        target = np.asarray(target, dtype=np.float64)
+        if source.shape != target.shape or source.ndim != 2 or source.shape[1] != 3:
+            raise ValueError('source、target 须为形状相同的 (点数, 3) 数组！')
+        if len(source) < 3:
+            raise ValueError('求七参数至少需要 3 个公共点！')
+        n = len(source)
+        x, y, z = source.T
+        zero = np.zeros(n)
+        one = np.ones(n)
+        # 每个点 3 行，依次为 tx ty tz rx ry rz s 的系数；坐标以千公里为单位，改善法方程的条件数
+        scale = 1e6
+        xs, ys, zs = x / scale, y / scale, z / scale
+        design = np.empty((3 * n, 7))
+        design[0::3] = np.column_stack([one, zero, zero, zero, zs, -ys, xs])
+        design[1::3] = np.column_stack([zero, one, zero, -zs, zero, xs, ys])
+        design[2::3] = np.column_stack([zero, zero, one, ys, -xs, zero, zs])
+        solution = np.linalg.lstsq(design, (target - source).ravel(), rcond=None)[0]
+        tx, ty, tz = solution[:3]
+        rx, ry, rz = solution[3:6] / scale / ARCSEC
+        s = solution[6] / scale * 1e6
+        helmert = cls(tx, ty, tz, rx, ry, rz, s)
+        helmert.residuals = target - np.column_stack(helmert.apply(x, y, z))
+        return helmert
+
+    @classmethod
+    def fit_geodetic(cls, source, target, source_ellipsoid, target_ellipsoid):
+        """
+        由公共控制点的大地坐标拟合七参数
+        投影坐标的控制点可先用 GaussKruger.inverse 反算为大地坐标
+        :param source: array_like 原坐标系的 (经度, 纬度, 大地高)，形状为 (点数, 3)，没有大地高时为 (点数, 2)
+        :param target: array_like 目标坐标系的 (经度, 纬度, 大地高)
+        :param source_ellipsoid: Ellipsoid 对象或名称，如 'krasovsky'、'xian80'
+        :param target_ellipsoid: Ellipsoid 对象或名称，如 'cgcs2000'
+        :return: Helmert 对象
+        """
+        source = np.asarray(source, dtype=np.float64)
+        target = np.asarray(target, dtype=np.float64)
+        source_h = source[:, 2] if source.shape[1] > 2 else 0.0
+        target_h = target[:, 2] if target.shape[1] > 2 else 0.0
+        return cls.fit(
+            np.column_stack(geocentric(source[:, 0], source[:, 1], source_h, source_ellipsoid)),
+            np.column_stack(geocentric(target[:, 0], target[:, 1], target_h, target_ellipsoid)),
+        )
+
+    def apply(self, x, y, z):
+        """
+        转换空间直角坐标
+        :return: [X 数组, Y 数组, Z 数组]
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        z = np.asarray(z, dtype=np.float64)
+        rx, ry, rz = self.rx * ARCSEC, self.ry * ARCSEC, self.rz * ARCSEC
+        m = 1 + self.s * 1e-6
+        return [
+            self.tx + m * (x - rz * y + ry * z),
+            self.ty + m * (rz * x + y - rx * z),
+            self.tz + m * (-ry * x + rx * y + z),
+        ]
+
+    def apply_geodetic(self, lng, lat, h, source_ellipsoid, target_ellipsoid):
+        """
+        转换大地坐标
+        :return: [经度数组, 纬度数组, 大地高数组]
+        """
+        return geodetic(*self.apply(*geocentric(lng, lat, h, source_ellipsoid)), target_ellipsoid)
+
+    def inverse(self):
+        """反向转换的参数（参数取反，一阶近似，与 PROJ helmert 的 +inv 一致）"""
+        return Helmert(*(-value for value in self.params))
+
+    # ---------- PROJ pipeline ----------
+
+    def proj_step(self):
+        """PROJ helmert 变换步骤"""
+        return '+proj=helmert +x={!r} +y={!r} +z={!r} +rx={!r} +ry={!r} +rz={!r} +s={!r} +convention=position_vector'.format(
+            *self.params)
+
+    @staticmethod
+    def _crs_step(crs, inverse=False):
+        """坐标系与弧度经纬度之间的 PROJ 步骤"""
+        if crs.is_geographic:
+            units = ('deg', 'rad') if inverse else ('rad', 'deg')
+            return '+step +proj=unitconvert +xy_in={} +xy_out={}'.format(*units)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            definition = crs.to_proj4()
+        params = [param for param in definition.split()
+                  if param.split('=')[0] not in ('+no_defs', '+type', '+ellps', '+datum', '+towgs84', '+nadgrids')]
+        return '+step {}{} +a={!r} +rf={!r}'.format(
+            '+inv ' if inverse else '', ' '.join(params), crs.ellipsoid.semi_major_metre, crs.ellipsoid.inverse_flattening)
+
+    @staticmethod
+    def _cart_step(crs, inverse=False):
+        return '+step {}+proj=cart +a={!r} +rf={!r}'.format(
+            '+inv ' if inverse else '', crs.ellipsoid.semi_major_metre, crs.ellipsoid.inverse_flattening)
+
+    def pipeline(self, source_crs, target_crs):
+        """
+        原坐标系到目标坐标系的 PROJ pipeline：原坐标 -> 大地坐标 -> 空间直角坐标 -> 七参数 -> 空间直角坐标 -> 大地坐标 -> 目标坐标
+        输入、输出坐标均为 经度（X）在前的顺序，与 always_xy=True 一致
+        :param source_crs: pyproj.CRS 原坐标系（经纬度或投影坐标）
+        :param target_crs: pyproj.CRS 目标坐标系
+        :return: str 可用于 Transformer.from_pipeline
+        """
+        return ' '.join([
+            '+proj=pipeline',
+            self._crs_step(source_crs, inverse=True),
+            self._cart_step(source_crs),
+            '+step ' + self.proj_step(),
+            self._cart_step(target_crs, inverse=True),
+            self._crs_step(target_crs),
+        ])
+
+    # ---------- 保存 ----------
+
+    def to_dict(self):
+        data = dict(zip(self.names, self.params))
+        if self.residuals is not None:
+            data['rms'] = self.rms
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data[name] for name in cls.names})
+
+    def save(self, path):
+        """保存参数为 JSON 文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """从 JSON 文件加载参数"""
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+if __name__ == '__main__':
+    import time
+
+    from pyproj import Transformer
+
+    from .projection import Epsg, TransProj
+
+    # 模拟一组西安80 -> CGCS2000 的公共控制点（加 2 厘米噪声），拟合七参数
+    rng = np.random.default_rng(0)
+    truth = Helmert(-15.2, 112.6, 48.1, 1.2, -0.8, 2.5, 3.1)
+    lngs, lats, hs = rng.uniform(113, 115, 12), rng.uniform(29, 31, 12), rng.uniform(0, 500, 12)
+    target = np.column_stack(truth.apply_geodetic(lngs, lats, hs, 'xian80', 'cgcs2000'))
+    target[:, 2] += rng.normal(0, 0.02, 12)
+    helmert = Helmert.fit_geodetic(np.column_stack([lngs, lats, hs]), target, 'xian80', 'cgcs2000')
+    print(helmert)
+    print('控制点残差中误差：%.4f 米' % helmert.rms)
+
+    # 数组转换与 PROJ pipeline 一致
+    n = 1000000
+    lngs, lats, hs = rng.uniform(113, 115, n), rng.uniform(29, 31, n), np.zeros(n)
+    start_time = time.time()
+    result = helmert.apply_geodetic(lngs, lats, hs, 'xian80', 'cgcs2000')
+    print('数组转换点数：%d，耗时：%.3fS' % (n, time.time() - start_time))
+    pipeline = Transformer.from_pipeline(helmert.pipeline(Epsg.xian80(), Epsg.cgcs2000()))
+    plngs, plats, _ = pipeline.transform(lngs[:1000], lats[:1000], hs[:1000])
+    print('与 PROJ pipeline 最大差值：%.3e 度' % max(np.abs(plngs - result[0][:1000]).max(), np.abs(plats - result[1][:1000]).max()))
+
+    # 作为 TransProj 的一步：西安80 3 度带投影坐标 -> CGCS2000 3 度带投影坐标
+    gk80, _ = GaussKruger.from_proj(Epsg.xian80_gauss_3)
+    gk2000, _ = GaussKruger.from_proj(Epsg.cgcs2000_gauss_3)
+    xs, ys = gk80.forward(lngs, lats, 3, with_zone=True)
+    trans = TransProj(exist_proj=Epsg.xian80_gauss_3, exist_with_zone=True, target_proj=Epsg.cgcs2000_gauss_3,
+                      target_with_zone=True, datum_shift=helmert)
+    start_time = time.time()
+    new_xs, new_ys = trans.transform_many(xs, ys)
+    print('TransProj 七参数转换点数：%d，耗时：%.3fS' % (n, time.time() - start_time))
+    expect_xs, expect_ys = gk2000.forward(result[0], result[1], 3, with_zone=True)
+    print('与数组转换最大差值：%.4f 米（未考虑大地高变化）' % max(np.abs(new_xs - expect_xs).max(), np.abs(new_ys - expect_ys).max()))
@@ -0,0 +1,351 @@
+# -*- encoding: utf-8 -*-
+"""
+运行指标（计数器、直方图）统计，默认关闭。
+只使用 Python 标准库。关闭时各埋点处只做一次 metrics.enabled 判断，几乎没有额外开销；
+开启后每个事件加锁累加到内存中，并依次交给注册的输出（sink）：回调函数、logging 日志、Prometheus 文本文件。
+设置环境变量 GEOTRANSFORM_METRICS=1 时，模块级对象 metrics 在导入时即开启。
+
+包内埋点的指标：
+    geotransform_transformer_cache_hits_total       计数器，transformer 缓存命中次数
+    geotransform_transformer_cache_misses_total     计数器，transformer 缓存未命中（创建）次数，标签 source：crs、pipeline
+    geotransform_transformer_cache_evictions_total  计数器，transformer 淘汰次数
+    geotransform_transformer_cache_clones_total     计数器，其他线程复制 transformer 的次数
+    geotransform_transformer_build_seconds          直方图，创建 transformer 的耗时（秒），标签 source
+    geotransform_points_total                       计数器，转换成功的点数，标签 conversion：转换类型，如 wgs84_to_gcj02
+                                                    （CoordTransArray、TransProj、ParallelTransformer，CoordTrans 逐点转换不统计）
+    geotransform_batch_size                         直方图，每次转换调用的点数，标签 conversion
+    geotransform_amap_requests_total                计数器，高德 web api 请求次数，标签 api、status（HTTP 状态码或 error）
+    geotransform_amap_request_seconds               直方图，高德 web api 请求耗时（秒），标签 api
+    geotransform_geocode_cache_hits_total           计数器，地理编码缓存（geocode_cache 模块）命中的地址（坐标）个数
+    geotransform_geocode_cache_misses_total         计数器，地理编码缓存未命中的地址（坐标）个数
+示例：
+    from geotransform.metrics import metrics, LoggingSink, PrometheusTextSink
+    metrics.enable(LoggingSink(), PrometheusTextSink('/var/lib/node_exporter/geotransform.prom'))
+    ...
+    print(metrics.prometheus())
+"""
+import os
+import time
+import logging
+import threading
+from bisect import bisect_left
+from functools import wraps
+from contextlib import contextmanager
+
+
+class Metrics(object):
+    """
+    指标注册表。
+    指标以 (名称, 标签) 为键，标签为关键字参数，值转换为字符串。
+    sink 为可调用对象，参数为 (kind, name, value, labels)，kind 为 'counter' 或 'histogram'，labels 为字典。
+    """
+    # 耗时直方图默认的桶上限（秒）
+    default_buckets = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    # 点数直方图的桶上限
+    size_buckets = (1, 10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.sinks = []
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._buckets = {
+            'geotransform_batch_size': self.size_buckets,
+        }
+        self._help = {}
+
+    def enable(self, *sinks):
+        """
+        开启统计
+        :param sinks: 输出，见类说明
+        :return: self
+        """
+        for sink in sinks:
+            self.add_sink(sink)
+        self.enabled = True
+        return self
+
+    def disable(self):
+        """关闭统计，已统计的数据保留"""
+        self.enabled = False
+
+    def add_sink(self, sink):
+        if not callable(sink):
+            raise TypeError('sink 必须是可调用对象！')
+        with self._lock:
+            self.sinks = self.sinks + [sink]
+
+    def remove_sink(self, sink):
+        with self._lock:
+            self.sinks = [s for s in self.sinks if s is not sink]
+
+    def describe(self, name, help_text=None, buckets=None):
+        """
+        设置指标的说明和直方图的桶上限（需在第一次统计该指标之前设置）
+        :param name: str 指标名称
+        :param help_text: str 说明，输出到 Prometheus 文本的 HELP 行
+        :param buckets: tuple 直方图的桶上限，升序
+        """
+        if help_text:
+            self._help[name] = help_text
+        if buckets:
+            self._buckets[name] = tuple(sorted(buckets))
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        """计数器加 value"""
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        for sink in self.sinks:
+            sink('counter', name, value, labels)
+
+    def observe(self, name, value, **labels):
+        """直方图记录一个值"""
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                buckets = self._buckets.get(name, self.default_buckets)
+                histogram = self._histograms[key] = [buckets, [0] * (len(buckets) + 1), 0.0, 0]
+            buckets, counts = histogram[0], histogram[1]
+            counts[bisect_left(buckets, value)] += 1
+            histogram[2] += value
+            histogram[3] += 1
+        for sink in self.sinks:
+            sink('histogram', name, value, labels)
+
+    def timer(self, name, **labels):
+        """
+        计时上下文管理器，退出时将耗时（秒）记入直方图 name
+            with metrics.timer('my_seconds', step='load'):
+                ...
+        """
+        return _Timer(self, name, labels)
+
+    def record_points(self, conversion, points):
+        """记录一次转换调用：转换类型为 conversion，点数为 points"""
+        self.inc('geotransform_points_total', points, conversion=conversion)
+        self.observe('geotransform_batch_size', points, conversion=conversion)
+
+    def counter(self, name, **labels):
+        """计数器的当前值，未统计时为 0"""
+        return self._counters.get(self._key(name, labels), 0)
+
+    def histogram(self, name, **labels):
+        """
+        直方图的当前值
+        :return: dict buckets 各桶上限及累计个数 [(上限, 个数), ...]，sum 总和，count 个数，未统计时为 None
+        """
+        with self._lock:
+            histogram = self._histograms.get(self._key(name, labels))
+            if histogram is None:
+                return None
+            return self._histogram_dict(histogram)
+
+    @staticmethod
+    def _histogram_dict(histogram):
+        buckets, counts, total, count = histogram
+        cumulative = []
+        running = 0
+        for bound, bucket_count in zip(buckets + (float('inf'),), counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return {'buckets': cumulative, 'sum': total, 'count': count}
+
+    def snapshot(self):
+        """
+        全部指标的当前值
+        :return: dict {'counters': {(名称, 标签): 值}, 'histograms': {(名称, 标签): 直方图字典}}，标签为 ((键, 值), ...)
+        """
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'histograms': {key: self._histogram_dict(value) for key, value in self._histograms.items()},
+            }
+
+    def reset(self):
+        """清空已统计的数据"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    @staticmethod
+    def _labels_text(labels, extra=()):
+        items = list(labels) + list(extra)
+        if not items:
+            return ''
+        return '{' + ','.join('{}="{}"'.format(
+            k, v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in items) + '}'
+
+    @staticmethod
+    def _number(value):
+        if value == float('inf'):
+            return '+Inf'
+        return repr(float(value)) if isinstance(value, float) else str(value)
+
+    def prometheus(self):
+        """
+        Prometheus 文本格式（text/plain; version=0.0.4）的全部指标
+        :return: str
+        """
+        snapshot = self.snapshot()
+        families = {}
+        for (name, labels), value in snapshot['counters'].items():
+            families.setdefault((name, 'counter'), []).append((labels, value))
+        for (name, labels), value in snapshot['histograms'].items():
+            families.setdefault((name, 'histogram'), []).append((labels, value))
+
+        lines = []
+        for (name, kind), samples in sorted(families.items()):
+            if name in self._help:
+                lines.append('# HELP {} {}'.format(name, self._help[name]))
+            lines.append('# TYPE {} {}'.format(name, kind))
+            for labels, value in sorted(samples):
+                if kind == 'counter':
+                    lines.append('{}{} {}'.format(name, self._labels_text(labels), self._number(value)))
+                    continue
+                for bound, count in value['buckets']:
+                    lines.append('{}_bucket{} {}'.format(
+                        name, self._labels_text(labels, [('le', self._number(bound))]), count))
+                lines.append('{}_sum{} {}'.format(name, self._labels_text(labels), self._number(value['sum'])))
+                lines.append('{}_count{} {}'.format(name, self._labels_text(labels), value['count']))
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def dump(self, path):
+        """
+        将 Prometheus 文本写入文件（先写临时文件再替换，适用于 node_exporter 的 textfile collector）
+        :param path: str 文件路径
+        """
+        temp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus())
+        os.replace(temp_path, path)
+
+
+class _Timer(object):
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+_nesting = threading.local()
+
+
+def counted(size=None):
+    """
+    批量坐标转换类方法（如 CoordTransArray 的方法）的装饰器：开启统计时记录转换类型（方法名）和点数（geotransform_points_total 等），
+    转换抛出异常时不记录。组合转换（如 bd09_to_wgs84 内部调用 bd09_to_gcj02、gcj02_to_wgs84）只记录最外层的一次。
+    关闭统计时多一次函数调用和 metrics.enabled 判断，只适合整批调用一次的方法，不要用于逐点转换。
+    :param size: function 由第一个坐标参数（经度）计算点数，默认每次调用记为 1 个点
+    """
+    def decorator(func):
+        conversion = func.__name__
+
+        @wraps(func)
+        def wrapper(cls, *args, **kwargs):
+            if not metrics.enabled or getattr(_nesting, 'active', False):
+                return func(cls, *args, **kwargs)
+            _nesting.active = True
+            try:
+                result = func(cls, *args, **kwargs)
+            finally:
+                _nesting.active = False
+            if size is None:
+                points = 1
+            else:
+                points = size(args[0] if args else next(iter(kwargs.values())))
+            metrics.record_points(conversion, points)
+            return result
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def uncounted():
+    """当前线程中暂不记录 counted 装饰的方法的点数，如试算输出列数时"""
+    active = getattr(_nesting, 'active', False)
+    _nesting.active = True
+    try:
+        yield
+    finally:
+        _nesting.active = active
+
+
+class LoggingSink(object):
+    """将每个事件写入日志"""
+
+    def __init__(self, logger=None, level=logging.DEBUG):
+        """
+        :param logger: logging.Logger 日志对象，默认为 geotransform.metrics
+        :param level: int 日志级别
+        """
+        self.logger = logger or logging.getLogger('geotransform.metrics')
+        self.level = level
+
+    def __call__(self, kind, name, value, labels):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, '%s %s %s %r', kind, name, value, labels)
+
+
+class PrometheusTextSink(object):
+    """定期将全部指标以 Prometheus 文本格式写入文件，两次写入的间隔不小于 interval 秒"""
+
+    def __init__(self, path, interval=10.0, registry=None):
+        """
+        :param path: str 文件路径
+        :param interval: float 最小写入间隔（秒）
+        :param registry: obj Metrics 指标注册表，默认为模块级对象 metrics
+        """
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, kind, name, value, labels):
+        now = time.monotonic()
+        if now - self._last < self.interval or not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._last = now
+            self.flush()
+        finally:
+            self._lock.release()
+
+    def flush(self):
+        """立即写入文件"""
+        (self.registry or metrics).dump(self.path)
+
+
+# 进程内共享的指标注册表，设置环境变量 GEOTRANSFORM_METRICS=1 时默认开启
+metrics = Metrics(enabled=os.environ.get('GEOTRANSFORM_METRICS', '') not in ('', '0'))
+
+metrics.describe('geotransform_transformer_cache_hits_total', 'transformer 缓存命中次数')
+metrics.describe('geotransform_transformer_cache_misses_total', 'transformer 缓存未命中（创建）次数')
+metrics.describe('geotransform_transformer_cache_evictions_total', 'transformer 淘汰次数')
+metrics.describe('geotransform_transformer_cache_clones_total', '其他线程复制 transformer 的次数')
+metrics.describe('geotransform_transformer_build_seconds', '创建 transformer 的耗时（秒）')
+metrics.describe('geotransform_points_total', '转换的点数')
+metrics.describe('geotransform_batch_size', '每次转换调用的点数')
+metrics.describe('geotransform_amap_requests_total', '高德 web api 请求次数')
+metrics.describe('geotransform_amap_request_seconds', '高德 web api 请求耗时（秒）')
+metrics.describe('geotransform_geocode_cache_hits_total', '地理编码缓存命中的地址（坐标）个数')
+metrics.describe('geotransform_geocode_cache_misses_total', '地理编码缓存未命中的地址（坐标）个数')
@@ -0,0 +1,218 @@
+# -*- encoding: utf-8 -*-
+"""
+wgs84 到 gcj02 偏移量的预计算格网（双线性插值快速计算）。
+需要安装 numpy 包。
+偏移量在国内范围内是光滑的，预先在 out_of_china 的外包矩形内按固定分辨率计算格网节点上的偏移量，
+转换时用双线性插值代替 _transformlat、_transformlng 中的十二次三角函数计算。
+格网可以保存为磁盘文件，并以内存映射（mmap）方式加载，多个进程共享同一份文件时不会重复占用内存。
+插值误差与分辨率的平方成正比：分辨率 0.02 度时最大误差约为 0.4 米，0.01 度时约为 0.1 米，0.005 度时约为 3 厘米，
+生成格网时会在每个格网单元的中心和各边中点与解析公式比较，给出最大插值误差（max_error），使用前请确认满足精度要求。
+"""
+import os
+import json
+import math
+
+import numpy as np
+
+from .coordinate_array import CoordTransArray
+
+
+class OffsetGrid(object):
+    """
+    偏移量格网
+    格网文件格式：
+        8 字节魔数 b'GTOGRID1' + 4 字节小端无符号整数（头部 JSON 长度）+ 头部 JSON（空格补齐至 16 字节对齐）
+        + float64 小端数据，形状为 (2, 纬向节点数, 经向节点数)，依次为经度偏移量、纬度偏移量，单位：度
+    """
+    magic = b'GTOGRID1'
+    # 与 CoordTrans.out_of_china 的范围一致
+    lng_min = 73.66
+    lng_max = 135.05
+    lat_min = 3.86
+    lat_max = 53.55
+    meter_per_degree = 111319.49  # 赤道上 1 度对应的长度，用于换算误差
+
+    def __init__(self, data, resolution, lng_min=None, lat_min=None, max_error=None, path=None):
+        """
+        :param data: ndarray 格网数据，形状为 (2, 纬向节点数, 经向节点数)
+        :param resolution: float 格网分辨率，单位：度
+        :param lng_min: float 格网起始经度，默认为 out_of_china 范围的最小经度
+        :param lat_min: float 格网起始纬度，默认为 out_of_china 范围的最小纬度
+        :param max_error: float 格网相对解析公式的最大插值误差，单位：度
+        :param path: str 格网文件路径，由 load 设置
+        """
+        self.data = data
+        self.resolution = float(resolution)
+        self.lng_min = self.lng_min if lng_min is None else float(lng_min)
+        self.lat_min = self.lat_min if lat_min is None else float(lat_min)
+        self.max_error = max_error
+        self.path = None if path is None else os.path.abspath(path)
+
+    @property
+    def shape(self):
+        """(纬向节点数, 经向节点数)"""
+        return self.data.shape[1:]
+
+    @property
+    def max_error_m(self):
+        """最大插值误差的近似米数"""
+        if self.max_error is None:
+            return None
+        return self.max_error * self.meter_per_degree
+
+    @property
+    def identity(self):
+        """
+        格网的稳定标识，用作缓存键：从文件加载的格网为文件的绝对路径，
+        否则为分辨率、起始经纬度和形状（相同参数 build 出的格网数据相同）
+        """
+        if self.path is not None:
+            return ('path', self.path)
+        return ('grid', self.resolution, self.lng_min, self.lat_min, tuple(self.shape))
+
+    @classmethod
+    def _nodes(cls, resolution):
+        n_lng = int(math.ceil((cls.lng_max - cls.lng_min) / resolution)) + 1
+        n_lat = int(math.ceil((cls.lat_max - cls.lat_min) / resolution)) + 1
+        return n_lng, n_lat
+
+    @classmethod
+    def build(cls, resolution=0.02, tolerance=None, rows_per_chunk=256):
+        """
+        生成格网，并与解析公式比较，计算最大插值误差
+        :param resolution: float 格网分辨率，单位：度
+        :param tolerance: float 允许的最大插值误差，单位：度。指定此值时，误差超限将抛出 ValueError
+        :param rows_per_chunk: int 每次计算的纬向行数，用于控制生成格网时的内存占用
+        :return: OffsetGrid 对象
+        """
+        n_lng, n_lat = cls._nodes(resolution)
+        data = np.empty((2, n_lat, n_lng), dtype=np.float64)
+        lngs = cls.lng_min + np.arange(n_lng) * resolution
+        for start in range(0, n_lat, rows_per_chunk):
+            stop = min(start + rows_per_chunk, n_lat)
+            lats = cls.lat_min + np.arange(start, stop) * resolution
+            lng, lat = np.meshgrid(lngs, lats)
+            data[0, start:stop], data[1, start:stop] = CoordTransArray._offset(lng, lat)
+        grid = cls(data, resolution)
+        grid.max_error = grid.check(rows_per_chunk=rows_per_chunk)
+        if tolerance is not None and grid.max_error > tolerance:
+            raise ValueError('格网最大插值误差 %.3e 度超过允许值 %.3e 度，请减小分辨率！' % (grid.max_error, tolerance))
+        return grid
+
+    def check(self, rows_per_chunk=256, subdivisions=2):
+        """
+        把每个格网单元按经纬向各 subdivisions 等分，在全部等分点上与解析公式比较。
+        subdivisions 为 2 时比较单元中心和各边中点：偏移量的曲率随位置变化，插值误差最大处不一定在单元中心，
+        只比较中心会低估最大误差
+        :param rows_per_chunk: int 每次计算的纬向行数（等分后的行数）
+        :param subdivisions: int 每个格网单元的等分数，越大误差估计越准确，耗时约与其平方成正比
+        :return: float 最大插值误差，单位：度
+        """
+        if subdivisions < 2:
+            raise ValueError('subdivisions 至少为 2，否则只比较格网节点！')
+        n_lat, n_lng = self.shape
+        step = self.resolution / subdivisions
+        lngs = self.lng_min + np.arange((n_lng - 1) * subdivisions + 1) * step
+        n_rows = (n_lat - 1) * subdivisions + 1
+        max_error = 0.0
+        for start in range(0, n_rows, rows_per_chunk):
+            stop = min(start + rows_per_chunk, n_rows)
+            lats = self.lat_min + np.arange(start, stop) * step
+            lng, lat = np.meshgrid(lngs, lats)
+            dlng, dlat = CoordTransArray._offset(lng, lat)
+            glng, glat = self.interpolate(lng, lat)
+            max_error = max(max_error, float(np.abs(glng - dlng).max()), float(np.abs(glat - dlat).max()))
+        return max_error
+
+    def interpolate(self, lng, lat):
+        """
+        双线性插值计算偏移量，格网范围外的点按边缘单元线性外推
+        :param lng: ndarray WGS84坐标系的经度
+        :param lat: ndarray WGS84坐标系的纬度
+        :return: (经度偏移数组, 纬度偏移数组)，单位：度
+        """
+        n_lat, n_lng = self.shape
+        fx = (np.asarray(lng, dtype=np.float64) - self.lng_min) / self.resolution
+        fy = (np.asarray(lat, dtype=np.float64) - self.lat_min) / self.resolution
+        i = np.clip(np.floor(fx), 0, n_lng - 2).astype(np.intp)
+        j = np.clip(np.floor(fy), 0, n_lat - 2).astype(np.intp)
+        tx = fx - i
+        ty = fy - j
+        k = j * n_lng + i  # 左下角节点在展平数据中的下标
+        result = []
+        for values in self.data.reshape(2, -1):
+            v00 = values[k]
+            v01 = values[k + 1]
+            v10 = values[k + n_lng]
+            v11 = values[k + n_lng + 1]
+            result.append((v00 + (v01 - v00) * tx) * (1 - ty) + (v10 + (v11 - v10) * tx) * ty)
+        return result[0], result[1]
+
+    def save(self, path):
+        """
+        保存格网文件
+        :param path: str 文件路径
+        """
+        header = json.dumps({
+            'resolution': self.resolution,
+            'lng_min': self.lng_min,
+            'lat_min': self.lat_min,
+            'shape': list(self.data.shape),
+            'max_error': self.max_error,
+        }).encode('utf-8')
+        header += b' ' * (-(len(self.magic) + 4 + len(header)) % 16)
+        with open(path, 'wb') as f:
+            f.write(self.magic)
+            f.write(len(header).to_bytes(4, 'little'))
+            f.write(header)
+            f.write(np.ascontiguousarray(self.data, dtype='<f8').tobytes())
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        加载格网文件
+        :param path: str 文件路径
+        :param mmap: bool 是否以只读内存映射方式加载，默认为 True
+        :return: OffsetGrid 对象
+        """
+        with open(path, 'rb') as f:
+            if f.read(len(cls.magic)) != cls.magic:
+                raise ValueError('%s 不是偏移量格网文件！' % path)
+            length = int.from_bytes(f.read(4), 'little')
+            header = json.loads(f.read(length).decode('utf-8'))
+        offset = len(cls.magic) + 4 + length
+        shape = tuple(header['shape'])
+        if mmap:
+            data = np.memmap(path, dtype='<f8', mode='r', offset=offset, shape=shape)
+        else:
+            data = np.fromfile(path, dtype='<f8', offset=offset).reshape(shape)
+        return cls(data, header['resolution'], header['lng_min'], header['lat_min'], header['max_error'], path)
+
+    @classmethod
+    def cached(cls, path, resolution=0.02, tolerance=None):
+        """
+        从缓存文件加载格网，文件不存在或分辨率不一致时生成格网并保存
+        :param path: str 缓存文件路径
+        :param resolution: float 格网分辨率，单位：度
+        :param tolerance: float 允许的最大插值误差，单位：度
+        :return: OffsetGrid 对象
+        """
+        if os.path.exists(path):
+            grid = cls.load(path)
+            if grid.resolution == resolution:
+                if tolerance is not None and grid.max_error > tolerance:
+                    raise ValueError('格网最大插值误差 %.3e 度超过允许值 %.3e 度，请减小分辨率！' % (grid.max_error, tolerance))
+                return grid
+        grid = cls.build(resolution, tolerance)
+        grid.save(path)
+        return cls.load(path)
+
+
+if __name__ == '__main__':
+    import time
+
+    for res in (0.05, 0.02, 0.01):
+        start_time = time.time()
+        g = OffsetGrid.build(res)
+        print('分辨率：%s 度，节点数：%s，生成耗时：%.3fS，最大插值误差：%.3e 度（约 %.3f 米）' % (
+            res, g.shape, time.time() - start_time, g.max_error, g.max_error_m))
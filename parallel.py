@@ -0,0 +1,252 @@
+# -*- encoding: utf-8 -*-
+"""
+大批量坐标的多进程并行转换。
+需要安装 numpy 包。
+输入数组复制到共享内存（multiprocessing.shared_memory）中，按块分配给进程池，各工作进程直接在共享内存中读取输入、写入结果，
+进程之间只传递共享内存名称和块的起止位置，不序列化坐标数据；结果按块的位置写回，顺序与输入一致。
+工作进程启动时只初始化一次转换对象（加载 PROJ pipeline 缓存并预热 transformer），之后的各块重复使用。
+默认只预热第一次转换的第一块坐标涉及的 transformer，其他分度带的 transformer 在用到时创建。
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .coordinate_array import CoordTransArray
+from .metrics import metrics, uncounted
+from .offset_grid import OffsetGrid
+from .projection import TransProj, transformer_cache
+
+# 工作进程内的转换函数及已打开的共享内存，由 _init_worker 设置
+_worker = {'func': None, 'blocks': {}}
+
+
+def _build_func(job, warm_keys=None):
+    """
+    根据任务描述创建转换函数
+    :param job: tuple ('trans_proj', TransProj 参数字典, 预热经度) 或 ('coord_trans', CoordTransArray 方法名, 关键字参数字典)
+    :param warm_keys: list 预热的组合（TransProj.zone_keys 的返回值），任务中没有指定预热经度时使用，都没有时不预热
+    :return: function 输入各列数组，返回结果各列数组
+    """
+    if job[0] == 'trans_proj':
+        _, kwargs, warm_lngs = job
+        trans_proj = TransProj(**kwargs)
+        if trans_proj.exist_proj is not None:
+            if warm_lngs is not None:
+                trans_proj.warm_up(warm_lngs)
+            elif warm_keys is not None:
+                trans_proj.warm_up(keys=warm_keys)
+        return trans_proj.transform_many
+    _, method, kwargs = job
+    kwargs = dict(kwargs)
+    # 格网以文件路径传入，在工作进程中以内存映射方式加载，多个进程共享同一份文件
+    if isinstance(kwargs.get('grid'), str):
+        kwargs['grid'] = OffsetGrid.load(kwargs['grid'])
+    return CoordTransArray.column_func(method, **kwargs)
+
+
+def _init_worker(job, pipeline_path, warm_keys=None):
+    # 点数由主进程按整次转换统计，fork 出的工作进程不再重复记录
+    metrics.disable()
+    if pipeline_path:
+        transformer_cache.load_pipelines(pipeline_path)
+    _worker['func'] = _build_func(job, warm_keys)
+    _worker['blocks'] = {}
+
+
+def _attach(names):
+    """在工作进程中打开本次转换的输入、输出共享内存（同一块共享内存只打开一次），关闭以前转换的共享内存"""
+    blocks = _worker['blocks']
+    for name in [name for name in blocks if name not in names]:
+        blocks.pop(name).close()
+    for name in names:
+        if name not in blocks:
+            blocks[name] = shared_memory.SharedMemory(name=name)
+    return [blocks[name] for name in names]
+
+
+def _run_chunk(in_name, in_shape, out_name, out_shape, start, stop):
+    """转换一个块：从输入共享内存读取 [start, stop) 的坐标，结果写入输出共享内存的相同位置"""
+    src_block, dst_block = _attach((in_name, out_name))
+    src = np.ndarray(in_shape, dtype=np.float64, buffer=src_block.buf)
+    dst = np.ndarray(out_shape, dtype=np.float64, buffer=dst_block.buf)
+    result = _worker['func'](*src[:, start:stop])
+    dst[:, start:stop] = np.asarray(result, dtype=np.float64).reshape(out_shape[0], -1)
+    return start, stop
+
+
+class ParallelTransformer(object):
+    """
+    多进程并行转换。进程池在第一次转换时创建，之后的转换重复使用，使用完毕后调用 close（或使用 with 语句）关闭。
+    示例：
+        with ParallelTransformer.trans_proj(exist_proj=Epsg.wgs84, target_proj=Epsg.cgcs2000_gauss_3, target_with_zone=True) as pt:
+            xs, ys = pt.transform(lngs, lats)
+        with ParallelTransformer.coord_trans('wgs84_to_gcj02') as pt:
+            lngs, lats = pt.transform(lngs, lats)
+    """
+
+    def __init__(self, job, workers=None, chunk_size=500000, pipeline_path=None, mp_context=None):
+        """
+        :param job: tuple 任务描述，一般用类方法 trans_proj、coord_trans 创建，见 _build_func
+        :param workers: int 进程数，默认为 CPU 核数
+        :param chunk_size: int 每块的坐标点数
+        :param pipeline_path: str PROJ pipeline 缓存文件，工作进程启动时加载，从缓存文件创建 transformer，
+                              默认使用 transformer_cache 当前的 pipeline_path
+        :param mp_context: multiprocessing 上下文，如 multiprocessing.get_context('spawn')，默认为平台默认值
+        """
+        self.job = job
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = int(chunk_size)
+        self.pipeline_path = pipeline_path or transformer_cache.pipeline_path
+        self.mp_context = mp_context
+        self._executor = None
+        self._warm_keys = None
+
+    @classmethod
+    def trans_proj(cls, warm_lngs=None, workers=None, chunk_size=500000, pipeline_path=None, mp_context=None, **kwargs):
+        """
+        并行执行 TransProj.transform_many
+        :param warm_lngs: array_like 工作进程启动时预热的经度，见 TransProj.zone_keys，
+                          默认为第一次转换的第一块坐标涉及的分度带，不预热用不到的分度带
+        :param kwargs: TransProj 的参数（exist_proj、target_proj 等），不支持 transformer、cache 参数
+        其余参数见 __init__
+        """
+        if kwargs.get('transformer') is not None or kwargs.get('cache') is not None:
+            raise ValueError('并行转换不支持 transformer、cache 参数！')
+        return cls(('trans_proj', kwargs, warm_lngs), workers, chunk_size, pipeline_path, mp_context)
+
+    @classmethod
+    def from_trans_proj(cls, trans_proj, **kwargs):
+        """由已有的 TransProj 对象的参数创建，kwargs 见 trans_proj"""
+        return cls.trans_proj(
+            exist_proj=trans_proj.exist_proj, exist_lng0=trans_proj.exist_lng0,
+            exist_with_zone=trans_proj.exist_with_zone, target_proj=trans_proj.target_proj,
+            target_lng0=trans_proj.target_lng0, target_with_zone=trans_proj.target_with_zone,
+            datum_shift=trans_proj.datum_shift, **kwargs
+        )
+
+    @classmethod
+    def coord_trans(cls, method, workers=None, chunk_size=500000, mp_context=None, **kwargs):
+        """
+        并行执行 CoordTransArray 的转换方法
+        :param method: str CoordTransArray 方法名，如 'wgs84_to_gcj02'
+        :param kwargs: 方法的关键字参数，如 exact=True。grid 参数请传入格网文件路径，各工作进程以内存映射方式加载
+        其余参数见 __init__
+        """
+        CoordTransArray.column_func(method)  # 检查方法名
+        if isinstance(kwargs.get('grid'), OffsetGrid):
+            raise ValueError('grid 参数请传入格网文件路径（OffsetGrid.save 保存的文件）！')
+        return cls(('coord_trans', method, kwargs), workers, chunk_size, None, mp_context)
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=self.mp_context,
+                initializer=_init_worker, initargs=(self.job, self.pipeline_path, self._warm_keys),
+            )
+        return self._executor
+
+    def _prepare_warm_up(self, xs):
+        """进程池创建前，由第一块坐标计算工作进程预热的组合（只传递组合，不传递坐标）"""
+        if self._executor is None and self.job[0] == 'trans_proj' and self.job[2] is None:
+            trans_proj = TransProj(**self.job[1])
+            if trans_proj.exist_proj is not None:
+                self._warm_keys = trans_proj.zone_keys(xs=xs[:self.chunk_size])
+
+    def _output_rows(self, columns):
+        """结果的列数：TransProj 与输入相同；CoordTransArray 方法用第一个点试算"""
+        if self.job[0] == 'trans_proj':
+            return len(columns)
+        with uncounted():
+            return len(_build_func(self.job)(*(column[:1] for column in columns)))
+
+    def transform(self, *columns):
+        """
+        并行转换
+        :param columns: array_like 输入坐标的各列，如 (经度, 纬度) 或 (X, Y, Z)
+        :return: tuple 结果各列数组，顺序与输入一致
+        """
+        columns = np.broadcast_arrays(*(np.asarray(column, dtype=np.float64) for column in columns))
+        shape = columns[0].shape
+        n = columns[0].size
+        if n == 0:
+            return tuple(np.empty(shape) for _ in columns)
+        in_shape = (len(columns), n)
+        out_shape = (self._output_rows(columns), n)
+        self._prepare_warm_up(columns[0].ravel())
+        src_block = shared_memory.SharedMemory(create=True, size=8 * in_shape[0] * n)
+        dst_block = shared_memory.SharedMemory(create=True, size=8 * out_shape[0] * n)
+        try:
+            np.ndarray(in_shape, dtype=np.float64, buffer=src_block.buf)[:] = [column.ravel() for column in columns]
+            futures = [
+                self.executor.submit(_run_chunk, src_block.name, in_shape, dst_block.name, out_shape,
+                                     start, min(start + self.chunk_size, n))
+                for start in range(0, n, self.chunk_size)
+            ]
+            for future in futures:
+                future.result()
+            results = np.ndarray(out_shape, dtype=np.float64, buffer=dst_block.buf).copy()
+        finally:
+            src_block.close()
+            src_block.unlink()
+            dst_block.close()
+            dst_block.unlink()
+        if metrics.enabled:
+            metrics.record_points(self.conversion, n)
+        return tuple(row.reshape(shape) for row in results)
+
+    @property
+    def conversion(self):
+        """转换类型名称，用于运行指标（见 metrics 模块）：TransProj.conversion 或 CoordTransArray 的方法名"""
+        if self.job[0] == 'trans_proj':
+            return TransProj(**self.job[1]).conversion
+        return self.job[1]
+
+    def close(self):
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == '__main__':
+    import time
+
+    from .projection import Epsg
+
+    coords = np.loadtxt(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test.csv'), delimiter=',')
+    # 与 projection 模块 __main__ 相同的转换，复制为 200 万点，经度分布到多个分度带
+    repeat = 2000000 // len(coords) + 1
+    xs = (np.tile(coords[:, 0], repeat) + (np.repeat(np.arange(repeat) % 10, len(coords)) - 5) * 3)[:2000000]
+    ys = np.tile(coords[:, 1], repeat)[:2000000]
+    zs = np.tile(coords[:, 2], repeat)[:2000000]
+    kwargs = dict(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.xian80_gauss_3, target_with_zone=True)
+
+    trans = TransProj(**kwargs)
+    trans.warm_up(xs[::1000])
+    start_time = time.time()
+    expected = trans.transform_many(xs, ys, zs)
+    single = time.time() - start_time
+    print('单进程 transform_many，点数：%d，耗时：%.3fS' % (len(xs), single))
+
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        with ParallelTransformer.trans_proj(warm_lngs=xs[::1000], workers=workers, chunk_size=250000, **kwargs) as pt:
+            pt.transform(xs[:workers], ys[:workers], zs[:workers])  # 启动进程池
+            start_time = time.time()
+            result = pt.transform(xs, ys, zs)
+            elapsed = time.time() - start_time
+        assert all(np.array_equal(a, b) for a, b in zip(result, expected))
+        print('%d 进程，耗时：%.3fS，加速比：%.2f' % (workers, elapsed, single / elapsed))
+
+    with ParallelTransformer.coord_trans('wgs84_to_gcj02', chunk_size=250000) as pt:
+        start_time = time.time()
+        lngs, lats = pt.transform(xs, ys)
+        print('wgs84_to_gcj02 %d 进程，耗时：%.3fS' % (pt.workers, time.time() - start_time))
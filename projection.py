@@ -1,6 +1,7 @@
 # -*- encoding: utf-8 -*-
 """
 中国常用大地测量（投影）坐标系转换（标准转换，不涉及使用7参数平移、旋转、缩放）。
+需要七参数转换时，用 helmert 模块由控制点拟合参数，作为 TransProj 的 datum_shift 参数。
 主要有wgs84、西安80、北京54、新北京、cgcs2000等我国常用坐标系之间的相互转换。
 本模块是对 pyproj 中的相关方法进行了二次封装，以方便使用！采用epsg中记录的各个坐标系参数
 pyproj 官方文档：http://pyproj4.github.io/pyproj/stable/
@@ -21,9 +22,47 @@ note：pyproj 通过 crs 生成transformer 是非常耗时的操作，经测试
     因为每次批量转换的任务所涉及的范围一般不会跨几个分度带，因此不会生成特别多的transformer，所以空间占用和
     整体的时间效率都能接受。
 """
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pyproj
 from pyproj import Transformer, CRS
+
+try:
+    from .metrics import metrics
+except ImportError:
+    # 直接运行本文件（python projection.py）时没有包的上下文
+    from metrics import metrics
     
     
+class EpsgCRS(CRS):
+    """
+    Epsg 类方法返回的 CRS 对象，同一 EPSG 代码的对象在进程内共享。
+    index、lng_0 为只读属性，由 EPSG 代码查 Epsg.epsg_zones 表得到，与创建顺序、调用方式无关
+    """
+
+    def _zone(self):
+        authority, _, code = self.srs.partition(':')
+        if authority.upper() != 'EPSG' or not code.isdigit():
+            return None, None
+        return Epsg.epsg_zones.get(int(code), (None, None))
+
+    @property
+    def index(self):
+        """分度带带号，不是分度带投影坐标系时为 None"""
+        return self._zone()[0]
+
+    @property
+    def lng_0(self):
+        """分度带中央经线，不是分度带投影坐标系时为 None"""
+        return self._zone()[1]
+
+
 class Epsg(object):
     """
     获取CRS（coordinate reference system）
@@ -33,15 +72,49 @@ class Epsg(object):
         lng：float 坐标经度或者坐标点所在分度带的中央经线值（用来确定坐标点所在分度带号，以返回正确的CRS）
         with_zone：指定坐标是否带有所在分度带的带号，默认为False（True：带有带号，False：不带）
     """
-    @staticmethod
-    def crs(epsg_code, index=None, lng_0=None):
-        crs = CRS.from_epsg(epsg_code)
-        crs.index = index
-        crs.lng_0 = lng_0
+    # 高斯投影坐标系的 EPSG 代码规则 {(坐标系, 分度带度数): (不带带号时 75 度中央经线的代码, 带带号时 75 度中央经线的代码)}
+    # 新北京 3 度带的代码不连续，见 _build_zone_epsg
+    gauss_codes = {
+        ('xian80', 3): (2370, 2349),
+        ('xian80', 6): (2338, 2327),
+        ('bj54', 3): (2422, 2401),
+        ('bj_new', 6): (4579, 4568),
+        ('cgcs2000', 3): (4534, 4513),
+        ('cgcs2000', 6): (4502, 4491),
+    }
+    # 分度带 EPSG 代码表 {(坐标系, 分度带度数, 带号, 是否带带号): epsg}，模块加载时生成
+    zone_epsg = {}
+    # 分度带 EPSG 代码对应的 (带号, 中央经线) {epsg: (带号, 中央经线)}
+    epsg_zones = {}
+    # 按带号查 EPSG 代码的数组 {(坐标系, 分度带度数, 是否带带号): ndarray}，没有对应代码的带号为 -1
+    zone_lookup = {}
+    # 获取 CRS 的类方法名（命令行参数、转换图节点等按名称取坐标系时只接受这些名称）
+    methods = (
+        'wgs84', 'wgs84_3d', 'xian80', 'bj_new', 'cgcs2000',
+        'xian80_gauss_3', 'xian80_gauss_6', 'bj54_gauss_3', 'bj_new_gauss_3', 'bj_new_gauss_6',
+        'cgcs2000_gauss_3', 'cgcs2000_gauss_6',
+    )
+    # 已创建的 CRS 对象 {epsg: EpsgCRS}
+    _crs_cache = {}
+
+    @classmethod
+    def crs(cls, epsg_code, index=None, lng_0=None):
+        """
+        获取 CRS 对象，同一 EPSG 代码只从 PROJ 数据库创建一次，之后返回同一个对象（各处共享，不要修改）
+        :param epsg_code: int EPSG 代码
+        :param index: 不再使用，仅为兼容保留。分度带带号由 EPSG 代码查表得到，见 EpsgCRS.index
+        :param lng_0: 不再使用，仅为兼容保留。分度带中央经线由 EPSG 代码查表得到，见 EpsgCRS.lng_0
+        :return: obj EpsgCRS 对象（pyproj.CRS 的子类）
+        """
+        crs = cls._crs_cache.get(epsg_code)
+        if crs is None:
+            crs = cls._crs_cache.setdefault(epsg_code, EpsgCRS.from_epsg(epsg_code))
         return crs
 
     @staticmethod
     def calc_number(lng, zone_degree):
+        if isinstance(lng, np.ndarray):
+            return (lng / zone_degree + zone_degree / 6).astype(np.int64)  # 批量计算带号
         return int(lng / zone_degree + zone_degree / 6)  # 带号
 
     @classmethod
@@ -50,16 +123,65 @@ class Epsg(object):
         return number, (number - 1) * zone_degree + 3  # （带号，中央经度）
 
     @classmethod
-    def __gauss_base(cls, lng, zone_degree, code, with_zone_code, with_zone=False):
-        number, lng_0 = cls.calc_number_lng0(lng, zone_degree)
-        i = number - int(75 / zone_degree + zone_degree / 6)
-        if lng_0 - zone_degree / 2 <= lng < lng_0 + zone_degree / 2:
-            if with_zone:
-                epsg = i + with_zone_code
+    def _build_zone_epsg(cls):
+        """
+        生成分度带 EPSG 代码表 zone_epsg、epsg_zones 和查表数组 zone_lookup，覆盖中央经线 75~135 度的全部分度带
+        """
+        table = {}
+        for (family, zone_degree), (code, with_zone_code) in cls.gauss_codes.items():
+            first = cls.calc_number(75, zone_degree)
+            for number in range(first, cls.calc_number(135, zone_degree) + 1):
+                table[(family, zone_degree, number, False)] = number - first + code
+                table[(family, zone_degree, number, True)] = number - first + with_zone_code
+        first = cls.calc_number(75, 3)
+        for number in range(first, cls.calc_number(135, 3) + 1):
+            i = number - first
+            lng_0 = number * 3
+            table[('bj_new', 3, number, True)] = i + 4652 if lng_0 <= 87 else i + 4761
+            if lng_0 <= 129:
+                table[('bj_new', 3, number, False)] = i + 4782
             else:
-                epsg = i + code
-            return cls.crs(epsg, number, lng_0)
-        raise ValueError('lng 取值范围为：73.5~136.5')
+                table[('bj_new', 3, number, False)] = 4812 if lng_0 == 132 else 4822
+
+        zones = {}
+        lookup = {}
+        for (family, zone_degree, number, with_zone), code in table.items():
+            zones[code] = (number, (number - 1) * zone_degree + 3)
+            array = lookup.get((family, zone_degree, with_zone))
+            if array is None:
+                array = lookup[(family, zone_degree, with_zone)] = np.full(
+                    cls.calc_number(180, zone_degree) + 1, -1, dtype=np.int64)
+            array[number] = code
+        for array in lookup.values():
+            array.flags.writeable = False
+        cls.zone_epsg, cls.epsg_zones, cls.zone_lookup = table, zones, lookup
+
+    @classmethod
+    def zone_epsg_codes(cls, family, zone_degree, lngs, with_zone=False):
+        """
+        批量查表获取一组经度所在分度带的 EPSG 代码
+        :param family: str 坐标系，xian80、bj54、bj_new、cgcs2000
+        :param zone_degree: int 分度带度数，3 或 6
+        :param lngs: array_like 经度
+        :param with_zone: bool 坐标是否带有分度带带号
+        :return: (EPSG 代码数组, 带号数组, 中央经线数组)
+        """
+        lookup = cls.zone_lookup.get((family, zone_degree, bool(with_zone)))
+        if lookup is None:
+            raise ValueError('没有 {} {} 度带的 EPSG 代码！'.format(family, zone_degree))
+        numbers, lng0s = cls.calc_number_lng0(np.asarray(lngs, dtype=np.float64), zone_degree)
+        codes = lookup[np.clip(numbers, 0, len(lookup) - 1)]
+        if ((numbers < 0) | (numbers >= len(lookup)) | (codes < 0)).any():
+            raise ValueError('lng 取值范围为：73.5~136.5')
+        return codes, numbers, lng0s
+
+    @classmethod
+    def __gauss_base(cls, lng, zone_degree, family, with_zone=False):
+        number = cls.calc_number(lng, zone_degree)
+        epsg = cls.zone_epsg.get((family, zone_degree, number, bool(with_zone)))
+        if epsg is None:
+            raise ValueError('lng 取值范围为：73.5~136.5')
+        return cls.crs(epsg)
 
     @classmethod
     def wgs84(cls, *args, **kwargs):
@@ -83,49 +205,258 @@ class Epsg(object):
 
     @classmethod
     def xian80_gauss_3(cls, lng, with_zone=False):
-        return cls.__gauss_base(lng, 3, 2370, 2349, with_zone)
+        return cls.__gauss_base(lng, 3, 'xian80', with_zone)
 
     @classmethod
     def xian80_gauss_6(cls, lng, with_zone=False):
-        return cls.__gauss_base(lng, 6, 2338, 2327, with_zone)
+        return cls.__gauss_base(lng, 6, 'xian80', with_zone)
 
     @classmethod
     def bj54_gauss_3(cls, lng, with_zone=False):
-        return cls.__gauss_base(lng, 3, 2422, 2401, with_zone)
+        return cls.__gauss_base(lng, 3, 'bj54', with_zone)
 
     @classmethod
     def bj_new_gauss_3(cls, lng, with_zone=False):
-        zone_degree = 3
-        number = int(lng / zone_degree + zone_degree / 6)  # 带号
-        lng_0 = (number - 1) * zone_degree + 3  # 中央经度
-        i = number - int(75 / zone_degree + zone_degree / 6)
-        if lng_0 - zone_degree / 2 <= lng < lng_0 + zone_degree / 2:
-            if with_zone:
-                if lng_0 <= 87:
-                    epsg = i + 4652
-                else:
-                    epsg = i + 4761
-            else:
-                if lng_0 <= 129:
-                    epsg = i + 4782
-                elif lng_0 == 132:
-                    epsg = 4812
-                else:
-                    epsg = 4822
-            return cls.crs(epsg, number, lng_0)
-        raise ValueError('lng 取值范围为：73.5~136.5')
+        return cls.__gauss_base(lng, 3, 'bj_new', with_zone)
 
     @classmethod
     def bj_new_gauss_6(cls, lng, with_zone=False):
-        return cls.__gauss_base(lng, 6, 4579, 4568, with_zone)
+        return cls.__gauss_base(lng, 6, 'bj_new', with_zone)
 
     @classmethod
     def cgcs2000_gauss_3(cls, lng, with_zone=False):
-        return cls.__gauss_base(lng, 3, 4534, 4513, with_zone)
+        return cls.__gauss_base(lng, 3, 'cgcs2000', with_zone)
 
     @classmethod
     def cgcs2000_gauss_6(cls, lng, with_zone=False):
-        return cls.__gauss_base(lng, 6, 4502, 4491, with_zone)
+        return cls.__gauss_base(lng, 6, 'cgcs2000', with_zone)
+
+
+Epsg._build_zone_epsg()
+
+
+class TransformerCache(object):
+    """
+    transformer 缓存，进程内所有 TransProj 对象共享（见模块级对象 transformer_cache）。
+    以 transformer_key 为键，容量有上限，超出时淘汰最久未使用的 transformer（LRU），读写均加锁，线程安全，
+    每个线程拿到的都是本线程专用的 transformer（见 get 方法）。
+    同一个键的 transformer 正在创建时，其他线程等待其创建完成，不会重复创建；不同键的创建互不阻塞。
+    指定 pipeline_path 时，新创建的 transformer 的 PROJ pipeline 字符串（transformer.definition）会写入该 JSON 文件，
+    之后的进程遇到相同的 transformer_key 时直接 Transformer.from_pipeline 创建，跳过 CRS 数据库查询，
+    创建耗时由 0.1 秒左右降至 1 毫秒以内。
+    """
+
+    def __init__(self, maxsize=128, pipeline_path=None):
+        """
+        :param maxsize: int 最多缓存的 transformer 个数
+        :param pipeline_path: str PROJ pipeline 缓存文件路径，默认不使用
+        """
+        self.maxsize = maxsize
+        self._transformers = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._save_lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.clones = 0
+        self.misses = 0
+        self.evictions = 0
+        self.build_time = 0.0
+        self.pipeline_builds = 0
+        self.pipelines = {}
+        self.pipeline_path = None
+        if pipeline_path:
+            self.load_pipelines(pipeline_path)
+
+    def __len__(self):
+        return len(self._transformers)
+
+    def __contains__(self, key):
+        return key in self._transformers
+
+    @staticmethod
+    def _definition(transformer):
+        """transformer 的 PROJ pipeline 字符串。存在多个候选转换（按区域选择）的 transformer 没有确定的 pipeline，返回 None"""
+        definition = transformer.definition
+        if not definition or definition.startswith('unavailable'):
+            return None
+        return definition
+
+    def _shared(self, key, factory):
+        """
+        获取共享缓存中的 transformer，没有时创建并保存
+        :return: (transformer, 创建该 transformer 的线程标识, pipeline 字符串)。
+                 pipeline 字符串在创建线程中读取：在其他线程中读取 transformer 的任何属性，pyproj 都会在该线程内重新创建一份内部对象
+        """
+        with self._lock:
+            if key in self._transformers:
+                self._transformers.move_to_end(key)
+                self.hits += 1
+                if metrics.enabled:
+                    metrics.inc('geotransform_transformer_cache_hits_total')
+                return self._transformers[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self._transformers:
+                    self._transformers.move_to_end(key)
+                    self.hits += 1
+                    if metrics.enabled:
+                        metrics.inc('geotransform_transformer_cache_hits_total')
+                    return self._transformers[key]
+            start_time = time.perf_counter()
+            definition = self.pipelines.get(key)
+            if definition:
+                transformer = Transformer.from_pipeline(definition)
+            else:
+                transformer = factory()
+            build_time = time.perf_counter() - start_time
+            pipeline = self._definition(transformer)
+            if not definition and self.pipeline_path and pipeline:
+                self.pipelines[key] = pipeline
+                self.save_pipelines()
+            entry = (transformer, threading.get_ident(), pipeline)
+            evictions = 0
+            with self._lock:
+                self.misses += 1
+                self.build_time += build_time
+                if definition:
+                    self.pipeline_builds += 1
+                self._transformers[key] = entry
+                while len(self._transformers) > self.maxsize:
+                    self._transformers.popitem(last=False)
+                    evictions += 1
+                self.evictions += evictions
+                self._key_locks.pop(key, None)
+            if metrics.enabled:
+                source = 'pipeline' if definition else 'crs'
+                metrics.inc('geotransform_transformer_cache_misses_total', source=source)
+                metrics.observe('geotransform_transformer_build_seconds', build_time, source=source)
+                if evictions:
+                    metrics.inc('geotransform_transformer_cache_evictions_total', evictions)
+        return entry
+
+    def get(self, key, factory):
+        """
+        获取当前线程可用的 transformer，缓存中没有时调用 factory 创建并保存。
+        PROJ 对象不能在多个线程之间共享，pyproj 的 Transformer 在其他线程第一次使用时会按 from_crs 的方式重新创建一份内部对象，
+        耗时与新建 transformer 相同。共享缓存中的 transformer 只交给创建它的线程使用，
+        其他线程第一次用到同一个键时，由其 pipeline 字符串复制一个本线程专用的 transformer，保存在线程本地存储中；
+        没有确定 pipeline 的 transformer 直接返回共享对象，由 pyproj 在本线程内重新创建。
+        转换计算不需要任何锁，各线程可以同时转换。
+        :param key: str transformer_key
+        :param factory: function 无参数，返回新创建的 transformer
+        :return: obj pyproj.transformer.Transformer 对象。
+        """
+        shared, owner, definition = self._shared(key, factory)
+        if owner == threading.get_ident():
+            return shared
+        local = getattr(self._local, 'transformers', None)
+        if local is None:
+            local = self._local.transformers = {}
+        entry = local.get(key)
+        # 共享缓存中的 transformer 被淘汰并重新创建后，线程本地的副本随之更新
+        if entry is not None and entry[0] is shared:
+            return entry[1]
+        if definition is None:
+            return shared
+        transformer = Transformer.from_pipeline(definition)
+        with self._lock:
+            self.clones += 1
+        if metrics.enabled:
+            metrics.inc('geotransform_transformer_cache_clones_total')
+        local[key] = (shared, transformer)
+        if len(local) > self.maxsize:
+            for stale in [k for k in local if k not in self._transformers]:
+                del local[stale]
+        return transformer
+
+    def peek(self, key):
+        """获取已缓存的 transformer，不改变使用顺序、不计入统计，没有时返回 None"""
+        entry = self._transformers.get(key)
+        return entry[0] if entry else None
+
+    def keys(self):
+        with self._lock:
+            return list(self._transformers)
+
+    def resize(self, maxsize):
+        """修改缓存容量"""
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._transformers) > self.maxsize:
+                self._transformers.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """清空缓存及统计信息（不清除 pipeline 缓存）"""
+        with self._lock:
+            self._transformers.clear()
+            self.hits = self.misses = self.evictions = self.pipeline_builds = self.clones = 0
+            self.build_time = 0.0
+
+    def load_pipelines(self, path):
+        """
+        加载 PROJ pipeline 缓存文件，并将之后新创建的 transformer 的 pipeline 写入此文件。
+        缓存文件由其他 PROJ 版本生成时忽略其内容。
+        :param path: str 缓存文件路径，文件不存在时在第一次写入时创建
+        """
+        self.pipeline_path = path
+        if not os.path.exists(path):
+            return
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('proj_version') == pyproj.proj_version_str:
+            self.pipelines.update(data.get('pipelines', {}))
+
+    def save_pipelines(self, path=None):
+        """
+        保存 PROJ pipeline 缓存文件。与文件中已有的内容合并后写入临时文件再替换，多个进程同时写入时不会损坏文件
+        :param path: str 缓存文件路径，默认为 pipeline_path
+        """
+        path = path or self.pipeline_path
+        with self._save_lock:
+            pipelines = {}
+            if os.path.exists(path):
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        data = json.load(f)
+                    if data.get('proj_version') == pyproj.proj_version_str:
+                        pipelines.update(data.get('pipelines', {}))
+                except ValueError:
+                    pass
+            pipelines.update(dict(self.pipelines))
+            temp_path = '{}.{}.tmp'.format(path, os.getpid())
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'proj_version': pyproj.proj_version_str, 'pipelines': pipelines}, f,
+                          ensure_ascii=False, indent=1)
+            os.replace(temp_path, path)
+
+    def stats(self):
+        """
+        缓存统计信息
+        :return: dict size 当前缓存个数，maxsize 容量，hits 命中次数，misses 未命中（创建）次数，
+                      evictions 淘汰次数，build_time 创建 transformer 的总耗时（秒），
+                      pipeline_builds 由 pipeline 缓存创建的个数，clones 为其他线程复制的 transformer 个数，hit_rate 命中率
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._transformers),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'build_time': self.build_time,
+                'pipeline_builds': self.pipeline_builds,
+                'clones': self.clones,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+# 进程内共享的 transformer 缓存，设置环境变量 GEOTRANSFORM_PIPELINE_CACHE 时使用该路径作为 PROJ pipeline 缓存文件
+transformer_cache = TransformerCache(pipeline_path=os.environ.get('GEOTRANSFORM_PIPELINE_CACHE'))
 
 
 class TransProj(object):
@@ -135,7 +466,7 @@ class TransProj(object):
     def __init__(self,
         exist_proj=None, exist_lng0=None, exist_with_zone=False,
         target_proj=None, target_lng0=None, target_with_zone=False,
-        transformer=None
+        transformer=None, cache=None, datum_shift=None
     ):
         """
         :param exist_proj: function 获取原有坐标坐标系 epsg 代码的回调函数（Epsg类方法）
@@ -153,6 +484,9 @@ class TransProj(object):
         :param target_with_zone: Boolean 输出坐标是否带有分度带的带号
         :param transformer: obj pyproj.transformer.Transformer 自定义的转换器。
                             当此参数赋值时，前面所有的参数将不起作用，因为前面所有参数是用来创建转换器用的
+        :param cache: obj TransformerCache transformer 缓存，默认使用进程内共享的 transformer_cache
+        :param datum_shift: obj helmert.Helmert 七参数，指定时不使用 EPSG 标准转换，
+                            而是按 输入坐标 -> 空间直角坐标 -> 七参数 -> 空间直角坐标 -> 输出坐标 的 PROJ pipeline 转换
         """
         self.exist_proj = exist_proj
         self.exist_with_zone = exist_with_zone
@@ -163,8 +497,28 @@ class TransProj(object):
         self._transformer = transformer
         if exist_proj is None and transformer is None:
             self.transformer = Transformer.from_pipeline('proj=noop ellps=GRS80')
-        # 保存已经存在的转换器
-        self.transformers = {}
+        self.cache = transformer_cache if cache is None else cache
+        self.datum_shift = datum_shift
+        # 本对象用到的 transformer_key
+        self._transformer_keys = {}
+
+    @property
+    def conversion(self):
+        """转换类型名称，用于运行指标（见 metrics 模块），如 wgs84_3d_to_xian80_gauss_3"""
+        if self._transformer is not None or self.exist_proj is None:
+            return 'transformer'
+        name = '{}_to_{}'.format(getattr(self.exist_proj, '__name__'), getattr(self.target_proj, '__name__'))
+        return name if self.datum_shift is None else name + '_helmert'
+
+    @property
+    def transformers(self):
+        """本对象用到的、仍在缓存中的转换器 {transformer_key: transformer}"""
+        transformers = {}
+        for key in list(self._transformer_keys):
+            transformer = self.cache.peek(key)
+            if transformer is not None:
+                transformers[key] = transformer
+        return transformers
 
     def transformer(self, coordinate):
         """
@@ -176,20 +530,8 @@ class TransProj(object):
         if self._transformer:
             return self._transformer
 
-        exist_proj_name = getattr(self.exist_proj, '__name__')
-        target_proj_name = getattr(self.target_proj, '__name__')
-        exist_zone_degree = None
-        target_zone_degree = None
-
-        try:
-            exist_zone_degree = int(exist_proj_name.split('_')[-1])
-        except Exception:
-            pass
-
-        try:
-            target_zone_degree = int(target_proj_name.split('_')[-1])
-        except Exception:
-            pass
+        exist_zone_degree = self._zone_degree(self.exist_proj)
+        target_zone_degree = self._zone_degree(self.target_proj)
 
         # 确定输入坐标的中央经度，当创建对象的时候指定了中央经线，则使用指定的
         if self.exist_lng0:
@@ -229,33 +571,207 @@ class TransProj(object):
         else:
             target_lng0 = None
 
+        return self._cached_transformer(exist_lng0, target_lng0)
+
+    @staticmethod
+    def _zone_degree(proj):
+        """
+        根据 Epsg 类方法名获取分度带的度数
+        :param proj: function Epsg 类方法
+        :return: int 分度带度数（3 或 6），经纬度坐标返回 None
+        """
+        try:
+            return int(getattr(proj, '__name__').split('_')[-1])
+        except Exception:
+            return None
+
+    def _cached_transformer(self, exist_lng0, target_lng0):
+        """
+        从共享缓存中获取（或创建并保存）指定中央经线的 transformer
+        :param exist_lng0: int 格式化后的输入坐标中央经线，经纬度坐标为 None
+        :param target_lng0: int 格式化后的输出坐标中央经线，经纬度坐标为 None
+        :return: obj pyproj.transformer.Transformer 对象。
+        """
+        exist_proj_name = getattr(self.exist_proj, '__name__')
+        target_proj_name = getattr(self.target_proj, '__name__')
         transformer_key = "{}/{}/{}/{}/{}/{}".format(
             exist_proj_name, str(exist_lng0), str(self.exist_with_zone),
             target_proj_name, str(target_lng0), str(self.target_with_zone),
         )
-
-        if transformer_key in self.transformers:
-            return self.transformers[transformer_key]
-
-        # 生成transformer
-        transformer = Transformer.from_crs(
+        if self.datum_shift is not None:
+            transformer_key += '/' + self.datum_shift.key
+
+        self._transformer_keys[transformer_key] = None
+        if self.datum_shift is not None:
+            return self.cache.get(transformer_key, lambda: Transformer.from_pipeline(self.datum_shift.pipeline(
+                self.exist_proj(exist_lng0, self.exist_with_zone),
+                self.target_proj(target_lng0, self.target_with_zone),
+            )))
+        # 缓存中没有时生成transformer
+        return self.cache.get(transformer_key, lambda: Transformer.from_crs(
             self.exist_proj(exist_lng0, self.exist_with_zone),
             self.target_proj(target_lng0, self.target_with_zone),
             always_xy=True
+        ))
+
+    def _lng0_array(self, xs, degrees=False):
+        """
+        批量计算每个点格式化后的输入、输出坐标中央经线，规则与 transformer 方法相同
+        :param xs: ndarray 输入坐标的 X（经度）
+        :param degrees: bool xs 是否为经度值（而不是投影坐标），用于按经度预先生成 transformer
+        :return: (输入坐标中央经线数组, 输出坐标中央经线数组)，经纬度坐标对应的数组为 None
+        """
+        exist_zone_degree = self._zone_degree(self.exist_proj)
+        target_zone_degree = self._zone_degree(self.target_proj)
+
+        if self.exist_lng0:
+            try:
+                exist_lng0 = np.full(xs.shape, float(self.exist_lng0))
+            except Exception:
+                raise TypeError('指定输入中央经线经度值错误！')
+        else:
+            if exist_zone_degree and not degrees:
+                if self.exist_with_zone:
+                    number = (xs / 1000000).astype(np.int64)
+                    exist_lng0 = (number - 1) * exist_zone_degree + 3
+                else:
+                    raise TypeError('当原有坐标不是经纬度坐标并且输入投影坐标X方向没有带号时，创建对象时必须指定正确的中央经线经度值！')
+            else:
+                exist_lng0 = xs
+
+        if self.target_lng0:
+            try:
+                target_lng0 = np.full(xs.shape, float(self.target_lng0))
+            except Exception:
+                raise TypeError('指定输出中央经线经度值错误！')
+        else:
+            target_lng0 = exist_lng0
+
+        if exist_zone_degree:
+            exist_lng0 = Epsg.calc_number_lng0(np.asarray(exist_lng0, dtype=np.float64), exist_zone_degree)[-1]
+        else:
+            exist_lng0 = None
+
+        if target_zone_degree:
+            target_lng0 = Epsg.calc_number_lng0(np.asarray(target_lng0, dtype=np.float64), target_zone_degree)[-1]
+        else:
+            target_lng0 = None
+        return exist_lng0, target_lng0
+
+    def zone_keys(self, lngs=None, xs=None):
+        """
+        获取一组经度所涉及的（输入坐标中央经线, 输出坐标中央经线）组合
+        :param lngs: array_like 经度（输入坐标为投影坐标时为其中央经线），默认为我国范围内所有 3 度带的中央经线
+        :param xs: array_like 输入坐标的 X（与 transform_many 的 xs 相同），指定时按实际坐标计算，忽略 lngs
+        :return: list [(格式化后的输入坐标中央经线, 格式化后的输出坐标中央经线), ...]，经纬度坐标对应的值为 None
+        """
+        if xs is not None:
+            xs = np.asarray(xs, dtype=np.float64).ravel()
+            exist_lng0, target_lng0 = self._lng0_array(xs)
+        else:
+            if lngs is None:
+                lngs = np.arange(75, 136, 3)
+            xs = np.asarray(lngs, dtype=np.float64).ravel()
+            exist_lng0, target_lng0 = self._lng0_array(xs, degrees=True)
+        keys = zip(
+            [None] * len(xs) if exist_lng0 is None else exist_lng0.tolist(),
+            [None] * len(xs) if target_lng0 is None else target_lng0.tolist(),
         )
-        # print('生成trans：', transformer_key)
-        self.transformers[transformer_key] = transformer
-        return transformer
+        return list(OrderedDict.fromkeys(keys))
+
+    def warm_up(self, lngs=None, keys=None):
+        """
+        预先生成一组经度所涉及的全部 transformer
+        :param lngs: array_like 经度，见 zone_keys
+        :param keys: list zone_keys 返回的组合，指定时忽略 lngs
+        :return: int 涉及的 transformer 个数
+        """
+        if keys is None:
+            keys = self.zone_keys(lngs)
+        for exist_lng0, target_lng0 in keys:
+            self._cached_transformer(exist_lng0, target_lng0)
+        return len(keys)
+
+    def transform_many(self, xs, ys, zs=None):
+        """
+        批量转换坐标。
+        先向量化计算所有点的中央经线，按 transformer 特征分组，每组只获取一次 transformer 并做一次数组转换，
+        再按输入顺序写回结果，避免逐点生成 transformer_key 和逐点调用 transform。
+        :param xs: array_like 输入坐标的 X（经度）
+        :param ys: array_like 输入坐标的 Y（纬度）
+        :param zs: array_like 输入坐标的 Z（高程），可选
+        :return: tuple (X 数组, Y 数组) 或 (X 数组, Y 数组, Z 数组)，顺序与输入一致
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        columns = (xs, ys) if zs is None else (xs, ys, np.asarray(zs, dtype=np.float64))
+        if self._transformer:
+            results = self._transformer.transform(*columns)
+        else:
+            results = self._transform_groups(xs, columns)
+        if metrics.enabled:
+            metrics.record_points(self.conversion, xs.size)
+        return results
+
+    def _transform_groups(self, xs, columns):
+        """按 transformer 特征分组转换，见 transform_many"""
+
+        exist_lng0, target_lng0 = self._lng0_array(xs)
+        # 经纬度坐标的中央经线用 -1 占位，用于分组
+        keys = np.column_stack([
+            np.full(xs.shape, -1) if exist_lng0 is None else exist_lng0,
+            np.full(xs.shape, -1) if target_lng0 is None else target_lng0,
+        ])
+        groups, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.cumsum(np.bincount(inverse, minlength=len(groups)))[:-1]
+
+        results = [np.empty_like(column) for column in columns]
+        for (exist_key, target_key), index in zip(groups.tolist(), np.split(order, bounds)):
+            transformer = self._cached_transformer(
+                None if exist_lng0 is None else int(exist_key),
+                None if target_lng0 is None else int(target_key),
+            )
+            transformed = transformer.transform(*(column[index] for column in columns))
+            for result, values in zip(results, transformed):
+                result[index] = values
+        return tuple(results)
 
     def __call__(self, coordinate, *args, **kwargs):
         transformer = self.transformer(coordinate)
         # print(transformer.definition)
-        return transformer.transform(*coordinate)
+        result = transformer.transform(*coordinate)
+        if metrics.enabled:
+            metrics.record_points(self.conversion, 1)
+        return result
 
 
-if __name__ == '__main__':
-    import time
+def warm_up(trans_projs, lngs=None, workers=4, wait=True):
+    """
+    在后台线程池中预先生成多个 TransProj 对象在一组经度（分度带）上所需的全部 transformer，
+    生成的 transformer 保存在各 TransProj 对象的缓存中（默认为共享的 transformer_cache）。
+    :param trans_projs: list TransProj 对象列表
+    :param lngs: array_like 经度，见 TransProj.zone_keys
+    :param workers: int 线程数
+    :param wait: bool 是否等待全部生成完成。为 True 时逐个取 Future 的结果，生成失败的异常在此抛出（全部任务结束后）；
+                 为 False 时立即返回 Future 列表，transformer 在后台线程中生成，需自行调用 Future.result() 检查是否失败
+    :return: list concurrent.futures.Future 对象列表
+    """
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = [
+        executor.submit(trans._cached_transformer, exist_lng0, target_lng0)
+        for trans in trans_projs
+        for exist_lng0, target_lng0 in trans.zone_keys(lngs)
+    ]
+    executor.shutdown(wait=wait)
+    if wait:
+        for future in futures:
+            future.result()
+    return futures
 
+
+if __name__ == '__main__':
     with open('test.csv') as fp:
         data = fp.read()
     coords = [tuple(map(lambda _: float(_), x.split(','))) for x in data.split('\n') if x]
@@ -275,3 +791,9 @@ if __name__ == '__main__':
     with open('test_result.csv', 'w') as f:
         for x in new_coords:
             f.write('%.3f,%.3f,%.3f\n' % tuple(x))
+
+    xs, ys, zs = np.array(coords).T
+    start_time = time.time()
+    trans = TransProj(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.xian80_gauss_3, exist_lng0=114, target_with_zone=True)
+    new_xs, new_ys, new_zs = trans.transform_many(xs, ys, zs)
+    print('批量转换点数：%d，耗时：%.3fS' % (len(new_xs), time.time() - start_time))
@@ -0,0 +1,211 @@
+# -*- encoding: utf-8 -*-
+"""
+分隔符文本（CSV 等）坐标文件的流式分块转换。
+需要安装 numpy 包。
+每次只读取固定行数（chunk_size）的一块，用 numpy 批量解析坐标列，调用数组转换函数整块转换，再整块写出，
+内存占用只与块大小有关，与文件大小无关，可以转换远大于内存的文件。
+输入中的空行原样写入输出的相同位置，输出与输入逐行对应。
+"""
+import sys
+import time
+import itertools
+
+import numpy as np
+
+from .coordinate_array import CoordTransArray
+from .projection import TransProj
+
+
+class CsvConverter(object):
+    """
+    分隔符文本坐标文件的流式转换
+    示例：
+        converter = CsvConverter('wgs84_to_gcj02', columns=(0, 1), precision=8)
+        stats = converter.convert('input.csv', 'output.csv')
+        converter = CsvConverter(TransProj(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.xian80_gauss_3, target_with_zone=True),
+                                 columns=(0, 1, 2), precision=3)
+        for xs, ys, zs in converter.iter_convert('input.csv'):
+            ...
+    """
+
+    def __init__(self, func, columns=(0, 1), delimiter=',', precision=6, chunk_size=100000, skip_header=0,
+                 keep_columns=False):
+        """
+        :param func: 转换方法，可以为：
+                     str CoordTransArray 的方法名，如 'wgs84_to_gcj02'；
+                     TransProj 对象（调用 transform_many）；ParallelTransformer 对象（调用 transform）；
+                     或者输入各列数组、返回结果各列数组的函数
+        :param columns: tuple 坐标所在的列号（从 0 开始），依次为 X（经度）、Y（纬度）、Z（高程，可选）
+        :param delimiter: str 分隔符
+        :param precision: int 输出坐标的小数位数
+        :param chunk_size: int 每块的行数
+        :param skip_header: int 输入文件开头跳过的行数，跳过的行原样写入输出文件
+        :param keep_columns: bool 是否保留输入的全部列（只替换坐标列），默认只输出转换结果各列
+        """
+        self.func = self.resolve(func)
+        self.columns = tuple(columns)
+        self.delimiter = delimiter
+        self.precision = precision
+        self.chunk_size = int(chunk_size)
+        self.skip_header = skip_header
+        self.keep_columns = keep_columns
+
+    @staticmethod
+    def resolve(func):
+        """将 func 参数转换为数组转换函数"""
+        if isinstance(func, str):
+            return CoordTransArray.column_func(func)
+        if isinstance(func, TransProj):
+            return func.transform_many
+        if hasattr(func, 'transform') and not callable(func):
+            return func.transform
+        return func
+
+    @property
+    def fmt(self):
+        return '%.{}f'.format(self.precision)
+
+    @staticmethod
+    def _open(path, mode):
+        """路径为 '-' 时使用标准输入/输出，已打开的文件对象原样返回（不负责关闭）"""
+        if hasattr(path, 'read' if 'r' in mode else 'write'):
+            return path, False
+        if path == '-':
+            return (sys.stdin if 'r' in mode else sys.stdout), False
+        return open(path, mode, encoding='utf-8', newline=''), True
+
+    def _read(self, f, header=None):
+        """
+        分块读取
+        :return: generator (该块的文本行列表, 坐标数组，形状为 (列数, 非空行数), 非空行的行号列表，没有空行时为 None)
+        """
+        for line in itertools.islice(f, self.skip_header):
+            if header is not None:
+                header.append(line)
+        while True:
+            lines = list(itertools.islice(f, self.chunk_size))
+            if not lines:
+                return
+            rows = None
+            data_lines = lines
+            if not all(line.strip() for line in lines):
+                rows = [i for i, line in enumerate(lines) if line.strip()]
+                data_lines = [lines[i] for i in rows]
+            if data_lines:
+                data = np.loadtxt(data_lines, delimiter=self.delimiter, usecols=self.columns, dtype=np.float64, ndmin=2)
+            else:
+                data = np.empty((0, len(self.columns)))
+            yield lines, data.T, rows
+
+    def iter_convert(self, src):
+        """
+        分块转换
+        :param src: str or file 输入文件路径（'-' 为标准输入）或文本文件对象
+        :return: generator 每块的转换结果各列数组
+        """
+        f, close = self._open(src, 'r')
+        try:
+            for _, columns, _ in self._read(f):
+                if columns.shape[1]:
+                    yield tuple(self.func(*columns))
+        finally:
+            if close:
+                f.close()
+
+    def _format(self, lines, result, rows=None):
+        """
+        输出一块的文本
+        :param rows: list 非空行的行号，见 _read，空行原样输出
+        """
+        if rows is None:
+            rows = range(len(lines))
+        if not self.keep_columns:
+            buffer = _TextBuffer()
+            np.savetxt(buffer, np.column_stack(result), fmt=self.fmt, delimiter=self.delimiter)
+            if len(rows) == len(lines):
+                return buffer.getvalue()
+            out = list(lines)
+            for i, text in zip(rows, buffer.getvalue().splitlines(True)):
+                out[i] = text
+            return ''.join(out)
+        fmt = self.fmt
+        values = [[fmt % v for v in column] for column in result]
+        out = list(lines)
+        for n, i in enumerate(rows):
+            line = lines[i]
+            stripped = line.rstrip('\r\n')
+            fields = stripped.split(self.delimiter)
+            for column, column_values in zip(self.columns, values):
+                fields[column] = column_values[n]
+            out[i] = self.delimiter.join(fields) + line[len(stripped):]
+        return ''.join(out)
+
+    def convert(self, src, dst, progress=None):
+        """
+        转换文件
+        :param src: str or file 输入文件路径（'-' 为标准输入）或文本文件对象
+        :param dst: str or file 输出文件路径（'-' 为标准输出）或文本文件对象
+        :param progress: function 每转换一块调用一次 progress(stats)，可用于显示进度
+        :return: dict 统计信息：points 点数，chunks 块数，seconds 耗时（秒），points_per_second 每秒转换点数
+        """
+        stats = {'points': 0, 'chunks': 0, 'seconds': 0.0, 'points_per_second': 0.0}
+        start_time = time.perf_counter()
+        fin, close_in = self._open(src, 'r')
+        fout, close_out = self._open(dst, 'w')
+        try:
+            header = []
+            for lines, columns, rows in self._read(fin, header):
+                if header:
+                    fout.writelines(header)
+                    header = None
+                if not columns.shape[1]:
+                    fout.writelines(lines)
+                    continue
+                fout.write(self._format(lines, self.func(*columns), rows))
+                stats['points'] += columns.shape[1]
+                stats['chunks'] += 1
+                self._update(stats, start_time)
+                if progress is not None:
+                    progress(stats)
+            if header:
+                fout.writelines(header)
+        finally:
+            if close_in:
+                fin.close()
+            if close_out:
+                fout.close()
+        return self._update(stats, start_time)
+
+    @staticmethod
+    def _update(stats, start_time):
+        stats['seconds'] = time.perf_counter() - start_time
+        stats['points_per_second'] = stats['points'] / stats['seconds'] if stats['seconds'] else 0.0
+        return stats
+
+
+class _TextBuffer(list):
+    """np.savetxt 的写入目标，收集文本片段"""
+
+    def write(self, text):
+        self.append(text)
+
+    def getvalue(self):
+        return ''.join(self)
+
+
+if __name__ == '__main__':
+    import os
+    import tempfile
+
+    from .projection import Epsg
+
+    coords = np.loadtxt(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test.csv'), delimiter=',')
+    path = os.path.join(tempfile.mkdtemp(), 'big.csv')
+    np.savetxt(path, np.tile(coords, (5000, 1)), fmt='%.8f', delimiter=',')
+
+    for func in ('wgs84_to_gcj02',
+                 TransProj(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.xian80_gauss_3, exist_lng0=114, target_with_zone=True)):
+        converter = CsvConverter(func, columns=(0, 1, 2) if isinstance(func, TransProj) else (0, 1), precision=3)
+        result = converter.convert(path, path + '.out')
+        print('%s 转换点数：%d，耗时：%.3fS，%.0f 点/秒' % (
+            func if isinstance(func, str) else 'TransProj', result['points'], result['seconds'], result['points_per_second']))
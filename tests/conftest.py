@@ -0,0 +1,39 @@
+# -*- encoding: utf-8 -*-
+"""
+单元测试的公共数据。
+运行方法：在仓库目录下执行 python -m pytest（需要安装 pytest 包）。
+"""
+import os
+
+import numpy as np
+import pytest
+
+from support import ROOT, AMapStub, import_package
+
+import_package()
+
+
+@pytest.fixture(scope='session')
+def test_coords():
+    """test.csv 中的坐标，形状为 (点数, 3)"""
+    return np.loadtxt(os.path.join(ROOT, 'test.csv'), delimiter=',')
+
+
+@pytest.fixture
+def china_points():
+    """
+    国内外包矩形范围内（含边界附近）的随机坐标
+    :return: (经度数组, 纬度数组)
+    """
+    rng = np.random.default_rng(20201016)
+    return rng.uniform(72, 137, 2000), rng.uniform(2, 55, 2000)
+
+
+@pytest.fixture
+def amap_stub():
+    """
+    本地模拟的高德 web api 服务
+    :return: obj support.AMapStub，url 为服务地址，paths、clients 为已收到请求的路径、客户端地址
+    """
+    with AMapStub() as stub:
+        yield stub
@@ -0,0 +1,108 @@
+# -*- encoding: utf-8 -*-
+"""
+单元测试（tests）和基准测试（benchmarks）共用的辅助代码：以 geotransform 包名导入仓库，本地高德 web api 模拟服务。
+两处的 conftest 都从这里导入，模拟服务的返回内容只有这一份。
+"""
+import os
+import sys
+import json
+import threading
+import importlib.util
+from urllib import parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_package():
+    """以 geotransform 包名导入仓库（仓库目录即包目录，目录名可能不是 geotransform）"""
+    try:
+        import geotransform
+        return geotransform
+    except ImportError:
+        pass
+    spec = importlib.util.spec_from_file_location(
+        'geotransform', os.path.join(ROOT, '__init__.py'), submodule_search_locations=[ROOT])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['geotransform'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class AMapStubHandler(BaseHTTPRequestHandler):
+    """模拟高德地理编码、逆地理编码接口，按请求的地址、坐标个数返回固定内容，key 为 invalid 时返回 status 0"""
+    protocol_version = 'HTTP/1.1'
+    # 保持连接时响应头和响应体分两次写出，不关闭 Nagle 算法会与客户端的延迟确认叠加，每个请求多等待约 40 毫秒
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = parse.urlparse(self.path)
+        query = dict(parse.parse_qsl(url.query))
+        if query.get('key') == 'invalid':
+            body = {'status': '0', 'info': 'INVALID_USER_KEY', 'infocode': '10001'}
+        elif url.path.endswith('/geo'):
+            addresses = query.get('address', '').split('|')
+            geocodes = [{
+                'formatted_address': address, 'country': '中国', 'province': '河南省', 'city': '郑州市',
+                'citycode': '0371', 'district': '金水区', 'adcode': '410105', 'location': '113.703868,34.762716',
+            } for address in addresses]
+            body = {'status': '1', 'info': 'OK', 'infocode': '10000', 'count': str(len(geocodes)), 'geocodes': geocodes}
+        else:
+            locations = query.get('location', '').split('|')
+            regeocodes = [{
+                'formatted_address': '河南省郑州市金水区', 'addressComponent': {
+                    'country': '中国', 'province': '河南省', 'city': '郑州市', 'citycode': '0371',
+                    'district': '金水区', 'adcode': '410105', 'township': '大石桥街道', 'towncode': '410105001000',
+                },
+            } for _ in locations]
+            body = {'status': '1', 'info': 'OK', 'infocode': '10000'}
+            if query.get('batch') == 'true':
+                body['regeocodes'] = regeocodes
+            else:
+                body['regeocode'] = regeocodes[0]
+        self.server.requests.append((url.path, self.client_address))
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json;charset=UTF-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class AMapStub(ThreadingHTTPServer):
+    """
+    在后台线程中运行的模拟服务，url 为服务地址（如 http://127.0.0.1:12345/v3/geocode），
+    requests 为已收到的请求 [(路径, 客户端地址), ...]，客户端地址相同即复用了同一个连接
+    """
+    # 默认的监听队列长度为 5，并发建立连接时会丢弃连接请求，客户端重试使耗时大幅波动
+    request_queue_size = 128
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), AMapStubHandler)
+        self.requests = []
+        self.url = 'http://127.0.0.1:{}/v3/geocode'.format(self.server_address[1])
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def paths(self):
+        """已收到请求的路径列表"""
+        return [path for path, _ in self.requests]
+
+    @property
+    def clients(self):
+        """已收到请求的客户端地址列表"""
+        return [client for _, client in self.requests]
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
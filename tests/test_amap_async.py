@@ -0,0 +1,129 @@
+# -*- encoding: utf-8 -*-
+"""异步高德查询：结果与顺序、失败项、批量和格网归并，以及换用事件循环时关闭自动创建的 ClientSession"""
+import asyncio
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from geotransform import (AMapError, AsyncAMapBulkGeo, AsyncAMapBulkReGeo, AsyncAMapGeo, AsyncAMapReGeo,
+                          AsyncAMapSession, AsyncAMapSnapReGeo)
+from geotransform.amap_async import gather
+
+ADDRESSES = ['郑州市燕庄地铁站{}号口'.format(i) for i in range(25)]
+
+
+def test_fetch_and_fetch_many(amap_stub):
+    url = amap_stub.url
+
+    async def main():
+        async with AsyncAMapSession(concurrency=4) as session:
+            geo = await AsyncAMapGeo('key', ADDRESSES[0], session=session, api_url=url + '/geo')
+            geos = await AsyncAMapGeo.fetch_many('key', ADDRESSES, session=session, api_url=url + '/geo')
+            regeos = await AsyncAMapReGeo.fetch_many('key', [(113.6, 34.76), '113.7,34.76'], session=session,
+                                                     api_url=url + '/regeo')
+            return geo, geos, regeos
+
+    geo, geos, regeos = asyncio.run(main())
+    assert geo.formatted_address == ADDRESSES[0] and geo.coordinate == (113.703868, 34.762716)
+    assert [item.formatted_address for item in geos] == ADDRESSES
+    assert [item.coordinate for item in regeos] == [(113.6, 34.76), (113.7, 34.76)]
+    assert regeos[0].adcode == '410105' and regeos[1].township == '大石桥街道'
+    assert len(amap_stub.paths) == 1 + len(ADDRESSES) + 2
+
+
+def test_gather_return_exceptions(amap_stub):
+    url = amap_stub.url
+
+    async def main():
+        async with AsyncAMapSession() as session:
+            queries = [AsyncAMapGeo('key', ADDRESSES[0], session=session, api_url=url + '/geo'),
+                       AsyncAMapGeo('key', ADDRESSES[1], session=session, api_url='http://127.0.0.1:1/geo')]
+            return await gather(queries, return_exceptions=True)
+
+    geo, error = asyncio.run(main())
+    assert geo.formatted_address == ADDRESSES[0]
+    assert isinstance(error, Exception)
+
+    with pytest.raises(RuntimeError):
+        AsyncAMapGeo('key', ADDRESSES[0], session=AsyncAMapSession()).response
+
+
+def test_bulk_and_snap(amap_stub):
+    url = amap_stub.url
+    locations = [(113.6 + i * 0.01, 34.76) for i in range(30)]
+
+    async def main():
+        async with AsyncAMapSession(concurrency=2) as session:
+            geo = await AsyncAMapBulkGeo('key', ADDRESSES + [''], session=session, api_url=url + '/geo')
+            failed = await AsyncAMapBulkGeo('invalid', ADDRESSES[:3], session=session, api_url=url + '/geo')
+            regeo = await AsyncAMapBulkReGeo('key', locations, session=session, api_url=url + '/regeo')
+            # 相邻两点相距约 0.9 米，同一个 30 米格网
+            snap = await AsyncAMapSnapReGeo('key', [(113.6, 34.76), (113.600005, 34.760005)] * 5, cell_size=30,
+                                            session=session, api_url=url + '/regeo')
+            return geo, failed, regeo, snap
+
+    geo, failed, regeo, snap = asyncio.run(main())
+    assert geo.requests == 3 and geo.formatted_address == ADDRESSES + [None]
+    assert geo.ok == [True] * len(ADDRESSES) + [False] and isinstance(geo.errors[-1], ValueError)
+    assert failed.ok == [False] * 3 and all(isinstance(error, AMapError) for error in failed.errors)
+    assert regeo.requests == 2 and regeo.coordinate == [(round(lng, 6), lat) for lng, lat in locations] and regeo.adcode == ['410105'] * 30
+    assert snap.bulk.requests == 1 and len(snap.formatted_address) == 10
+    assert len(set(snap.formatted_address)) == 1
+    assert amap_stub.paths.count('/v3/geocode/geo') == 4 and amap_stub.paths.count('/v3/geocode/regeo') == 3
+
+
+def test_session_closed_when_loop_changes(amap_stub):
+    url = amap_stub.url
+    session = AsyncAMapSession()
+    clients = []
+
+    async def main():
+        geo = await AsyncAMapGeo('key', ADDRESSES[0], session=session, api_url=url + '/geo')
+        clients.append(session.session)
+        return geo.formatted_address
+
+    assert asyncio.run(main()) == ADDRESSES[0]
+    # asyncio.run 结束时关闭了第一个事件循环中的 ClientSession
+    assert clients[0].closed
+    assert asyncio.run(main()) == ADDRESSES[0]
+    assert clients[1] is not clients[0] and clients[1].closed
+
+    async def close_explicitly():
+        await main()
+        await session.close()
+        return session._session
+
+    assert asyncio.run(close_explicitly()) is None and clients[2].closed
+
+
+def test_session_released_from_stopped_loop(amap_stub):
+    url = amap_stub.url
+    session = AsyncAMapSession()
+
+    async def main():
+        await AsyncAMapGeo('key', ADDRESSES[0], session=session, api_url=url + '/geo')
+        return session.session
+
+    # 自行管理的事件循环停止时没有取消任务，换用新的事件循环后，旧的 ClientSession 在旧事件循环再次运行时关闭
+    loop = asyncio.new_event_loop()
+    first = loop.run_until_complete(main())
+    assert not first.closed
+    second = asyncio.run(main())
+    assert second is not first and second.closed
+    loop.run_until_complete(asyncio.gather(*asyncio.all_tasks(loop), return_exceptions=True))
+    assert first.closed
+    loop.close()
+
+
+def test_external_session_not_closed(amap_stub):
+    import aiohttp
+    url = amap_stub.url
+
+    async def main():
+        async with aiohttp.ClientSession() as client:
+            async with AsyncAMapSession(session=client) as session:
+                await AsyncAMapGeo('key', ADDRESSES[0], session=session, api_url=url + '/geo')
+            return client.closed
+
+    assert asyncio.run(main()) is False
@@ -0,0 +1,100 @@
+# -*- encoding: utf-8 -*-
+"""批量地理编码、逆地理编码：分批、结果顺序、无效输入和失败批次只影响对应的项"""
+import json
+from urllib import parse
+
+import pytest
+
+from geotransform import AMapBulkGeo, AMapBulkReGeo, AMapError
+from geotransform.amap import AMapBulkBase
+
+
+class _Response(object):
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.text = json.dumps(body, ensure_ascii=False)
+
+    def json(self, **kwargs):
+        return json.loads(self.text, **kwargs)
+
+
+class FakeSession(object):
+    """
+    代替 AMapSession 的假接口：地址（坐标）原样放入结果。
+    地址包含“失败”时整批返回 status 0，包含“缺项”时少返回一项，包含“500”时返回 HTTP 500
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    def get(self, url, timeout=None):
+        query = dict(parse.parse_qsl(parse.urlparse(url).query))
+        assert query['batch'] == 'true'
+        if 'address' in query:
+            items = query['address'].split('|')
+            self.batches.append(items)
+            if any('500' in item for item in items):
+                return _Response(500, {})
+            if any('失败' in item for item in items):
+                return _Response(200, {'status': '0', 'info': 'DAILY_QUERY_OVER_LIMIT', 'infocode': '10003'})
+            codes = [{'formatted_address': item, 'adcode': str(len(item)), 'location': '113.7,34.76'} for item in items]
+            if any('缺项' in item for item in items):
+                codes = codes[:-1]
+            return _Response(200, {'status': '1', 'info': 'OK', 'infocode': '10000', 'geocodes': codes})
+        items = query['location'].split('|')
+        self.batches.append(items)
+        codes = [{'formatted_address': item, 'addressComponent': {'adcode': item[:3]}} for item in items]
+        return _Response(200, {'status': '1', 'info': 'OK', 'infocode': '10000', 'regeocodes': codes})
+
+
+def test_bulk_base_is_abstract():
+    with pytest.raises(TypeError):
+        AMapBulkBase('key', [])
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_batches_keep_input_order(workers):
+    session = FakeSession()
+    addresses = ['地址{}'.format(i) for i in range(23)]
+    geo = AMapBulkGeo('key', addresses, workers=workers, session=session)
+    assert geo.formatted_address == addresses
+    assert geo.requests == 3 and sorted(map(len, session.batches)) == [3, 10, 10]
+    assert geo.coordinate == [(113.7, 34.76)] * 23 and geo.adcode == [str(len(address)) for address in addresses]
+    assert geo.ok == [True] * 23 and geo.errors == [None] * 23
+    # 结果已取得，再次读取不再请求
+    geo.city
+    assert len(session.batches) == 3
+
+
+def test_invalid_items_and_failed_batches():
+    session = FakeSession()
+    addresses = ['地址0', '', None, '甲|乙', '地址4', '请求失败', '地址6', '地址7', '返回500', '地址9']
+    geo = AMapBulkGeo('key', addresses, batch_size=2, session=session)
+    assert geo.formatted_address == ['地址0', None, None, None, '地址4', None, None, None, None, '地址9']
+    # 无效的地址不参与请求，有效的地址每 2 个一批
+    assert geo.requests == 4 and sorted(map(tuple, session.batches)) == [
+        ('地址0', '地址4'), ('地址7', '返回500'), ('地址9',), ('请求失败', '地址6')]
+    assert all(isinstance(geo.errors[index], ValueError) for index in (1, 2, 3))
+    assert isinstance(geo.errors[5], AMapError) and geo.errors[5] is geo.errors[6]
+    assert geo.errors[5].infocode == '10003'
+    assert isinstance(geo.errors[7], AMapError) and geo.errors[7] is geo.errors[8]
+    assert geo.ok == [error is None for error in geo.errors]
+    assert geo.coordinate[1] is None and geo.coordinate[4] == (113.7, 34.76)
+
+
+def test_result_count_mismatch():
+    geo = AMapBulkGeo('key', ['地址0', '缺项1'], session=FakeSession())
+    assert geo.formatted_address == [None, None]
+    assert isinstance(geo.errors[0], AMapError) and '不一致' in str(geo.errors[0])
+
+
+def test_bulk_regeo():
+    session = FakeSession()
+    locations = [(113.6 + i * 0.001, 34.76) for i in range(45)] + ['bad', (1, 2, 3), ' 113.7 , 34.8 ']
+    regeo = AMapBulkReGeo('key', locations, session=session)
+    expected = ['{:.6f},{:.6f}'.format(*location) for location in locations[:45]] + [None, None, '113.700000,34.800000']
+    assert regeo.formatted_address == expected
+    assert regeo.requests == 3 and sorted(map(len, session.batches)) == [6, 20, 20]
+    assert regeo.adcode == [value[:3] if value else None for value in expected]
+    assert regeo.coordinate[-1] == (113.7, 34.8) and regeo.coordinate[45] is None
+    assert isinstance(regeo.errors[46], ValueError) and regeo.ok.count(True) == 46
@@ -0,0 +1,94 @@
+# -*- encoding: utf-8 -*-
+"""高德查询的 HTTP 连接池：连接复用、超时设置、configure、fork 后重建，以及传入其他发送请求的对象"""
+import requests
+
+from geotransform import AMapGeo, AMapReGeo, AMapSession
+from geotransform.amap import amap_session
+
+
+class Recorder(object):
+    """记录 get 的参数，再交给 requests 发送"""
+
+    def __init__(self, session=requests):
+        self.session = session
+        self.calls = []
+
+    def get(self, url, timeout=None):
+        self.calls.append((url, timeout))
+        return self.session.get(url, timeout=timeout)
+
+
+def test_keep_alive_connection_reused(amap_stub):
+    with AMapSession(pool_size=2) as session:
+        first = AMapGeo('key', '郑州市燕庄地铁站', session=session, api_url=amap_stub.url + '/geo')
+        second = AMapReGeo('key', '113.645356,34.762716', session=session, api_url=amap_stub.url + '/regeo')
+        assert first.formatted_address == '郑州市燕庄地铁站' and second.adcode == '410105'
+    # 同一个客户端地址（端口）即同一个 TCP 连接
+    assert len(amap_stub.clients) == 2 and amap_stub.clients[0] == amap_stub.clients[1]
+    assert session._session is None
+
+    # requests.get 每次新建连接
+    for _ in range(2):
+        AMapGeo('key', '郑州市燕庄地铁站', session=requests, api_url=amap_stub.url + '/geo').get_result()
+    assert amap_stub.clients[2] != amap_stub.clients[3]
+
+
+def test_timeout_forwarded(amap_stub, monkeypatch):
+    session = AMapSession(timeout=(3, 10))
+    calls = []
+    client = session.session
+    original = client.get
+    monkeypatch.setattr(client, 'get', lambda url, **kwargs: calls.append(kwargs) or original(url, **kwargs))
+    AMapGeo('key', '燕庄', session=session, api_url=amap_stub.url + '/geo').get_result()
+    AMapGeo('key', '燕庄', session=session, timeout=5, api_url=amap_stub.url + '/geo').get_result()
+    assert [kwargs['timeout'] for kwargs in calls] == [(3, 10), 5]
+
+    recorder = Recorder()
+    AMapGeo('key', '燕庄', session=recorder, timeout=2.5, api_url=amap_stub.url + '/geo').get_result()
+    assert recorder.calls == [(amap_stub.url + '/geo?address=%E7%87%95%E5%BA%84&key=key', 2.5)]
+    session.close()
+
+
+def test_default_timeout_unlimited():
+    # 默认与 requests.get 一样不限制超时
+    assert AMapSession().timeout is None and amap_session.timeout is None
+
+
+def test_configure():
+    session = AMapSession(pool_size=2, timeout=5, retries=0)
+    client = session.session
+    session.configure(pool_size=16, retries=3)
+    # 已建立的连接关闭，按新的设置重新创建，没有传入的参数不变
+    assert session._session is None and session.timeout == 5
+    adapter = session.session.get_adapter('http://127.0.0.1')
+    assert session.session is not client
+    assert adapter._pool_maxsize == 16 and adapter.max_retries.total == 3
+    session.configure(timeout=None)
+    assert session.timeout is None and session.pool_size == 16 and session.retries == 3
+    session.configure(timeout=(1, 2))
+    assert session.timeout == (1, 2)
+
+
+def test_recreated_after_fork():
+    session = AMapSession()
+    client = session.session
+    assert session.session is client
+    # 模拟 fork 出的子进程：pid 与创建 Session 的进程不同
+    session._pid = -1
+    assert session.session is not client
+    closed = []
+    session.session.close = lambda: closed.append(True)
+    session._pid = -1
+    session.close()
+    # 不属于本进程的 Session 不关闭（与父进程共用的连接），只丢弃
+    assert session._session is None and closed == []
+
+
+def test_injected_session(amap_stub):
+    with requests.Session() as client:
+        recorder = Recorder(client)
+        geo = AMapGeo('key', ['燕庄', '紫荆山'], batch=True, session=recorder, api_url=amap_stub.url + '/geo')
+        assert geo.formatted_address == ['燕庄', '紫荆山']
+        AMapGeo('key', '燕庄', session=recorder, api_url=amap_stub.url + '/geo').get_result()
+    assert len(recorder.calls) == 2 and amap_stub.clients[0] == amap_stub.clients[1]
+    assert all(timeout is None for _, timeout in recorder.calls)
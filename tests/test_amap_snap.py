@@ -0,0 +1,120 @@
+# -*- encoding: utf-8 -*-
+"""密集坐标的逆地理编码：格网与 geohash 归并、代表点、结果分发、归并倍数和缓存"""
+from urllib import parse
+
+import numpy as np
+import pytest
+
+from geotransform import AMapSnapReGeo, GeocodeCache, GeoDistanceDirect
+from geotransform.amap import geohash_center, geohash_encode
+
+
+class _Response(object):
+    status_code = 200
+
+    def __init__(self, body):
+        self.body = body
+
+    def json(self, **kwargs):
+        return self.body
+
+
+class FakeSession(object):
+    """逆地理编码结果的 formatted_address 为请求的坐标，记录每个请求的坐标列表"""
+
+    def __init__(self):
+        self.batches = []
+
+    def get(self, url, timeout=None):
+        items = dict(parse.parse_qsl(parse.urlparse(url).query))['location'].split('|')
+        self.batches.append(items)
+        codes = [{'formatted_address': item, 'addressComponent': {'adcode': '410105'}} for item in items]
+        return _Response({'status': '1', 'regeocodes': codes})
+
+
+def _track(snap, cells=10, per_cell=5):
+    """每个格网中心附近（四分之一格网以内）取 per_cell 个点，相邻格网沿经度方向排列"""
+    rng = np.random.default_rng(20201016)
+    lng, lat = 113.6, 34.76
+    points = []
+    for _ in range(cells):
+        (row, _), (center_lng, center_lat) = snap.cell_of(lng, lat)
+        lng_step = snap._lng_steps[row]
+        for dx, dy in rng.uniform(-0.25, 0.25, (per_cell, 2)):
+            points.append((center_lng + dx * lng_step, center_lat + dy * snap._lat_step))
+        lng = center_lng + lng_step
+    return points
+
+
+def test_geohash():
+    assert geohash_encode(-5.6, 42.6, 5) == 'ezs42'
+    assert geohash_center('ezs42') == pytest.approx((-5.6030, 42.6050), abs=1e-3)
+    rng = np.random.default_rng(1)
+    for lng, lat in zip(rng.uniform(-180, 180, 100), rng.uniform(-90, 90, 100)):
+        cell = geohash_encode(lng, lat, 8)
+        assert geohash_encode(*geohash_center(cell), 8) == cell
+        assert abs(geohash_center(cell)[0] - lng) < 360 / 2 ** 20 and abs(geohash_center(cell)[1] - lat) < 180 / 2 ** 20
+
+
+def test_cell_size():
+    snap = AMapSnapReGeo('key', [], cell_size=20)
+    (row, column), center = snap.cell_of(113.6, 34.76)
+    _, right = snap.cell_of(center[0] + snap._lng_steps[row], center[1])
+    _, up = snap.cell_of(center[0], center[1] + snap._lat_step)
+    assert GeoDistanceDirect.single(*center, *right) == pytest.approx(20, rel=1e-3)
+    # 每行的经度间隔不同，上下相邻格网的中心不在同一经线上，只比较纬度差
+    assert (up[1] - center[1]) * GeoDistanceDirect.single(0, 0, 0, 1) == pytest.approx(20, rel=1e-9)
+    # 格网中心所在的格网就是本身
+    assert snap.cell_of(*center)[0] == (row, column)
+
+
+def test_fan_out_and_collapse_ratio():
+    session = FakeSession()
+    points = _track(AMapSnapReGeo('key', [], cell_size=20))
+    locations = points + ['bad', (200, 10)]
+    snap = AMapSnapReGeo('key', locations, cell_size=20, session=session)
+    assert snap.unique_cells == 10 and snap.collapse_ratio == 5.0
+    assert session.batches == []
+
+    # 同一格网的坐标共用代表点（格网中心）的结果，10 个代表点一个请求
+    formatted = snap.formatted_address
+    representatives = snap.representative_coordinate
+    assert snap.requests == 1 and [len(batch) for batch in session.batches] == [10]
+    assert representatives[-2:] == [None, None]
+    for index, point in enumerate(points):
+        assert representatives[index] == representatives[index - index % 5]
+        assert formatted[index] == '{:.6f},{:.6f}'.format(*representatives[index])
+        assert representatives[index] == pytest.approx(snap.cell_of(*point)[1], abs=1e-6)
+    assert len(set(formatted[:-2])) == 10 and formatted[-2:] == [None, None]
+    assert snap.adcode == ['410105'] * 50 + [None, None]
+    assert snap.coordinate[:50] == points and snap.coordinate[50:] == [None, None]
+    assert snap.ok == [True] * 50 + [False, False] and isinstance(snap.errors[-1], ValueError)
+    assert snap.cells[-2:] == [None, None]
+
+
+def test_representative_first_and_geohash():
+    points = _track(AMapSnapReGeo('key', [], cell_size=20), cells=3, per_cell=4)
+    first = AMapSnapReGeo('key', points, cell_size=20, representative='first', session=FakeSession())
+    for index, representative in enumerate(first.representative_coordinate):
+        assert representative == pytest.approx(points[index - index % 4], abs=1e-6)
+
+    session = FakeSession()
+    hashed = AMapSnapReGeo('key', points, geohash=6, session=session)
+    assert all(len(cell) == 6 for cell in hashed.cells)
+    assert hashed.unique_cells == len(set(hashed.cells))
+    for cell, representative in zip(hashed.cells, hashed.representative_coordinate):
+        assert representative == pytest.approx(geohash_center(cell), abs=1e-6)
+
+    with pytest.raises(ValueError):
+        AMapSnapReGeo('key', points, representative='last')
+
+
+def test_cache_by_cell():
+    cache = GeocodeCache(precision=6)
+    points = _track(AMapSnapReGeo('key', [], cell_size=20))
+    session = FakeSession()
+    assert AMapSnapReGeo('key', points, session=session, cache=cache).fetch().requests == 1
+    # 同一格网的其他坐标得到相同的代表点，全部命中缓存
+    again = AMapSnapReGeo('key', points[::-1], session=session, cache=cache)
+    assert again.formatted_address[::-1] == AMapSnapReGeo('key', points, session=session, cache=cache).formatted_address
+    assert again.fetch().requests == 0 and again.cache_hits == 10 and len(session.batches) == 1
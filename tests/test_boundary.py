@@ -0,0 +1,72 @@
+# -*- encoding: utf-8 -*-
+"""国界多边形判断"""
+import numpy as np
+import pytest
+
+from geotransform import ChinaBoundary, CoordTrans, CoordTransArray
+
+INSIDE = {
+    '北京': (116.40, 39.90),
+    '乌鲁木齐': (87.62, 43.82),
+    '拉萨': (91.11, 29.65),
+    '漠河': (122.54, 52.97),
+    '香港': (114.17, 22.32),
+    '海口': (110.33, 20.03),
+    '三亚': (109.51, 18.25),
+    '东沙岛': (116.72, 20.70),
+    '永兴岛': (112.33, 16.83),
+    '黄岩岛': (117.75, 15.15),
+    '永暑礁': (112.88, 9.55),
+    '美济礁': (115.53, 9.90),
+    '曾母暗沙': (112.28, 3.97),
+}
+
+OUTSIDE = {
+    '首尔': (126.98, 37.57),
+    '平壤': (125.75, 39.02),
+    '东京': (139.69, 35.69),
+    '乌兰巴托': (106.91, 47.92),
+    '河内': (105.85, 21.03),
+    '岘港': (108.22, 16.05),
+    '胡志明市': (106.70, 10.78),
+    '马尼拉': (120.98, 14.60),
+    '公主港': (118.74, 9.74),
+    '亚庇': (116.07, 5.98),
+    '美里': (113.99, 4.40),
+    '新加坡': (103.82, 1.35),
+    '台北': (121.56, 25.04),
+}
+
+
+@pytest.mark.parametrize('name', INSIDE)
+def test_inside(name):
+    assert ChinaBoundary.contains(*INSIDE[name])
+
+
+@pytest.mark.parametrize('name', OUTSIDE)
+def test_outside(name):
+    assert not ChinaBoundary.contains(*OUTSIDE[name])
+
+
+def test_array_matches_scalar(china_points):
+    lngs, lats = china_points
+    # 加密边界附近的点，使大部分点落在边界单元中
+    index, _ = ChinaBoundary.index()
+    rng = np.random.default_rng(7)
+    border = [i for i, state in enumerate(index) if state == ChinaBoundary.BORDER]
+    cells = rng.choice(border, 5000)
+    lngs = np.concatenate([lngs, ChinaBoundary.lng_min + (cells % ChinaBoundary.n_lng + rng.random(5000)) * 0.25])
+    lats = np.concatenate([lats, ChinaBoundary.lat_min + (cells // ChinaBoundary.n_lng + rng.random(5000)) * 0.25])
+    result = CoordTransArray.in_china(lngs, lats)
+    expected = [ChinaBoundary.contains(lng, lat) for lng, lat in zip(lngs.tolist(), lats.tolist())]
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_precise_conversion():
+    lng, lat = INSIDE['永兴岛']
+    assert CoordTrans.wgs84_to_gcj02(lng, lat, precise=True) == CoordTrans.wgs84_to_gcj02(lng, lat)
+    assert CoordTrans.wgs84_to_gcj02(*OUTSIDE['首尔'], precise=True) == list(OUTSIDE['首尔'])
+    lngs, lats = np.array(list(INSIDE.values()) + list(OUTSIDE.values())).T
+    result = CoordTransArray.wgs84_to_gcj02(lngs, lats, precise=True)
+    moved = (result[0] != lngs) | (result[1] != lats)
+    np.testing.assert_array_equal(moved, [True] * len(INSIDE) + [False] * len(OUTSIDE))
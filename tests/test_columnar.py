@@ -0,0 +1,54 @@
+# -*- encoding: utf-8 -*-
+"""Arrow 数组、表和 Parquet 文件的坐标转换"""
+import numpy as np
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+from geotransform import ArrowConverter, CoordTransArray, Epsg, TransProj  # noqa: E402
+from geotransform.columnar import column_view  # noqa: E402
+
+
+@pytest.fixture
+def table(test_coords):
+    coords = np.tile(test_coords, (4, 1))
+    return pa.table({'id': np.arange(len(coords)), 'lng': coords[:, 0], 'lat': coords[:, 1], 'z': coords[:, 2]})
+
+
+def test_column_view_zero_copy(table):
+    values, mask = column_view(table.column('lng'))
+    assert mask is None and not values.flags.writeable
+    assert np.shares_memory(values, table.column('lng').chunk(0).to_numpy())
+
+    values, mask = column_view(pa.array([1, None, 3], type=pa.int32()))
+    assert mask.tolist() == [False, True, False]
+    assert values[0] == 1.0 and np.isnan(values[1])
+
+
+def test_table_default_output_names(table):
+    result = ArrowConverter('wgs84_to_gcj02').table(table)
+    assert result.column_names == ['id', 'lng', 'lat', 'z', 'lng_gcj02', 'lat_gcj02']
+    lngs, lats = CoordTransArray.wgs84_to_gcj02(table.column('lng').to_numpy(), table.column('lat').to_numpy())
+    assert np.array_equal(result.column('lng_gcj02').to_numpy(), lngs)
+    assert np.array_equal(result.column('lat_gcj02').to_numpy(), lats)
+
+
+def test_nulls_and_replaced_columns():
+    batch = pa.record_batch({'lng': pa.array([113.0, None, 114.0]), 'lat': pa.array([34.0, 35.0, 30.0])})
+    result = ArrowConverter('wgs84_to_gcj02', outputs=('lng', 'lat')).record_batch(batch)
+    assert result.schema.names == ['lng', 'lat']
+    assert result.column(0).null_count == 1 and result.column(1).is_null().to_pylist() == [False, True, False]
+
+
+def test_parquet_row_groups(tmp_path, table):
+    src, dst = str(tmp_path / 'in.parquet'), str(tmp_path / 'out.parquet')
+    pq.write_table(table, src, row_group_size=10)
+    trans = TransProj(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.xian80_gauss_3, target_with_zone=True)
+    stats = ArrowConverter(trans, z='z', outputs=('x', 'y', 'h')).parquet(src, dst)
+    out = pq.ParquetFile(dst)
+    assert stats['rows'] == table.num_rows and stats['row_groups'] == out.num_row_groups == -(-table.num_rows // 10)
+    result = out.read()
+    expected = trans.transform_many(*(table.column(name).to_numpy() for name in ('lng', 'lat', 'z')))
+    assert all(np.array_equal(result.column(name).to_numpy(), values) for name, values in zip(('x', 'y', 'h'), expected))
+    assert result.column('id').to_pylist() == table.column('id').to_pylist()
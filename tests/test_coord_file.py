@@ -0,0 +1,93 @@
+# -*- encoding: utf-8 -*-
+"""二进制坐标文件、.npy 文件的读写和分块转换"""
+import json
+
+import numpy as np
+import pytest
+
+from geotransform import CoordFile, CoordTransArray, Epsg, TransProj
+
+
+@pytest.fixture
+def points(test_coords):
+    return tuple(np.tile(test_coords, (3, 1)).T.copy())
+
+
+def test_header_and_data_offset(tmp_path, points):
+    path = str(tmp_path / 'points.gtc')
+    CoordFile.save(path, *points, crs='wgs84_3d')
+    with open(path, 'rb') as f:
+        assert f.read(8) == CoordFile.magic
+        assert 8 + 4 + int.from_bytes(f.read(4), 'little') == CoordFile.data_offset
+    src = CoordFile.open(path)
+    assert src.header == {'crs': 'wgs84_3d', 'lng0': None, 'with_zone': False, 'shape': [3, len(points[0])]}
+    assert all(np.array_equal(a, b) for a, b in zip(src.columns, points))
+
+
+def test_transform_to_new_file_and_in_place(tmp_path, points):
+    path = str(tmp_path / 'points.gtc')
+    CoordFile.save(path, *points, crs='wgs84_3d')
+    trans = TransProj(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.xian80_gauss_3, target_lng0=114, target_with_zone=True)
+    dst = CoordFile.open(path).transform(trans, str(tmp_path / 'xian80.gtc'), chunk_size=10)
+    assert dst.header['crs'] == 'xian80_gauss_3' and dst.header['lng0'] == 114 and dst.header['with_zone']
+    expected = trans.transform_many(*points)
+    assert all(np.array_equal(a, b) for a, b in zip(CoordFile.open(dst.path).columns, expected))
+
+    # 原地转换：CoordTrans 只转换经纬度，高程原样保留，头部更新为目标坐标系
+    CoordFile.open(path, 'r+').transform('wgs84_to_gcj02', chunk_size=10)
+    src = CoordFile.open(path)
+    lngs, lats = CoordTransArray.wgs84_to_gcj02(points[0], points[1])
+    assert src.crs == 'gcj02'
+    assert np.array_equal(src.columns[0], lngs) and np.array_equal(src.columns[2], points[2])
+
+
+def test_source_zone_must_match(tmp_path, points):
+    trans = TransProj(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.cgcs2000_gauss_3, target_lng0=114)
+    xs, ys, zs = trans.transform_many(*points)
+    path = str(tmp_path / 'cgcs2000.gtc')
+    CoordFile.save(path, xs, ys, zs, crs='cgcs2000_gauss_3', lng0=114)
+    src = CoordFile.open(path)
+
+    back = dict(exist_proj=Epsg.cgcs2000_gauss_3, target_proj=Epsg.wgs84_3d)
+    with pytest.raises(ValueError):
+        src.transform(TransProj(exist_lng0=117, **back), str(tmp_path / 'a.gtc'))
+    with pytest.raises(ValueError):
+        src.transform(TransProj(exist_with_zone=True, **back), str(tmp_path / 'b.gtc'))
+    with pytest.raises(ValueError):
+        src.transform(TransProj(**back), str(tmp_path / 'c.gtc'))
+    with pytest.raises(ValueError):
+        src.transform('wgs84_to_gcj02', str(tmp_path / 'd.gtc'))
+
+    dst = src.transform(TransProj(exist_lng0=114, **back), str(tmp_path / 'e.gtc'))
+    assert np.allclose(dst.columns[0], points[0], atol=1e-8)
+
+
+@pytest.mark.parametrize('layout', ['columns', 'rows'])
+def test_npy_layout(tmp_path, points, layout):
+    path = str(tmp_path / 'points.npy')
+    array = np.array(points[:2])
+    np.save(path, array if layout == 'columns' else array.T.copy())
+    # 没有 .json 文件又没有指定 layout 时无法判断排列方式
+    with pytest.raises(ValueError):
+        CoordFile.open(path)
+
+    src = CoordFile.open(path, 'r+', layout=layout)
+    assert src.count == len(points[0])
+    src.crs = 'wgs84'
+    src.transform('wgs84_to_gcj02')
+    with open(path + '.json', encoding='utf-8') as f:
+        assert json.load(f) == {'crs': 'gcj02', 'lng0': None, 'with_zone': False, 'layout': layout}
+
+    reopened = CoordFile.open(path)
+    lngs, lats = CoordTransArray.wgs84_to_gcj02(points[0], points[1])
+    assert reopened.layout == layout
+    assert np.array_equal(reopened.columns[0], lngs) and np.array_equal(reopened.columns[1], lats)
+
+
+def test_npy_small_shape_is_not_guessed(tmp_path):
+    """3×3 的数组两种排列方式都可能，按指定的 layout 读取"""
+    path = str(tmp_path / 'three.npy')
+    CoordFile.create(path, 3, 3, crs='wgs84_3d').data[:] = np.arange(9.0).reshape(3, 3)
+    assert CoordFile.open(path).layout == 'columns'
+    assert np.array_equal(CoordFile.open(path).columns[0], [0, 1, 2])
+    assert np.array_equal(CoordFile.open(path, layout='rows').columns[0], [0, 3, 6])
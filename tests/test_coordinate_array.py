@@ -0,0 +1,38 @@
+# -*- encoding: utf-8 -*-
+"""CoordTransArray 与 CoordTrans 逐点计算结果一致"""
+import numpy as np
+import pytest
+
+from geotransform import CoordTrans, CoordTransArray
+
+METHODS = ['wgs84_to_gcj02', 'gcj02_to_wgs84', 'gcj02_to_bd09', 'bd09_to_gcj02', 'wgs84_to_bd09', 'bd09_to_wgs84']
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_array_matches_scalar(method, china_points):
+    lngs, lats = china_points
+    result = getattr(CoordTransArray, method)(lngs, lats)
+    expected = np.array([getattr(CoordTrans, method)(lng, lat) for lng, lat in zip(lngs.tolist(), lats.tolist())])
+    np.testing.assert_allclose(result[0], expected[:, 0], rtol=0, atol=1e-12)
+    np.testing.assert_allclose(result[1], expected[:, 1], rtol=0, atol=1e-12)
+
+
+def test_out_of_china_unchanged():
+    lngs = np.array([2.35, -74.0, 139.69])
+    lats = np.array([48.86, 40.71, 35.69])
+    result = CoordTransArray.wgs84_to_gcj02(lngs, lats)
+    np.testing.assert_array_equal(result[0], lngs)
+    np.testing.assert_array_equal(result[1], lats)
+
+
+def test_shape_and_broadcast():
+    lngs = np.full((3, 4), 113.6)
+    result = CoordTransArray.wgs84_to_gcj02(lngs, 34.7)
+    assert result[0].shape == result[1].shape == (3, 4)
+    assert np.allclose(result[0], CoordTrans.wgs84_to_gcj02(113.6, 34.7)[0])
+
+
+def test_scalar_input():
+    result = CoordTransArray.gcj02_to_bd09(113.6, 34.7)
+    assert result[0].shape == ()
+    assert np.allclose(result, CoordTrans.gcj02_to_bd09(113.6, 34.7), rtol=0, atol=1e-12)
@@ -0,0 +1,59 @@
+# -*- encoding: utf-8 -*-
+"""Epsg 的 CRS 缓存和分度带 EPSG 代码表"""
+import numpy as np
+import pytest
+from pyproj import CRS
+
+from geotransform import Epsg
+
+
+def test_crs_cached():
+    assert Epsg.crs(4490) is Epsg.cgcs2000()
+    assert Epsg.cgcs2000_gauss_3(113.9) is Epsg.cgcs2000_gauss_3(114.4)
+
+
+def test_zone_attributes_independent_of_call_order(monkeypatch):
+    monkeypatch.setattr(Epsg, '_crs_cache', {})
+    first = Epsg.crs(4526)
+    crs = Epsg.cgcs2000_gauss_3(114, with_zone=True)
+    assert crs is first
+    assert (crs.index, crs.lng_0) == (38, 114)
+    assert (Epsg.wgs84().index, Epsg.wgs84().lng_0) == (None, None)
+
+
+def test_zone_table_matches_proj_database():
+    for (family, zone_degree, number, with_zone), code in Epsg.zone_epsg.items():
+        name = CRS.from_epsg(code).name
+        lng_0 = (number - 1) * zone_degree + 3
+        expected = 'zone {}'.format(number) if with_zone else 'CM {}E'.format(lng_0)
+        assert expected in name, (family, zone_degree, number, with_zone, code, name)
+        assert Epsg.epsg_zones[code] == (number, lng_0)
+
+
+@pytest.mark.parametrize('method', ['xian80_gauss_3', 'xian80_gauss_6', 'bj54_gauss_3', 'bj_new_gauss_3',
+                                    'bj_new_gauss_6', 'cgcs2000_gauss_3', 'cgcs2000_gauss_6'])
+@pytest.mark.parametrize('with_zone', [False, True])
+def test_zone_epsg_codes_matches_methods(method, with_zone):
+    family, zone_degree = method.rsplit('_gauss_', 1)
+    zone_degree = int(zone_degree)
+    lngs = np.arange(74.0, 136.0, 0.7)
+    codes, numbers, lng0s = Epsg.zone_epsg_codes(family, zone_degree, lngs, with_zone)
+    for lng, code, number, lng0 in zip(lngs.tolist(), codes.tolist(), numbers.tolist(), lng0s.tolist()):
+        crs = getattr(Epsg, method)(lng, with_zone)
+        assert crs.to_epsg() == code
+        assert (crs.index, crs.lng_0) == (number, lng0)
+
+
+def test_zone_epsg_codes_out_of_range():
+    with pytest.raises(ValueError):
+        Epsg.zone_epsg_codes('cgcs2000', 3, [114.0, 150.0])
+    with pytest.raises(ValueError):
+        Epsg.zone_epsg_codes('bj54', 6, [114.0])
+    with pytest.raises(ValueError):
+        Epsg.cgcs2000_gauss_3(60)
+
+
+def test_lookup_arrays_read_only():
+    lookup = Epsg.zone_lookup[('cgcs2000', 3, False)]
+    with pytest.raises(ValueError):
+        lookup[38] = 0
@@ -0,0 +1,52 @@
+# -*- encoding: utf-8 -*-
+"""gcj02_to_wgs84_exact 迭代反算的收敛"""
+import numpy as np
+
+from geotransform import CoordTrans, CoordTransArray
+
+
+def _inside(lngs, lats):
+    inside = ~CoordTransArray.out_of_china(lngs, lats)
+    return lngs[inside], lats[inside]
+
+
+def test_round_trip_converges(china_points):
+    lngs, lats = _inside(*china_points)
+    gcj_lngs, gcj_lats = CoordTransArray.wgs84_to_gcj02(lngs, lats)
+    wgs_lngs, wgs_lats, iterations = CoordTransArray.gcj02_to_wgs84_exact(gcj_lngs, gcj_lats, tolerance=1e-10)
+    # 收敛阈值 1e-10 度，误差远小于 1 毫米
+    assert np.abs(wgs_lngs - lngs).max() < 1e-9
+    assert np.abs(wgs_lats - lats).max() < 1e-9
+    assert iterations.min() >= 1 and iterations.max() <= 10
+
+
+def test_exact_better_than_approximate(china_points):
+    lngs, lats = _inside(*china_points)
+    gcj_lngs, gcj_lats = CoordTransArray.wgs84_to_gcj02(lngs, lats)
+    approx = CoordTransArray.gcj02_to_wgs84(gcj_lngs, gcj_lats)
+    exact = CoordTransArray.gcj02_to_wgs84(gcj_lngs, gcj_lats, exact=True)
+    approx_error = np.hypot(approx[0] - lngs, approx[1] - lats).max()
+    exact_error = np.hypot(exact[0] - lngs, exact[1] - lats).max()
+    assert approx_error > 1e-6  # 一步近似的误差为米级
+    assert exact_error < 1e-8
+
+
+def test_scalar_matches_array():
+    points = [(113.6, 34.7), (121.47, 31.23), (87.6, 43.8), (126.6, 45.7)]
+    lngs, lats = np.array(points).T
+    array_result = CoordTransArray.gcj02_to_wgs84_exact(lngs, lats)
+    for i, (lng, lat) in enumerate(points):
+        wgs_lng, wgs_lat, iterations = CoordTrans.gcj02_to_wgs84_exact(lng, lat)
+        assert abs(wgs_lng - array_result[0][i]) < 1e-12 and abs(wgs_lat - array_result[1][i]) < 1e-12
+        assert iterations == array_result[2][i]
+
+
+def test_out_of_china_not_iterated():
+    assert CoordTrans.gcj02_to_wgs84_exact(2.35, 48.86) == [2.35, 48.86, 0]
+    _, _, iterations = CoordTransArray.gcj02_to_wgs84_exact([2.35, 113.6], [48.86, 34.7])
+    assert iterations[0] == 0 and iterations[1] > 0
+
+
+def test_max_iter_limits_iterations():
+    _, _, iterations = CoordTransArray.gcj02_to_wgs84_exact([113.6], [34.7], tolerance=0, max_iter=4)
+    assert iterations[0] == 4
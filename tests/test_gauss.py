@@ -0,0 +1,85 @@
+# -*- encoding: utf-8 -*-
+"""GaussKruger 正反算与 pyproj（PROJ tmerc）比较"""
+import numpy as np
+import pytest
+from pyproj import Transformer
+
+from geotransform import Epsg, GaussKruger
+
+METHODS = ['xian80_gauss_3', 'xian80_gauss_6', 'bj54_gauss_3', 'bj_new_gauss_3', 'bj_new_gauss_6',
+           'cgcs2000_gauss_3', 'cgcs2000_gauss_6']
+
+# 正算允许的差值（米）、反算允许的差值（度）
+FORWARD_TOLERANCE = 1e-6
+INVERSE_TOLERANCE = 1e-11
+
+
+@pytest.fixture(scope='module')
+def points():
+    rng = np.random.default_rng(5)
+    return rng.uniform(76, 134, 3000), rng.uniform(20, 52, 3000)
+
+
+def _zones(method, lngs):
+    """按分度带分组：[(EpsgCRS, 点的布尔索引), ...]"""
+    proj = getattr(Epsg, method)
+    gauss, zone_degree = GaussKruger.from_proj(proj)
+    numbers, lng0s = gauss.zone_lng0(lngs, zone_degree)
+    return [(proj(lng0, True), numbers == number) for number, lng0 in sorted(set(zip(numbers.tolist(), lng0s.tolist())))]
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_forward_and_inverse_match_pyproj(method, points):
+    lngs, lats = points
+    gauss, zone_degree = GaussKruger.from_proj(method)
+    xs, ys = gauss.forward(lngs, lats, zone_degree, with_zone=True)
+    back_lngs, back_lats = gauss.inverse(xs, ys, zone_degree, with_zone=True)
+    for crs, mask in _zones(method, lngs):
+        # 同一基准面内的投影，不涉及基准转换
+        transformer = Transformer.from_crs(crs.geodetic_crs, crs, always_xy=True)
+        pxs, pys = transformer.transform(lngs[mask], lats[mask])
+        np.testing.assert_allclose(xs[mask], pxs, rtol=0, atol=FORWARD_TOLERANCE)
+        np.testing.assert_allclose(ys[mask], pys, rtol=0, atol=FORWARD_TOLERANCE)
+        plngs, plats = transformer.transform(xs[mask], ys[mask], direction='INVERSE')
+        np.testing.assert_allclose(back_lngs[mask], plngs, rtol=0, atol=INVERSE_TOLERANCE)
+        np.testing.assert_allclose(back_lats[mask], plats, rtol=0, atol=INVERSE_TOLERANCE)
+
+
+@pytest.mark.parametrize('method', [method for method in METHODS if method != 'bj54_gauss_3'])
+def test_matches_wgs84_conversion(method, points):
+    """wgs84 到西安80、新北京、cgcs2000 在 pyproj 中同样是直接投影"""
+    lngs, lats = points
+    gauss, zone_degree = GaussKruger.from_proj(method)
+    xs, ys = gauss.forward(lngs, lats, zone_degree, with_zone=True)
+    for crs, mask in _zones(method, lngs):
+        pxs, pys = Transformer.from_crs(Epsg.wgs84(), crs, always_xy=True).transform(lngs[mask], lats[mask])
+        np.testing.assert_allclose(xs[mask], pxs, rtol=0, atol=FORWARD_TOLERANCE)
+        np.testing.assert_allclose(ys[mask], pys, rtol=0, atol=FORWARD_TOLERANCE)
+
+
+def test_bj54_datum_shift_deviation(points):
+    """北京54 在 PROJ 数据库中部分地区有基准转换参数，这些地区与本模块相差数十米"""
+    lngs, lats = points
+    gauss, zone_degree = GaussKruger.from_proj('bj54_gauss_3')
+    xs, ys = gauss.forward(lngs, lats, zone_degree, with_zone=True)
+    deviations = []
+    for crs, mask in _zones('bj54_gauss_3', lngs):
+        pxs, pys = Transformer.from_crs(Epsg.wgs84(), crs, always_xy=True).transform(lngs[mask], lats[mask])
+        deviations.append(max(np.abs(xs[mask] - pxs).max(), np.abs(ys[mask] - pys).max()))
+    assert min(deviations) < FORWARD_TOLERANCE
+    assert 10 < max(deviations) < 150
+
+
+def test_inverse_with_lng0():
+    gauss = GaussKruger('cgcs2000')
+    xs, ys = gauss.forward([113.2, 114.9], [34.7, 30.1], lng0=114)
+    lngs, lats = gauss.inverse(xs, ys, lng0=114)
+    np.testing.assert_allclose(lngs, [113.2, 114.9], rtol=0, atol=INVERSE_TOLERANCE)
+    np.testing.assert_allclose(lats, [34.7, 30.1], rtol=0, atol=INVERSE_TOLERANCE)
+    with pytest.raises(TypeError):
+        gauss.inverse(xs, ys)
+
+
+def test_from_proj_rejects_geographic():
+    with pytest.raises(ValueError):
+        GaussKruger.from_proj(Epsg.wgs84)
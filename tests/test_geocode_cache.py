@@ -0,0 +1,146 @@
+# -*- encoding: utf-8 -*-
+"""地理编码结果缓存：键的规范化、有效期、超出容量时删除最久未使用的记录、统计信息，以及查询类命中缓存时不发送请求"""
+import json
+import types
+from urllib import parse
+
+import pytest
+
+from geotransform import AMapBulkGeo, AMapGeo, AMapReGeo, GeocodeCache
+from geotransform import geocode_cache
+from geotransform.amap import AMapGeoAndReGeoBase
+
+
+class Clock(object):
+    def __init__(self, now=1000000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(geocode_cache, 'time', types.SimpleNamespace(time=clock))
+    return clock
+
+
+class _Response(object):
+    status_code = 200
+
+    def __init__(self, body):
+        self.body = body
+
+    def json(self, **kwargs):
+        return self.body
+
+
+class FakeSession(object):
+    """地址原样放入地理编码结果，坐标放入逆地理编码结果，记录请求的地址（坐标）"""
+
+    def __init__(self):
+        self.requested = []
+
+    def get(self, url, timeout=None):
+        query = dict(parse.parse_qsl(parse.urlparse(url).query))
+        if 'address' in query:
+            items = query['address'].split('|')
+            body = {'status': '1', 'geocodes': [{'formatted_address': item, 'location': '113.7,34.76'} for item in items]}
+        else:
+            items = query['location'].split('|')
+            codes = [{'formatted_address': item, 'addressComponent': {'adcode': '410105'}} for item in items]
+            body = {'status': '1', 'regeocodes': codes} if query.get('batch') else {'status': '1', 'regeocode': codes[0]}
+        self.requested.extend(items)
+        return _Response(body)
+
+
+def test_key_normalization():
+    cache = GeocodeCache(precision=4)
+    assert cache.key('geo', ' 郑州市　燕庄 ＡＢ\t1号 ') == cache.key('geo', '郑州市燕庄ab1号')
+    assert cache.key('regeo', (113.64536, 34.76271)) == cache.key('regeo', ' 113.6454 , 34.7627 ') == 'regeo|113.6454,34.7627|'
+    # key、sig、batch 等不影响结果的参数不参与缓存键，其他参数的值不区分大小写
+    assert cache.key('geo', '燕庄', {'key': 'a', 'batch': True, 'city': '郑州', 'sig': None}) == 'geo|燕庄|city=郑州'
+    assert cache.key('regeo', (113.6, 34.7), {'extensions': 'ALL'}) == cache.key('regeo', (113.6, 34.7), {'extensions': 'all'})
+    assert cache.key('geo', '燕庄', {'city': '郑州'}) != cache.key('geo', '燕庄', {'city': '开封'})
+
+
+def test_ttl(clock):
+    cache = GeocodeCache(ttl=100)
+    cache.set_many({'a': {'value': 1}, 'b': [1, 2]})
+    clock.now += 50
+    cache.set('c', 3)
+    assert cache.get_many(['a', 'b', 'c', 'd']) == {'a': {'value': 1}, 'b': [1, 2], 'c': 3}
+    # 读取只更新最近使用时间，有效期从写入时算起
+    clock.now += 60
+    assert cache.get_many(['a', 'b', 'c']) == {'c': 3}
+    assert cache.expirations == 2 and len(cache) == 1
+    clock.now += 60
+    assert cache.purge() == 1 and len(cache) == 0
+    assert GeocodeCache(ttl=None).purge() == 0
+
+
+def test_eviction_least_recently_used(clock):
+    cache = GeocodeCache(max_entries=3)
+    for key in 'abc':
+        clock.now += 1
+        cache.set(key, key)
+    clock.now += 1
+    assert cache.get('a') == 'a'
+    clock.now += 1
+    cache.set('d', 'd')
+    # b 最久未使用
+    assert cache.get_many('abcd') == {'a': 'a', 'c': 'c', 'd': 'd'}
+    clock.now += 1
+    cache.set_many([('e', 'e'), ('f', 'f')])
+    assert len(cache) == 3 and cache.evictions == 3
+    assert set(cache.get_many('acdef')) == {'d', 'e', 'f'}
+
+
+def test_stats_and_persistence(tmp_path):
+    path = str(tmp_path / 'geocode.sqlite')
+    cache = GeocodeCache(path)
+    cache.set_many([('a', 1), ('b', 2)])
+    cache.get_many(['a', 'b', 'x', 'a'])
+    assert cache.stats() == {'size': 2, 'hits': 2, 'misses': 1, 'expirations': 0, 'evictions': 0, 'stores': 2,
+                             'hit_rate': 2 / 3}
+    cache.close()
+
+    reopened = GeocodeCache(path)
+    assert reopened.get('b') == 2 and reopened.stats()['hits'] == 1
+    reopened.clear()
+    assert reopened.stats() == {'size': 0, 'hits': 0, 'misses': 0, 'expirations': 0, 'evictions': 0, 'stores': 0,
+                                'hit_rate': 0.0}
+    reopened.close()
+
+
+def test_queries_use_cache():
+    cache = GeocodeCache()
+    session = FakeSession()
+    first = AMapGeo('key', '郑州市 燕庄', city='郑州', session=session, cache=cache)
+    assert first.formatted_address == '郑州市 燕庄'
+    second = AMapGeo('key', '郑州市燕庄', city='郑州', session=session, cache=cache)
+    assert second.formatted_address == '郑州市 燕庄' and second.coordinate == (113.7, 34.76)
+    assert session.requested == ['郑州市 燕庄']
+
+    regeo = AMapReGeo('key', '113.645356,34.762716', session=session, cache=cache)
+    assert regeo.adcode == '410105'
+    assert AMapReGeo('key', '113.645361,34.762718', session=session, cache=cache).adcode == '410105'
+    assert len(session.requested) == 2
+
+    # 批量查询只请求未命中的地址
+    bulk = AMapBulkGeo('key', ['郑州市燕庄', '开封', '洛阳'], city='郑州', session=session, cache=cache)
+    assert bulk.formatted_address == ['郑州市 燕庄', '开封', '洛阳']
+    assert bulk.cache_hits == 1 and bulk.requests == 1 and session.requested[2:] == ['开封', '洛阳']
+    assert json.dumps(cache.stats())
+
+
+def test_base_without_cache_hooks():
+    class Query(AMapGeoAndReGeoBase):
+        pass
+
+    session = FakeSession()
+    cache = GeocodeCache()
+    query = Query('http://localhost/v3/geocode/geo', session=session, cache=cache, key='key', address='燕庄')
+    assert query()['geocodes'][0]['formatted_address'] == '燕庄'
+    assert len(cache) == 0 and cache.stats()['misses'] == 0
@@ -0,0 +1,103 @@
+# -*- encoding: utf-8 -*-
+"""GeoJSON、WKT、WKB 几何对象的坐标转换：结构不变，每个顶点与逐点的数组转换一致"""
+import copy
+import struct
+
+import numpy as np
+import pytest
+
+from geotransform import CoordTransArray, GeometryTransformer
+
+RING = [[114.0, 30.0], [114.1, 30.0], [114.1, 30.1], [114.0, 30.0]]
+
+
+def _gcj02(points):
+    points = np.asarray(points, dtype=np.float64)
+    return np.column_stack(CoordTransArray.wgs84_to_gcj02(points[:, 0], points[:, 1]))
+
+
+@pytest.fixture
+def transformer():
+    return GeometryTransformer('wgs84_to_gcj02')
+
+
+def test_geojson_structure(transformer):
+    collection = {'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {'id': 1}, 'geometry': {'type': 'Point', 'coordinates': [113.5, 34.7]}},
+        {'type': 'Feature', 'properties': {'id': 2}, 'geometry': {'type': 'LineString', 'coordinates': RING[:3]}},
+        {'type': 'Feature', 'properties': {'id': 3}, 'geometry': {'type': 'MultiPolygon', 'coordinates': [[RING], [RING[::-1]]]}},
+        {'type': 'Feature', 'properties': None, 'geometry': {'type': 'GeometryCollection', 'geometries': [
+            {'type': 'MultiPoint', 'coordinates': [[115.0, 35.0, 12.5]]},
+            {'type': 'LineString', 'coordinates': []},
+        ]}},
+    ]}
+    original = copy.deepcopy(collection)
+    result = transformer.geojson(collection)
+    assert collection == original
+
+    features = result['features']
+    assert [feature['properties'] for feature in features] == [{'id': 1}, {'id': 2}, {'id': 3}, None]
+    assert np.array_equal(features[0]['geometry']['coordinates'], _gcj02([[113.5, 34.7]])[0])
+    assert np.array_equal(features[1]['geometry']['coordinates'], _gcj02(RING[:3]))
+    polygons = features[2]['geometry']['coordinates']
+    assert np.array_equal(polygons[0][0], _gcj02(RING)) and np.array_equal(polygons[1][0], _gcj02(RING[::-1]))
+    multipoint, empty = features[3]['geometry']['geometries']
+    # 高程原样保留，空的坐标序列不变
+    assert np.array_equal(multipoint['coordinates'], [list(_gcj02([[115.0, 35.0]])[0]) + [12.5]])
+    assert empty['coordinates'] == []
+
+
+def test_wkt(transformer):
+    expected = _gcj02(RING)
+    text = transformer.wkt('POLYGON ((%s))' % ', '.join('%r %r' % tuple(point) for point in RING))
+    values = np.array(text[len('POLYGON (('):-2].replace(',', ' ').split(), dtype=np.float64).reshape(-1, 2)
+    assert np.array_equal(values, expected)
+
+    z, m = GeometryTransformer('wgs84_to_gcj02', precision=6).wkt(['POINT Z (114 30 7)', 'POINT M (114 30 7)'])
+    lng, lat = expected[0]
+    assert z == 'POINT Z (%.6f %.6f 7.000000)' % (lng, lat)
+    assert m == 'POINT M (%.6f %.6f 7.000000)' % (lng, lat)
+
+
+def _wkb_linestring(points, order='<', kind=2, srid=None):
+    dims = len(points[0])
+    data = struct.pack(order + 'BI', 1 if order == '<' else 0, kind | (0x20000000 if srid else 0))
+    if srid:
+        data += struct.pack(order + 'I', srid)
+    data += struct.pack(order + 'I', len(points))
+    return data + struct.pack(order + '%dd' % (len(points) * dims), *[v for point in points for v in point])
+
+
+def _wkb_values(data, count, dims, order='<', offset=9):
+    return np.array(struct.unpack_from(order + '%dd' % (count * dims), data, offset)).reshape(count, dims)
+
+
+def test_wkb_flags(transformer):
+    expected = _gcj02(RING)
+    xy, big_endian, iso_z, ewkb_zm = transformer.wkb([
+        _wkb_linestring(RING),
+        _wkb_linestring(RING, order='>'),
+        _wkb_linestring([point + [50.0] for point in RING], kind=1002),
+        _wkb_linestring([point + [50.0, 9.0] for point in RING], kind=0x80000000 | 0x40000000 | 2, srid=4326),
+    ])
+    assert np.array_equal(_wkb_values(xy, 4, 2), expected)
+    assert np.array_equal(_wkb_values(big_endian, 4, 2, '>'), expected)
+    values = _wkb_values(iso_z, 4, 3)
+    assert np.array_equal(values[:, :2], expected) and (values[:, 2] == 50).all()
+    # EWKB：SRID 保留，M 值不参与转换
+    assert struct.unpack_from('<I', ewkb_zm, 5)[0] == 4326
+    values = _wkb_values(ewkb_zm, 4, 4, offset=13)
+    assert np.array_equal(values[:, :2], expected) and (values[:, 2] == 50).all() and (values[:, 3] == 9).all()
+
+
+def test_wkb_collections(transformer):
+    polygon = struct.pack('<BII', 1, 3, 1) + struct.pack('<I', len(RING)) + struct.pack('<8d', *sum(RING, []))
+    point = struct.pack('<BI2d', 1, 1, 113.5, 34.7)
+    collection = struct.pack('<BII', 1, 7, 2) + polygon + point
+    result = transformer.wkb(collection)
+    assert isinstance(result, bytes) and len(result) == len(collection)
+    assert np.array_equal(_wkb_values(result, 4, 2, offset=9 + 13), _gcj02(RING))
+    assert np.array_equal(_wkb_values(result, 1, 2, offset=9 + len(polygon) + 5), _gcj02([[113.5, 34.7]]))
+
+    with pytest.raises(ValueError):
+        transformer.wkb(struct.pack('<BII', 1, 17, 0))
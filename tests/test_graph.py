@@ -0,0 +1,82 @@
+# -*- encoding: utf-8 -*-
+"""坐标系转换图：路径查找、计划编译与缓存、整条路径与逐步转换一致"""
+import numpy as np
+import pytest
+
+from geotransform import ConversionGraph, CoordTransArray, Epsg, TransProj, conversion_graph
+from geotransform.graph import epsg_nodes
+
+
+def test_epsg_nodes_are_crs_methods():
+    assert epsg_nodes() == sorted(Epsg.methods)
+    assert set(epsg_nodes()) <= set(conversion_graph.nodes)
+    assert not {'crs', 'calc_number', 'calc_number_lng0', 'zone_epsg_codes'} & set(conversion_graph.nodes)
+
+
+def test_path_and_cost():
+    graph = ConversionGraph()
+    step = lambda source_params, target_params, options: lambda *columns: columns  # noqa: E731
+    graph.register('a', 'b', step)
+    graph.register('b', 'c', step)
+    graph.register('a', 'c', step, cost=5)
+    assert graph.path('a', 'c') == ['a', 'b', 'c']
+    assert graph.path('a', 'a') == ['a']
+    with pytest.raises(ValueError):
+        graph.path('c', 'a')
+
+
+def test_bd09_to_gauss_matches_steps(test_coords):
+    lngs, lats = test_coords[:, 0], test_coords[:, 1]
+    bd_lngs, bd_lats = CoordTransArray.wgs84_to_bd09(lngs, lats)
+    plan = conversion_graph.compile('bd09', 'cgcs2000_gauss_3', target_with_zone=True, exact=True)
+    assert plan.path == ['bd09', 'wgs84', 'cgcs2000_gauss_3']
+    assert conversion_graph.compile('bd09', 'cgcs2000_gauss_3', target_with_zone=True, exact=True) is plan
+
+    xs, ys = plan(bd_lngs, bd_lats)
+    wgs_lngs, wgs_lats = CoordTransArray.bd09_to_wgs84(bd_lngs, bd_lats, exact=True)
+    expected = TransProj(exist_proj=Epsg.wgs84, target_proj=Epsg.cgcs2000_gauss_3,
+                         target_with_zone=True).transform_many(wgs_lngs, wgs_lats)
+    assert np.array_equal(xs, expected[0]) and np.array_equal(ys, expected[1])
+
+
+def test_projected_source_with_height(test_coords):
+    trans = TransProj(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.xian80_gauss_3, target_with_zone=True)
+    xs, ys, zs = trans.transform_many(*test_coords.T)
+    lngs, lats, heights = conversion_graph.transform('xian80_gauss_3', 'gcj02', xs, ys, zs, source_with_zone=True)
+    expected = CoordTransArray.wgs84_to_gcj02(*TransProj(
+        exist_proj=Epsg.xian80_gauss_3, exist_with_zone=True, target_proj=Epsg.wgs84_3d).transform_many(xs, ys, zs)[:2])
+    assert np.allclose(lngs, expected[0], atol=1e-9) and np.allclose(lats, expected[1], atol=1e-9)
+    assert heights.shape == zs.shape
+
+
+def test_plan_cache_bounded_lru():
+    graph = ConversionGraph(maxsize=2)
+    step = lambda source_params, target_params, options: lambda *columns: columns  # noqa: E731
+    for source, target in (('a', 'b'), ('b', 'c'), ('c', 'd')):
+        graph.register(source, target, step)
+    ab = graph.compile('a', 'b')
+    bc = graph.compile('b', 'c')
+    assert graph.compile('a', 'b') is ab
+    # b -> c 最久未使用，被淘汰
+    graph.compile('c', 'd')
+    assert len(graph._plans) == 2
+    assert graph.compile('a', 'b') is ab and graph.compile('b', 'c') is not bc
+
+
+def test_plan_cache_keyed_by_grid_identity(tmp_path):
+    from geotransform import OffsetGrid
+
+    graph = ConversionGraph()
+    step = lambda source_params, target_params, options: lambda *columns: columns  # noqa: E731
+    graph.register('a', 'b', step)
+    built = OffsetGrid.build(0.5)
+    plan = graph.compile('a', 'b', grid=built)
+    # 相同参数生成的格网视为同一个，不因对象不同而重复编译
+    assert graph.compile('a', 'b', grid=OffsetGrid.build(0.5)) is plan
+    assert graph.compile('a', 'b', grid=OffsetGrid.build(1.0)) is not plan
+
+    path = str(tmp_path / 'grid.bin')
+    built.save(path)
+    loaded = graph.compile('a', 'b', grid=OffsetGrid.load(path))
+    assert loaded is not plan and graph.compile('a', 'b', grid=OffsetGrid.load(path, mmap=False)) is loaded
+    assert len(graph._plans) == 3
@@ -0,0 +1,83 @@
+# -*- encoding: utf-8 -*-
+"""七参数拟合、应用、反向转换及 TransProj 的 datum_shift"""
+import numpy as np
+import pytest
+from pyproj import Transformer
+
+from geotransform import Epsg, GaussKruger, Helmert, TransProj, TransformerCache
+from geotransform.helmert import geocentric, geodetic
+
+PARAMS = dict(tx=-15.4, ty=112.6, tz=48.2, rx=1.2, ry=-0.8, rz=2.1, s=-3.5)
+
+
+@pytest.fixture
+def geodetic_points():
+    rng = np.random.default_rng(20201016)
+    return rng.uniform(110, 118, 50), rng.uniform(28, 38, 50), rng.uniform(0, 2000, 50)
+
+
+def test_geocentric_round_trip(geodetic_points):
+    lngs, lats, heights = geodetic_points
+    result = geodetic(*geocentric(lngs, lats, heights, 'xian80'), 'xian80')
+    assert np.abs(result[0] - lngs).max() < 1e-10 and np.abs(result[1] - lats).max() < 1e-10
+    assert np.abs(result[2] - heights).max() < 1e-4
+
+
+def test_fit_recovers_parameters(geodetic_points):
+    source = np.column_stack(geocentric(*geodetic_points, 'krasovsky'))
+    target = np.column_stack(Helmert(**PARAMS).apply(*source.T))
+    helmert = Helmert.fit(source, target)
+    # 线性化模型忽略尺度与旋转的乘积项，残差为亚毫米级
+    assert helmert.params == pytest.approx(tuple(PARAMS[name] for name in Helmert.names), abs=1e-4)
+    assert helmert.rms < 1e-3
+
+    geo = Helmert.fit_geodetic(np.column_stack(geodetic_points),
+                               np.column_stack(Helmert(**PARAMS).apply_geodetic(*geodetic_points, 'xian80', 'cgcs2000')),
+                               'xian80', 'cgcs2000')
+    assert geo.params == pytest.approx(helmert.params, abs=1e-4)
+
+    with pytest.raises(ValueError):
+        Helmert.fit(source[:2], target[:2])
+    with pytest.raises(ValueError):
+        Helmert.fit(source[:, :2], target[:, :2])
+
+
+def test_inverse_round_trip(geodetic_points):
+    helmert = Helmert(**PARAMS)
+    source = geocentric(*geodetic_points, 'xian80')
+    back = helmert.inverse().apply(*helmert.apply(*source))
+    # 参数取反是一阶近似，往返误差为二阶小量（毫米级）
+    assert max(np.abs(a - b).max() for a, b in zip(back, source)) < 5e-3
+
+
+def test_apply_matches_proj_helmert(geodetic_points):
+    helmert = Helmert(**PARAMS)
+    source = geocentric(*geodetic_points, 'xian80')
+    proj = Transformer.from_pipeline('+proj=pipeline +step ' + helmert.proj_step()).transform(*source)
+    assert max(np.abs(a - b).max() for a, b in zip(helmert.apply(*source), proj)) < 1e-6
+
+
+def test_trans_proj_datum_shift(geodetic_points):
+    helmert = Helmert(**PARAMS)
+    lngs, lats, _ = geodetic_points
+    xian80, zone_degree = GaussKruger.from_proj(Epsg.xian80_gauss_3)
+    cgcs2000, _ = GaussKruger.from_proj(Epsg.cgcs2000_gauss_3)
+    xs, ys = xian80.forward(lngs, lats, zone_degree, with_zone=True)
+
+    trans = TransProj(exist_proj=Epsg.xian80_gauss_3, exist_with_zone=True, target_proj=Epsg.cgcs2000_gauss_3,
+                      target_with_zone=True, datum_shift=helmert, cache=TransformerCache())
+    result = trans.transform_many(xs, ys)
+    shifted = helmert.apply_geodetic(lngs, lats, 0.0, 'xian80', 'cgcs2000')
+    expected = cgcs2000.forward(shifted[0], shifted[1], zone_degree, with_zone=True)
+    assert max(np.abs(a - b).max() for a, b in zip(result, expected)) < 1e-3
+    assert trans.conversion.endswith('_helmert')
+    assert trans((xs[0], ys[0])) == pytest.approx((result[0][0], result[1][0]), abs=1e-6)
+
+
+def test_save_load(tmp_path, geodetic_points):
+    source = np.column_stack(geocentric(*geodetic_points, 'krasovsky'))
+    helmert = Helmert.fit(source, np.column_stack(Helmert(**PARAMS).apply(*source.T)))
+    path = str(tmp_path / 'helmert.json')
+    helmert.save(path)
+    loaded = Helmert.load(path)
+    assert loaded.params == helmert.params and loaded.key == helmert.key
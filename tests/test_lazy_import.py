@@ -0,0 +1,42 @@
+# -*- encoding: utf-8 -*-
+"""包的延迟导入：导出的名称都能取得，CoordTrans 不导入 numpy、pyproj、requests"""
+import os
+import sys
+import json
+import importlib.util
+import subprocess
+
+import pytest
+
+import geotransform
+from conftest import ROOT
+
+SCRIPT = """
+import sys, json, importlib.util
+spec = importlib.util.spec_from_file_location('geotransform', {init!r}, submodule_search_locations=[{root!r}])
+package = importlib.util.module_from_spec(spec)
+sys.modules['geotransform'] = package
+spec.loader.exec_module(package)
+from geotransform import CoordTrans
+CoordTrans.wgs84_to_gcj02(114.0, 30.0)
+print(json.dumps([name for name in ('numpy', 'pyproj', 'requests') if name in sys.modules]))
+"""
+
+
+def test_exports_resolve():
+    for name, module_name in geotransform._exports.items():
+        if module_name == 'columnar' and importlib.util.find_spec('pyarrow') is None:
+            continue
+        if module_name == 'amap_async' and importlib.util.find_spec('aiohttp') is None:
+            continue
+        module = importlib.import_module('geotransform.' + module_name)
+        assert getattr(geotransform, name) is getattr(module, name)
+    assert set(geotransform.__all__) <= set(dir(geotransform))
+    with pytest.raises(AttributeError):
+        geotransform.no_such_name
+
+
+def test_coord_trans_imports_no_heavy_packages():
+    script = SCRIPT.format(init=os.path.join(ROOT, '__init__.py'), root=ROOT)
+    output = subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True).stdout
+    assert json.loads(output.strip().splitlines()[-1]) == []
@@ -0,0 +1,131 @@
+# -*- encoding: utf-8 -*-
+"""运行指标：注册表、Prometheus 文本，以及逐点、数组转换和 transformer 缓存的埋点"""
+import logging
+
+import numpy as np
+import pytest
+
+from geotransform import CoordTrans, CoordTransArray, Epsg, ParallelTransformer, TransProj, TransformerCache
+from geotransform.metrics import LoggingSink, Metrics, PrometheusTextSink, metrics
+
+POINTS = 'geotransform_points_total'
+
+
+@pytest.fixture
+def enabled():
+    """开启进程内共享的 metrics，结束后清空并恢复原状态"""
+    state, sinks = metrics.enabled, metrics.sinks
+    metrics.reset()
+    events = []
+    metrics.enable(lambda *event: events.append(event))
+    yield events
+    metrics.enabled, metrics.sinks = state, sinks
+    metrics.reset()
+
+
+def test_registry_and_prometheus(tmp_path):
+    registry = Metrics()
+    registry.inc('requests_total', api='geo')
+    assert registry.counter('requests_total', api='geo') == 0
+
+    registry.enable()
+    registry.describe('seconds', 'request seconds', buckets=(0.1, 1.0))
+    registry.inc('requests_total', 2, api='geo')
+    registry.inc('requests_total', api='geo')
+    registry.observe('seconds', 0.05)
+    registry.observe('seconds', 5)
+    assert registry.counter('requests_total', api='geo') == 3
+    assert registry.histogram('seconds') == {'buckets': [(0.1, 1), (1.0, 1), (float('inf'), 2)], 'sum': 5.05, 'count': 2}
+
+    text = registry.prometheus()
+    assert 'requests_total{api="geo"} 3' in text
+    assert '# HELP seconds request seconds' in text and 'seconds_bucket{le="+Inf"} 2' in text
+    path = str(tmp_path / 'metrics.prom')
+    registry.dump(path)
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == text
+
+    registry.reset()
+    assert registry.prometheus() == ''
+
+
+def test_sinks(tmp_path, caplog):
+    registry = Metrics()
+    path = str(tmp_path / 'metrics.prom')
+    registry.enable(LoggingSink(), PrometheusTextSink(path, interval=0, registry=registry))
+    with caplog.at_level(logging.DEBUG, logger='geotransform.metrics'):
+        registry.inc('events_total', kind='a')
+    assert 'events_total' in caplog.text
+    with open(path, encoding='utf-8') as f:
+        assert 'events_total{kind="a"} 1' in f.read()
+    with pytest.raises(TypeError):
+        registry.add_sink('not callable')
+
+
+def test_scalar_coord_trans_not_counted(enabled):
+    # 逐点转换不埋点，点数只在批量转换的入口统计
+    CoordTrans.wgs84_to_gcj02(114.0, 30.0)
+    CoordTrans.bd09_to_wgs84(bd_lon=114.0, bd_lat=30.0, exact=True)
+    assert metrics.snapshot() == {'counters': {}, 'histograms': {}} and enabled == []
+
+
+def test_nested_array_conversion(enabled):
+    CoordTransArray.bd09_to_wgs84(bd_lon=np.array([114.0, 115.0]), bd_lat=np.array([30.0, 31.0]), exact=True)
+    # 组合转换只记录最外层
+    assert metrics.counter(POINTS, conversion='bd09_to_wgs84') == 2
+    assert metrics.counter(POINTS, conversion='bd09_to_gcj02') == 0
+    assert ('counter', POINTS, 2, {'conversion': 'bd09_to_wgs84'}) in enabled
+
+
+def test_failed_conversion_not_counted(enabled):
+    with pytest.raises(ValueError):
+        CoordTransArray.wgs84_to_gcj02(np.zeros(3), np.zeros(4))
+    class Failing(object):
+        def transform(self, *columns):
+            raise RuntimeError('转换失败')
+
+    trans = TransProj(transformer=Failing())
+    with pytest.raises(RuntimeError):
+        trans.transform_many(np.zeros(3), np.zeros(3))
+    with pytest.raises(RuntimeError):
+        trans((114.0, 30.0))
+    assert metrics.counter(POINTS, conversion='wgs84_to_gcj02') == 0
+    assert metrics.counter(POINTS, conversion=trans.conversion) == 0
+    assert metrics.histogram('geotransform_batch_size', conversion='wgs84_to_gcj02') is None
+    # 转换失败后嵌套标记已复位，之后的转换照常统计
+    CoordTransArray.wgs84_to_gcj02(np.zeros(3), np.zeros(3))
+    assert metrics.counter(POINTS, conversion='wgs84_to_gcj02') == 3
+
+
+def test_parallel_counted_in_parent(enabled, test_coords):
+    with ParallelTransformer.coord_trans('wgs84_to_gcj02', workers=1, chunk_size=10) as pt:
+        pt.transform(test_coords[:, 0], test_coords[:, 1])
+    assert metrics.counter(POINTS, conversion='wgs84_to_gcj02') == len(test_coords)
+    assert metrics.histogram('geotransform_batch_size', conversion='wgs84_to_gcj02')['count'] == 1
+
+
+def test_array_and_trans_proj(enabled, test_coords):
+    CoordTransArray.gcj02_to_wgs84(test_coords[:, 0], test_coords[:, 1], exact=True)
+    assert metrics.counter(POINTS, conversion='gcj02_to_wgs84') == len(test_coords)
+    assert metrics.counter(POINTS, conversion='gcj02_to_wgs84_exact') == 0
+    assert metrics.histogram('geotransform_batch_size', conversion='gcj02_to_wgs84')['count'] == 1
+
+    cache = TransformerCache()
+    trans = TransProj(exist_proj=Epsg.wgs84, target_proj=Epsg.cgcs2000_gauss_3, target_lng0=114, cache=cache)
+    trans.transform_many(test_coords[:, 0], test_coords[:, 1])
+    trans((114.0, 30.0))
+    assert metrics.counter(POINTS, conversion=trans.conversion) == len(test_coords) + 1
+    assert metrics.counter('geotransform_transformer_cache_misses_total', source='crs') == 1
+    assert metrics.counter('geotransform_transformer_cache_hits_total') >= 1
+
+
+def test_disabled_records_nothing(test_coords):
+    registry_state = metrics.enabled
+    metrics.disable()
+    metrics.reset()
+    try:
+        CoordTrans.wgs84_to_gcj02(114.0, 30.0)
+        CoordTransArray.wgs84_to_gcj02(np.array([114.0]), np.array([30.0]))
+        assert metrics.snapshot() == {'counters': {}, 'histograms': {}}
+    finally:
+        metrics.enabled = registry_state
@@ -0,0 +1,76 @@
+# -*- encoding: utf-8 -*-
+"""偏移量格网的插值误差和文件读写"""
+import numpy as np
+import pytest
+
+from geotransform import CoordTransArray, OffsetGrid
+
+
+@pytest.fixture(scope='module')
+def grid():
+    return OffsetGrid.build(0.05)
+
+
+def _random_points(n=100000):
+    rng = np.random.default_rng(3)
+    return rng.uniform(OffsetGrid.lng_min, OffsetGrid.lng_max, n), rng.uniform(OffsetGrid.lat_min, OffsetGrid.lat_max, n)
+
+
+def test_error_within_reported_bound(grid):
+    lngs, lats = _random_points()
+    expected = CoordTransArray._offset(lngs, lats)
+    result = grid.interpolate(lngs, lats)
+    error = max(np.abs(result[0] - expected[0]).max(), np.abs(result[1] - expected[1]).max())
+    assert error <= grid.max_error
+    # 0.05 度格网的最大误差约为 2.4e-5 度（约 2.7 米）
+    assert grid.max_error < 3e-5
+
+
+def test_error_scales_with_resolution_squared(grid):
+    coarse = OffsetGrid.build(0.1)
+    assert 3 < coarse.max_error / grid.max_error < 5
+
+
+def test_conversion_with_grid(grid):
+    lngs, lats = _random_points(10000)
+    exact = CoordTransArray.wgs84_to_gcj02(lngs, lats)
+    fast = CoordTransArray.wgs84_to_gcj02(lngs, lats, grid=grid)
+    assert np.abs(fast[0] - exact[0]).max() <= grid.max_error
+    assert np.abs(fast[1] - exact[1]).max() <= grid.max_error
+
+
+def test_check_samples_edge_midpoints(grid):
+    # 只比较单元中心得到的误差偏小
+    n_lat, n_lng = grid.shape
+    lngs, lats = np.meshgrid(grid.lng_min + (np.arange(n_lng - 1) + 0.5) * grid.resolution,
+                             grid.lat_min + (np.arange(n_lat - 1) + 0.5) * grid.resolution)
+    expected = CoordTransArray._offset(lngs, lats)
+    result = grid.interpolate(lngs, lats)
+    centers = max(np.abs(result[0] - expected[0]).max(), np.abs(result[1] - expected[1]).max())
+    assert centers < grid.max_error == grid.check()
+    # 更密的等分点包含中心和各边中点
+    assert grid.max_error <= grid.check(subdivisions=4) < grid.max_error * 1.1
+    with pytest.raises(ValueError):
+        grid.check(subdivisions=1)
+
+
+def test_tolerance(grid):
+    with pytest.raises(ValueError):
+        OffsetGrid.build(0.1, tolerance=grid.max_error)
+
+
+@pytest.mark.parametrize('mmap', [True, False])
+def test_save_load(grid, tmp_path, mmap):
+    path = str(tmp_path / 'grid.bin')
+    grid.save(path)
+    loaded = OffsetGrid.load(path, mmap=mmap)
+    assert isinstance(loaded.data, np.memmap) == mmap
+    assert loaded.resolution == grid.resolution and loaded.max_error == grid.max_error
+    np.testing.assert_array_equal(loaded.data, grid.data)
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'not a grid file')
+    with pytest.raises(ValueError):
+        OffsetGrid.load(str(path))
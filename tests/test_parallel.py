@@ -0,0 +1,77 @@
+# -*- encoding: utf-8 -*-
+"""多进程并行转换：结果与单进程一致，工作进程只预热第一块涉及的分度带"""
+import numpy as np
+import pytest
+
+from geotransform import CoordTransArray, Epsg, ParallelTransformer, TransProj, TransformerCache
+from geotransform import parallel, projection
+
+KWARGS = dict(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.xian80_gauss_3, target_with_zone=True)
+
+
+@pytest.fixture
+def zone_columns():
+    """经度 101~125 度（9 个 3 度带）的随机坐标，按经度排序，使第一块只涉及最西边的分度带"""
+    rng = np.random.default_rng(20201016)
+    lngs = np.sort(rng.uniform(101, 125, 4000))
+    return lngs, rng.uniform(20, 45, 4000), rng.uniform(0, 500, 4000)
+
+
+def test_trans_proj_matches_single_process(zone_columns):
+    expected = TransProj(**KWARGS).transform_many(*zone_columns)
+    with ParallelTransformer.trans_proj(workers=2, chunk_size=500, **KWARGS) as pt:
+        result = pt.transform(*zone_columns)
+        # 第二次转换重复使用进程池
+        again = pt.transform(*(column[::-1] for column in zone_columns))
+    assert all(np.array_equal(a, b) for a, b in zip(result, expected))
+    assert all(np.array_equal(a, b[::-1]) for a, b in zip(again, expected))
+
+
+def test_coord_trans_matches_single_process(zone_columns):
+    lngs, lats = zone_columns[0], zone_columns[1]
+    expected = CoordTransArray.wgs84_to_gcj02(lngs, lats)
+    with ParallelTransformer.coord_trans('wgs84_to_gcj02', workers=2, chunk_size=700) as pt:
+        result = pt.transform(lngs, lats)
+    assert all(np.array_equal(a, b) for a, b in zip(result, expected))
+
+
+def test_shape_and_empty_input(zone_columns):
+    lngs, lats = zone_columns[0][:6].reshape(2, 3), zone_columns[1][:6].reshape(2, 3)
+    with ParallelTransformer.coord_trans('wgs84_to_gcj02', workers=1) as pt:
+        result = pt.transform(lngs, lats)
+        empty = pt.transform([], [])
+    assert result[0].shape == (2, 3)
+    assert empty[0].shape == (0,)
+
+
+def test_warm_keys_from_first_chunk(zone_columns):
+    lngs = zone_columns[0]
+    pt = ParallelTransformer.trans_proj(workers=1, chunk_size=100, **KWARGS)
+    pt._prepare_warm_up(lngs)
+    assert pt._warm_keys == TransProj(**KWARGS).zone_keys(xs=lngs[:100])
+    assert len(pt._warm_keys) == 1
+
+    # 指定预热经度时不按第一块计算
+    explicit = ParallelTransformer.trans_proj(warm_lngs=[114], workers=1, **KWARGS)
+    explicit._prepare_warm_up(lngs)
+    assert explicit._warm_keys is None
+
+
+def test_worker_warms_only_given_keys(monkeypatch):
+    cache = TransformerCache()
+    monkeypatch.setattr(projection, 'transformer_cache', cache)
+    parallel._build_func(('trans_proj', KWARGS, None), [(None, 102), (None, 105)])
+    assert len(cache) == 2
+
+    parallel._build_func(('trans_proj', KWARGS, None))
+    assert len(cache) == 2
+
+    parallel._build_func(('trans_proj', KWARGS, [111, 114, 117]), [(None, 102)])
+    assert len(cache) == 5
+
+
+def test_rejects_cache_and_grid_objects():
+    with pytest.raises(ValueError):
+        ParallelTransformer.trans_proj(cache=TransformerCache(), **KWARGS)
+    with pytest.raises(ValueError):
+        ParallelTransformer.coord_trans('no_such_method')
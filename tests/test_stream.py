@@ -0,0 +1,94 @@
+# -*- encoding: utf-8 -*-
+"""CsvConverter 流式分块转换和命令行 convert"""
+import io
+import argparse
+
+import numpy as np
+import pytest
+
+from geotransform import CoordTransArray, CsvConverter, Epsg, TransProj
+from geotransform.__main__ import epsg_method, main
+
+
+def _write_csv(path, rows, blank_after=()):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for i, row in enumerate(rows):
+            f.write(','.join('%.8f' % v for v in row) + '\n')
+            if i in blank_after:
+                f.write('\n')
+
+
+def test_convert_matches_array_method(tmp_path, test_coords):
+    src, dst = str(tmp_path / 'in.csv'), str(tmp_path / 'out.csv')
+    _write_csv(src, test_coords)
+    stats = CsvConverter('wgs84_to_gcj02', precision=8, chunk_size=7).convert(src, dst)
+    assert stats['points'] == len(test_coords) and stats['chunks'] == -(-len(test_coords) // 7)
+    expected = np.column_stack(CoordTransArray.wgs84_to_gcj02(test_coords[:, 0], test_coords[:, 1]))
+    assert np.allclose(np.loadtxt(dst, delimiter=','), expected, atol=1e-8)
+
+
+def test_three_columns_through_coord_method(tmp_path, test_coords):
+    """CoordTransArray 方法只转换经纬度，第三列（高程）原样输出"""
+    src, dst = str(tmp_path / 'in.csv'), str(tmp_path / 'out.csv')
+    _write_csv(src, test_coords)
+    CsvConverter('wgs84_to_gcj02', columns=(0, 1, 2), precision=3).convert(src, dst)
+    result = np.loadtxt(dst, delimiter=',')
+    assert result.shape == test_coords.shape
+    assert np.allclose(result[:, 2], test_coords[:, 2], atol=1e-3)
+
+
+def test_keep_columns_with_blank_lines(test_coords):
+    """空行原样输出，之后各行的坐标不错位"""
+    rows = test_coords[:6]
+    src = io.StringIO('id,lng,lat\n' + ''.join(
+        'p%d,%.8f,%.8f\n%s' % (i, lng, lat, '\n' if i in (1, 4) else '') for i, (lng, lat, _) in enumerate(rows)))
+    dst = io.StringIO()
+    stats = CsvConverter('wgs84_to_gcj02', columns=(1, 2), precision=8, chunk_size=4, skip_header=1,
+                         keep_columns=True).convert(src, dst)
+    lines = dst.getvalue().split('\n')
+    assert stats['points'] == 6
+    assert lines[0] == 'id,lng,lat'
+    assert lines[3] == '' and lines[7] == ''
+    data = [line.split(',') for line in lines[1:] if line]
+    assert [fields[0] for fields in data] == ['p%d' % i for i in range(6)]
+    expected = np.column_stack(CoordTransArray.wgs84_to_gcj02(rows[:, 0], rows[:, 1]))
+    assert np.allclose([[float(v) for v in fields[1:]] for fields in data], expected, atol=1e-8)
+
+
+def test_blank_lines_without_keep_columns(tmp_path, test_coords):
+    src, dst = str(tmp_path / 'in.csv'), str(tmp_path / 'out.csv')
+    _write_csv(src, test_coords[:5], blank_after=(0, 2))
+    CsvConverter('wgs84_to_gcj02', precision=8).convert(src, dst)
+    with open(src, encoding='utf-8') as f_in, open(dst, encoding='utf-8') as f_out:
+        assert [bool(line.strip()) for line in f_in] == [bool(line.strip()) for line in f_out]
+
+
+def test_trans_proj_and_iter_convert(tmp_path, test_coords):
+    src = str(tmp_path / 'in.csv')
+    _write_csv(src, test_coords, blank_after=(3,))
+    trans = TransProj(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.xian80_gauss_3, target_with_zone=True)
+    chunks = list(CsvConverter(trans, columns=(0, 1, 2), chunk_size=4).iter_convert(src))
+    result = [np.concatenate(column) for column in zip(*chunks)]
+    expected = trans.transform_many(*test_coords.T)
+    assert all(np.allclose(a, b, atol=1e-6) for a, b in zip(result, expected))
+
+
+def test_epsg_method_allowlist():
+    assert epsg_method('cgcs2000_gauss_3') == Epsg.cgcs2000_gauss_3
+    for name in ('crs', 'calc_number', 'calc_number_lng0', 'zone_epsg_codes', '_build_zone_epsg', 'gauss_codes'):
+        with pytest.raises(argparse.ArgumentTypeError):
+            epsg_method(name)
+
+
+def test_cli_convert(tmp_path, test_coords, capsys):
+    src, dst = str(tmp_path / 'in.csv'), str(tmp_path / 'out.csv')
+    _write_csv(src, test_coords)
+    assert main(['convert', src, dst, '--pair', 'wgs84_3d', 'cgcs2000_gauss_3', '--columns', '0', '1', '2',
+                 '--target-with-zone', '--precision', '4', '--progress']) == 0
+    assert '转换点数：%d' % len(test_coords) in capsys.readouterr().err
+    result = np.loadtxt(dst, delimiter=',')
+    trans = TransProj(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.cgcs2000_gauss_3, target_with_zone=True)
+    assert np.allclose(result, np.column_stack(trans.transform_many(*test_coords.T)), atol=1e-4)
+
+    with pytest.raises(SystemExit):
+        main(['convert', src, dst, '--pair', 'crs', 'wgs84'])
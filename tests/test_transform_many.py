@@ -0,0 +1,57 @@
+# -*- encoding: utf-8 -*-
+"""TransProj.transform_many 与逐点转换结果一致"""
+import numpy as np
+import pytest
+
+from geotransform import Epsg, TransProj, TransformerCache
+
+
+def _zone_points(test_coords):
+    """test.csv 平移到 5 个 3 度带"""
+    shifts = np.repeat(np.arange(5) * 3 - 6, len(test_coords))
+    return (np.tile(test_coords[:, 0], 5) + shifts, np.tile(test_coords[:, 1], 5), np.tile(test_coords[:, 2], 5))
+
+
+@pytest.mark.parametrize('kwargs', [
+    dict(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.xian80_gauss_3, target_with_zone=True),
+    dict(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.cgcs2000_gauss_6, target_with_zone=True),
+    dict(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.xian80_gauss_3, target_lng0=114),
+])
+def test_matches_pointwise(test_coords, kwargs):
+    xs, ys, zs = _zone_points(test_coords)
+    trans = TransProj(cache=TransformerCache(), **kwargs)
+    result = np.array(trans.transform_many(xs, ys, zs))
+    expected = np.array([trans(point) for point in zip(xs.tolist(), ys.tolist(), zs.tolist())]).T
+    np.testing.assert_allclose(result, expected, rtol=0, atol=1e-6)
+
+
+def test_projected_input_with_zone(test_coords):
+    xs, ys, zs = _zone_points(test_coords)
+    forward = TransProj(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.cgcs2000_gauss_3, target_with_zone=True)
+    backward = TransProj(exist_proj=Epsg.cgcs2000_gauss_3, exist_with_zone=True, target_proj=Epsg.wgs84_3d)
+    gx, gy, gz = forward.transform_many(xs, ys, zs)
+    assert set((gx // 1000000).astype(int).tolist()) == set(Epsg.calc_number(xs, 3).tolist())
+    lngs, lats, _ = backward.transform_many(gx, gy, gz)
+    np.testing.assert_allclose(lngs, xs, rtol=0, atol=1e-8)
+    np.testing.assert_allclose(lats, ys, rtol=0, atol=1e-8)
+
+
+def test_one_transformer_per_zone(test_coords):
+    xs, ys, zs = _zone_points(test_coords)
+    trans = TransProj(exist_proj=Epsg.wgs84_3d, target_proj=Epsg.xian80_gauss_3, target_with_zone=True,
+                      cache=TransformerCache())
+    trans.transform_many(xs, ys, zs)
+    assert trans.cache.stats()['misses'] == len(set(Epsg.calc_number(xs, 3).tolist()))
+
+
+def test_projected_input_requires_lng0():
+    trans = TransProj(exist_proj=Epsg.cgcs2000_gauss_3, target_proj=Epsg.wgs84)
+    with pytest.raises(TypeError):
+        trans.transform_many([500000.0], [3800000.0])
+
+
+def test_custom_transformer():
+    from pyproj import Transformer
+    trans = TransProj(transformer=Transformer.from_crs(4326, 4547, always_xy=True))
+    xs, ys = trans.transform_many([114.0, 114.5], [30.0, 30.5])
+    assert abs(xs[0] - 500000) < 1e-6
@@ -0,0 +1,109 @@
+# -*- encoding: utf-8 -*-
+"""TransformerCache 的共享、淘汰和线程安全"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from pyproj import Transformer
+
+from geotransform import Epsg, TransProj, TransformerCache
+
+
+def _factory(calls):
+    def factory():
+        calls.append(threading.get_ident())
+        return Transformer.from_crs(4326, 4547, always_xy=True)
+    return factory
+
+
+def test_shared_between_trans_projs():
+    cache = TransformerCache()
+    first = TransProj(exist_proj=Epsg.wgs84, target_proj=Epsg.cgcs2000_gauss_3, cache=cache)
+    second = TransProj(exist_proj=Epsg.wgs84, target_proj=Epsg.cgcs2000_gauss_3, cache=cache)
+    assert first((114.0, 30.0)) == second((114.0, 30.0))
+    stats = cache.stats()
+    assert stats['misses'] == 1 and stats['hits'] == 1 and stats['hit_rate'] == 0.5
+    assert list(first.transformers) == list(second.transformers) == cache.keys()
+
+
+def test_lru_eviction():
+    cache = TransformerCache(maxsize=2)
+    calls = []
+    for key in ('a', 'b', 'a', 'c'):
+        cache.get(key, _factory(calls))
+    # b 最久未使用，被淘汰
+    assert cache.keys() == ['a', 'c'] and 'b' not in cache
+    assert len(calls) == 3 and cache.stats()['evictions'] == 1
+    cache.get('b', _factory(calls))
+    assert len(calls) == 4 and cache.keys() == ['c', 'b']
+
+
+def test_resize_and_clear():
+    cache = TransformerCache()
+    calls = []
+    for key in 'abcd':
+        cache.get(key, _factory(calls))
+    cache.resize(1)
+    assert cache.keys() == ['d'] and cache.stats()['evictions'] == 3
+    cache.clear()
+    assert len(cache) == 0 and cache.stats()['misses'] == 0
+
+
+def test_peek_does_not_count():
+    cache = TransformerCache()
+    assert cache.peek('a') is None
+    transformer = cache.get('a', _factory([]))
+    assert cache.peek('a') is transformer
+    assert cache.stats()['hits'] == 0
+
+
+def test_concurrent_builds_once():
+    cache = TransformerCache()
+    calls = []
+    factory = _factory(calls)
+
+    def slow_factory():
+        time.sleep(0.05)
+        return factory()
+
+    threads = [threading.Thread(target=cache.get, args=('a', slow_factory)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert cache.stats()['misses'] == 1 and cache.stats()['hits'] == 7
+
+
+def test_threads_match_single_thread():
+    """多个线程同时使用同一个 TransProj 和缓存，逐点和批量转换的结果与单线程完全相同"""
+    rng = np.random.default_rng(0)
+    lngs = rng.uniform(100, 125, 1000)
+    lats = rng.uniform(20, 50, 1000)
+    pairs = [(Epsg.wgs84, Epsg.cgcs2000_gauss_3), (Epsg.wgs84, Epsg.bj54_gauss_3), (Epsg.wgs84, Epsg.xian80_gauss_6)]
+    cache = TransformerCache()
+    trans_projs = [TransProj(exist_proj=exist_proj, target_proj=target_proj, target_with_zone=True, cache=cache)
+                   for exist_proj, target_proj in pairs]
+    # 单线程（主线程）的结果，transformer 由主线程创建，工作线程只能使用复制的 transformer
+    expected = []
+    for trans_proj in trans_projs:
+        xs, ys = trans_proj.transform_many(lngs, lats)
+        points = [trans_proj((lng, lat)) for lng, lat in zip(lngs[::50].tolist(), lats[::50].tolist())]
+        expected.append((xs, ys, points))
+
+    def stress(task):
+        trans_proj = trans_projs[task % len(pairs)]
+        expect_xs, expect_ys, expect_points = expected[task % len(pairs)]
+        for _ in range(2):
+            xs, ys = trans_proj.transform_many(lngs, lats)
+            assert np.array_equal(xs, expect_xs) and np.array_equal(ys, expect_ys)
+        points = [trans_proj((lng, lat)) for lng, lat in zip(lngs[::50].tolist(), lats[::50].tolist())]
+        assert points == expect_points
+        return task
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert list(executor.map(stress, range(24))) == list(range(24))
+    stats = cache.stats()
+    # 每个 transformer 只创建一次，其他线程由 pipeline 复制
+    assert stats['misses'] == len(cache) and stats['clones'] > 0
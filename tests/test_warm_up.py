@@ -0,0 +1,92 @@
+# -*- encoding: utf-8 -*-
+"""transformer 预热和 PROJ pipeline 缓存文件"""
+import json
+
+import pytest
+
+from geotransform import Epsg, TransProj, TransformerCache, transformer_cache
+from geotransform.projection import warm_up
+from geotransform.__main__ import main
+
+
+def _trans(cache, **kwargs):
+    return TransProj(exist_proj=Epsg.wgs84, target_proj=Epsg.cgcs2000_gauss_3, target_with_zone=True, cache=cache,
+                     **kwargs)
+
+
+def test_zone_keys():
+    trans = _trans(TransformerCache())
+    assert trans.zone_keys([113.9, 114.2, 116.9]) == [(None, 114), (None, 117)]
+    assert len(trans.zone_keys()) == 21
+    assert _trans(TransformerCache(), target_lng0=114).zone_keys([110, 120]) == [(None, 114)]
+
+
+def test_zone_keys_from_coordinates():
+    projected = TransProj(exist_proj=Epsg.cgcs2000_gauss_3, exist_with_zone=True, target_proj=Epsg.wgs84,
+                          cache=TransformerCache())
+    assert projected.zone_keys(xs=[38500000.0, 38400000.0, 39500000.0]) == [(114, None), (117, None)]
+    cache = TransformerCache()
+    trans = _trans(cache)
+    assert trans.warm_up(keys=trans.zone_keys(xs=[113.9, 114.2])) == 1
+    assert len(cache) == 1
+
+
+def test_warm_up_builds_transformers():
+    cache = TransformerCache()
+    trans = _trans(cache)
+    assert trans.warm_up([111, 114, 117]) == 3
+    assert len(cache) == 3
+    trans((114.1, 30.0))
+    assert cache.stats()['misses'] == 3 and cache.stats()['hits'] == 1
+
+
+def test_warm_up_threads():
+    cache = TransformerCache()
+    futures = warm_up([_trans(cache), _trans(cache, target_lng0=114)], [111, 114], workers=2)
+    assert all(future.done() for future in futures)
+    assert len(cache) == 2
+
+
+def test_warm_up_reports_failures(monkeypatch):
+    cache = TransformerCache()
+    good, bad = _trans(cache), _trans(cache, target_lng0=114)
+
+    def fail(exist_lng0, target_lng0):
+        raise RuntimeError('PROJ 数据库不可用')
+
+    monkeypatch.setattr(bad, '_cached_transformer', fail)
+    with pytest.raises(RuntimeError):
+        warm_up([good, bad], [111, 114], workers=2)
+    # 其他任务照常完成
+    assert len(cache) == 2
+    futures = warm_up([bad], [114], wait=False)
+    assert isinstance(futures[0].exception(), RuntimeError)
+
+
+def test_pipeline_cache_file(tmp_path):
+    path = str(tmp_path / 'pipelines.json')
+    cold = TransformerCache(pipeline_path=path)
+    expected = _trans(cold)((114.1, 30.0))
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    assert len(data['pipelines']) == 1 and data['proj_version']
+
+    warm = TransformerCache(pipeline_path=path)
+    assert _trans(warm)((114.1, 30.0)) == pytest.approx(expected, abs=1e-9)
+    assert warm.stats()['pipeline_builds'] == 1
+
+
+def test_pipeline_cache_ignores_other_proj_version(tmp_path):
+    path = tmp_path / 'pipelines.json'
+    path.write_text(json.dumps({'proj_version': '0.0.0', 'pipelines': {'key': 'proj=noop'}}), encoding='utf-8')
+    cache = TransformerCache(pipeline_path=str(path))
+    assert cache.pipelines == {}
+
+
+def test_cli_warmup(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(transformer_cache, 'pipeline_path', None)
+    path = str(tmp_path / 'pipelines.json')
+    assert main(['warmup', '--pair', 'wgs84', 'xian80_gauss_6', '--lngs', '111', '117', '--pipeline-cache', path]) == 0
+    with open(path, encoding='utf-8') as f:
+        assert len(json.load(f)['pipelines']) == 2
+    assert 'PROJ pipeline' in capsys.readouterr().out